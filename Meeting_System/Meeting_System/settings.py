@@ -11,7 +11,8 @@ https://docs.djangoproject.com/en/6.0/ref/settings/
 """
 
 from pathlib import Path
-from decouple import config
+from decouple import Csv, config
+from django.core.exceptions import ImproperlyConfigured
 
 # Build paths inside the project like this: BASE_DIR / 'subdir'.
 BASE_DIR = Path(__file__).resolve().parent.parent
@@ -43,6 +44,8 @@ INSTALLED_APPS = [
 ]
 
 MIDDLEWARE = [
+    'Meetingroom.instrumentation.PerformanceMiddleware',
+    'Meetingroom.routers.ReplicaMiddleware',
     'django.middleware.security.SecurityMiddleware',
     'django.contrib.sessions.middleware.SessionMiddleware',
     'django.middleware.common.CommonMiddleware',
@@ -83,6 +86,51 @@ DATABASES = {
         'PASSWORD': config('DB_PASSWORD'),
         'HOST': config('DB_HOST'),
         'PORT': config('DB_PORT'),
+        # Seconds a connection is kept for later requests ('None' keeps it
+        # forever, 0 closes it after each request), and whether a reused
+        # connection is checked before the request's first query.
+        'CONN_MAX_AGE': config('DB_CONN_MAX_AGE', default=60, cast=lambda value: None if str(value).lower() == 'none' else int(value)),
+        'CONN_HEALTH_CHECKS': config('DB_CONN_HEALTH_CHECKS', default=True, cast=bool),
+        'OPTIONS': {},
+    }
+}
+
+# Native connection pool, only available with PostgreSQL (psycopg[pool]);
+# MySQL relies on CONN_MAX_AGE above. Pooled connections go back to the pool
+# after each request, so CONN_MAX_AGE is forced to 0.
+DB_POOL_MAX_SIZE = config('DB_POOL_MAX_SIZE', default=0, cast=int)
+if DB_POOL_MAX_SIZE:
+    if DATABASES['default']['ENGINE'] != 'django.db.backends.postgresql':
+        raise ImproperlyConfigured('DB_POOL_MAX_SIZE needs the PostgreSQL backend; use DB_CONN_MAX_AGE instead.')
+    DATABASES['default']['CONN_MAX_AGE'] = 0
+    DATABASES['default']['OPTIONS']['pool'] = {
+        'min_size': config('DB_POOL_MIN_SIZE', default=2, cast=int),
+        'max_size': DB_POOL_MAX_SIZE,
+        'timeout': config('DB_POOL_TIMEOUT', default=10, cast=int),
+    }
+
+# Read replicas of 'default', used by Meetingroom.routers.ReplicaRouter. Each
+# host in DB_REPLICA_HOSTS becomes a 'replicaN' alias with the primary's
+# credentials; tests mirror it to 'default' since nothing replicates there.
+DB_REPLICA_HOSTS = config('DB_REPLICA_HOSTS', default='', cast=Csv())
+for number, host in enumerate(DB_REPLICA_HOSTS, start=1):
+    DATABASES[f'replica{number}'] = dict(DATABASES['default'], HOST=host, TEST={'MIRROR': 'default'})
+if DATABASES['default']['ENGINE'] == 'django.db.backends.sqlite3' and not DB_REPLICA_HOSTS:
+    # A second SQLite file stands in for a replica so the routing can be run
+    # locally and in tests. It is never written to by anything, so it only
+    # serves reads when listed in MEETINGROOM_READ_REPLICAS.
+    DATABASES['replica'] = dict(DATABASES['default'], NAME=f"{DATABASES['default']['NAME']}-replica")
+
+DATABASE_ROUTERS = ['Meetingroom.routers.ReplicaRouter']
+
+
+# Cache
+# https://docs.djangoproject.com/en/6.0/topics/cache/
+
+CACHES = {
+    'default': {
+        'BACKEND': config('CACHE_BACKEND', default='django.core.cache.backends.locmem.LocMemCache'),
+        'LOCATION': config('CACHE_LOCATION', default=''),
     }
 }
 
@@ -122,3 +170,52 @@ USE_TZ = True
 # https://docs.djangoproject.com/en/6.0/howto/static-files/
 
 STATIC_URL = 'static/'
+
+
+# Meetingroom app
+# Answer AvailableRoomsView time-window queries from the in-process
+# interval index in Meetingroom/availability.py instead of the database.
+MEETINGROOM_AVAILABILITY_INDEX = config('MEETINGROOM_AVAILABILITY_INDEX', default=False, cast=bool)
+# Cache alias and lifetime (seconds) for the serialized active-room catalogue.
+MEETINGROOM_CACHE_ALIAS = config('MEETINGROOM_CACHE_ALIAS', default='default')
+MEETINGROOM_CATALOGUE_TTL = config('MEETINGROOM_CATALOGUE_TTL', default=3600, cast=int)
+# Bookable hours per day, the denominator for utilization analytics.
+MEETINGROOM_OPEN_HOURS_PER_DAY = config('MEETINGROOM_OPEN_HOURS_PER_DAY', default=10, cast=int)
+# Request instrumentation (Meetingroom.instrumentation): fraction of requests
+# measured, and the wall time above which a request is logged as slow.
+MEETINGROOM_METRICS_ENABLED = config('MEETINGROOM_METRICS_ENABLED', default=True, cast=bool)
+MEETINGROOM_METRICS_SAMPLE_RATE = config('MEETINGROOM_METRICS_SAMPLE_RATE', default=0.1, cast=float)
+MEETINGROOM_SLOW_REQUEST_MS = config('MEETINGROOM_SLOW_REQUEST_MS', default=500, cast=int)
+# Booking event feed (Meetingroom.events): backend class (MemoryBackend is
+# per process; CacheBackend shares events through the cache above), how many
+# recent events a client can resume from, and SSE heartbeat/stream lengths.
+MEETINGROOM_EVENTS_BACKEND = config('MEETINGROOM_EVENTS_BACKEND', default='Meetingroom.events.MemoryBackend')
+MEETINGROOM_EVENTS_BUFFER = config('MEETINGROOM_EVENTS_BUFFER', default=1000, cast=int)
+MEETINGROOM_EVENTS_HEARTBEAT = config('MEETINGROOM_EVENTS_HEARTBEAT', default=15, cast=int)
+MEETINGROOM_EVENTS_STREAM_SECONDS = config('MEETINGROOM_EVENTS_STREAM_SECONDS', default=300, cast=int)
+# archive_bookings moves bookings that ended more than this many days ago.
+MEETINGROOM_ARCHIVE_AFTER_DAYS = config('MEETINGROOM_ARCHIVE_AFTER_DAYS', default=365, cast=int)
+# How long (seconds) a response is replayed for a repeated Idempotency-Key.
+MEETINGROOM_IDEMPOTENCY_TTL = config('MEETINGROOM_IDEMPOTENCY_TTL', default=86400, cast=int)
+# Read replicas (Meetingroom.routers): aliases that GET/HEAD/OPTIONS
+# requests read from, and how long a client that wrote reads from the primary.
+MEETINGROOM_READ_REPLICAS = config(
+    'MEETINGROOM_READ_REPLICAS', default=','.join(f'replica{n}' for n in range(1, len(DB_REPLICA_HOSTS) + 1)), cast=Csv()
+)
+MEETINGROOM_REPLICA_STICKY_SECONDS = config('MEETINGROOM_REPLICA_STICKY_SECONDS', default=5, cast=int)
+# Build the room and booking list responses from values() rows instead of
+# DRF serializers (same output), and render them with orjson when installed.
+MEETINGROOM_FAST_SERIALIZERS = config('MEETINGROOM_FAST_SERIALIZERS', default=True, cast=bool)
+MEETINGROOM_ORJSON = config('MEETINGROOM_ORJSON', default=True, cast=bool)
+# bookings/sync/ only returns History rows older than this many seconds, so
+# transactions still committing when a client syncs are not skipped.
+MEETINGROOM_SYNC_SETTLE_SECONDS = config('MEETINGROOM_SYNC_SETTLE_SECONDS', default=5, cast=int)
+# iCalendar feeds: days of bookings before and after today, and how long a
+# rendered feed stays cached (it is keyed by its ETag, so never served stale).
+MEETINGROOM_ICAL_PAST_DAYS = config('MEETINGROOM_ICAL_PAST_DAYS', default=30, cast=int)
+MEETINGROOM_ICAL_FUTURE_DAYS = config('MEETINGROOM_ICAL_FUTURE_DAYS', default=180, cast=int)
+MEETINGROOM_ICAL_CACHE_TTL = config('MEETINGROOM_ICAL_CACHE_TTL', default=3600, cast=int)
+# Tentative holds (meeting-rooms/<id>/hold/): default and maximum lifetime in
+# seconds; expire_holds cancels the ones that were not confirmed in time.
+MEETINGROOM_HOLD_TTL_SECONDS = config('MEETINGROOM_HOLD_TTL_SECONDS', default=300, cast=int)
+MEETINGROOM_HOLD_MAX_TTL_SECONDS = config('MEETINGROOM_HOLD_MAX_TTL_SECONDS', default=1800, cast=int)
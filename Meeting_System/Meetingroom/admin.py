@@ -1,5 +1,5 @@
 from django.contrib import admin
-from .models import MeetingRoom, Booking, History
+from .models import MeetingRoom, Booking, History, RoomUsage, ArchivedBooking
 
 
 @admin.register(MeetingRoom)
@@ -21,4 +21,18 @@ class BookingAdmin(admin.ModelAdmin):
 class HistoryAdmin(admin.ModelAdmin):
     list_display = ['booking', 'action', 'user', 'timestamp']
     list_filter = ['action']
-    date_hierarchy = 'timestamp'
\ No newline at end of file
+    date_hierarchy = 'timestamp'
+
+
+@admin.register(RoomUsage)
+class RoomUsageAdmin(admin.ModelAdmin):
+    list_display = ['meeting_room', 'date', 'hour', 'booked_seconds', 'created_count', 'cancelled_count']
+    list_filter = ['meeting_room']
+    date_hierarchy = 'date'
+
+
+@admin.register(ArchivedBooking)
+class ArchivedBookingAdmin(admin.ModelAdmin):
+    list_display = ['meeting_room', 'user', 'start_time', 'end_time', 'status', 'archived_at']
+    list_filter = ['status', 'meeting_room']
+    date_hierarchy = 'start_time'
@@ -0,0 +1,211 @@
+from collections import defaultdict
+from datetime import datetime, time, timedelta
+from django.conf import settings
+from django.db import IntegrityError, connections, router, transaction
+from django.db.models import F, Sum
+from django.db.models.functions import TruncWeek
+from django.utils import timezone
+from .models import ACTIVE_STATUSES, Booking, MeetingRoom, RoomUsage
+
+COUNTERS = ["booked_seconds", "created_count", "cancelled_count"]
+
+
+def hour_buckets(start_time, end_time):
+    """Split [start_time, end_time) into (date, hour, seconds) in local time."""
+    cursor = timezone.localtime(start_time)
+    end = timezone.localtime(end_time)
+    while cursor < end:
+        next_hour = cursor.replace(minute=0, second=0, microsecond=0) + timedelta(hours=1)
+        chunk_end = min(next_hour, end)
+        yield cursor.date(), cursor.hour, int((chunk_end - cursor).total_seconds())
+        cursor = chunk_end
+
+
+def _increment(room_id, date, hour, changes):
+    updates = {field: F(field) + value for field, value in changes.items() if value}
+    if not updates:
+        return
+    rollup = RoomUsage.objects.filter(meeting_room_id=room_id, date=date, hour=hour)
+    if rollup.update(**updates):
+        return
+    try:
+        with transaction.atomic():
+            RoomUsage.objects.create(meeting_room_id=room_id, date=date, hour=hour, **changes)
+    except IntegrityError:
+        # Another writer created the row first.
+        rollup.update(**updates)
+
+
+def _upsert(room_id, buckets):
+    """
+    Add ``buckets`` ({(date, hour): {counter: delta}}) to one room's rollups
+    with a single INSERT ... ON CONFLICT / ON DUPLICATE KEY statement, so a
+    booking costs one round trip however many hours it spans.
+    """
+    buckets = {key: changes for key, changes in buckets.items() if any(changes.values())}
+    if not buckets:
+        return
+    connection = connections[router.db_for_write(RoomUsage)]
+    if connection.vendor not in ("postgresql", "sqlite", "mysql"):
+        for (date, hour), changes in buckets.items():
+            _increment(room_id, date, hour, changes)
+        return
+    qn = connection.ops.quote_name
+    table = qn(RoomUsage._meta.db_table)
+    keys = [qn(RoomUsage._meta.get_field(name).column) for name in ("meeting_room", "date", "hour")]
+    counters = [qn(name) for name in COUNTERS]
+    row = f"({', '.join(['%s'] * (len(keys) + len(counters)))})"
+    if connection.vendor == "mysql":
+        conflict = "ON DUPLICATE KEY UPDATE " + ", ".join(f"{c} = {c} + VALUES({c})" for c in counters)
+    else:
+        conflict = f"ON CONFLICT ({', '.join(keys)}) DO UPDATE SET " + ", ".join(
+            f"{c} = {table}.{c} + EXCLUDED.{c}" for c in counters
+        )
+    sql = f"INSERT INTO {table} ({', '.join(keys + counters)}) VALUES {', '.join([row] * len(buckets))} {conflict}"
+    params = []
+    for (date, hour), changes in buckets.items():
+        params += [room_id, connection.ops.adapt_datefield_value(date), hour, *(changes[name] for name in COUNTERS)]
+    with connection.cursor() as cursor:
+        cursor.execute(sql, params)
+
+
+def _add_interval(buckets, start_time, end_time, sign, created=0, cancelled=0):
+    for i, (date, hour, seconds) in enumerate(hour_buckets(start_time, end_time)):
+        changes = buckets.setdefault((date, hour), dict.fromkeys(COUNTERS, 0))
+        changes["booked_seconds"] += sign * seconds
+        # Counts belong to the hour the booking starts in.
+        if i == 0:
+            changes["created_count"] += created
+            changes["cancelled_count"] += cancelled
+
+
+def apply_change(room_id, start_time, end_time, sign, created=0, cancelled=0):
+    """Add (sign=1) or remove (sign=-1) a booked interval from the rollups."""
+    buckets = {}
+    _add_interval(buckets, start_time, end_time, sign, created, cancelled)
+    _upsert(room_id, buckets)
+
+
+def record_history(action, room_id, start_time, end_time, previous_start_time=None, previous_end_time=None):
+    """Apply one History entry to the rollups."""
+    if action == "created":
+        apply_change(room_id, start_time, end_time, 1, created=1)
+    elif action == "cancelled":
+        apply_change(room_id, previous_start_time or start_time, previous_end_time or end_time, -1, cancelled=1)
+    elif action == "updated" and previous_start_time and previous_end_time:
+        # Old and new interval in one statement; overlapping hours net out.
+        buckets = {}
+        _add_interval(buckets, previous_start_time, previous_end_time, -1)
+        _add_interval(buckets, start_time, end_time, 1)
+        _upsert(room_id, buckets)
+
+
+def rebuild(start_date, end_date, chunk_size=2000):
+    """
+    Recompute the rollups for [start_date, end_date] from Booking, one day
+    at a time so memory is bounded by a single day's buckets. Returns the
+    number of rollup rows written.
+    """
+    written = 0
+    day = start_date
+    while day <= end_date:
+        day_start = timezone.make_aware(datetime.combine(day, time.min))
+        day_end = day_start + timedelta(days=1)
+        buckets = defaultdict(lambda: dict.fromkeys(COUNTERS, 0))
+        rows = Booking.objects.filter(start_time__lt=day_end, end_time__gt=day_start).values_list(
+            "meeting_room_id", "start_time", "end_time", "status"
+        )
+        for room_id, start_time, end_time, status in rows.iterator(chunk_size=chunk_size):
+            for i, (date, hour, seconds) in enumerate(hour_buckets(start_time, end_time)):
+                if date != day:
+                    continue
+                bucket = buckets[room_id, hour]
+                if status in ACTIVE_STATUSES:
+                    bucket["booked_seconds"] += seconds
+                if i == 0:
+                    bucket["created_count"] += 1
+                    if status == "cancelled":
+                        bucket["cancelled_count"] += 1
+        with transaction.atomic():
+            RoomUsage.objects.filter(date=day).delete()
+            RoomUsage.objects.bulk_create(
+                [
+                    RoomUsage(meeting_room_id=room_id, date=day, hour=hour, **counters)
+                    for (room_id, hour), counters in buckets.items()
+                ],
+                batch_size=chunk_size,
+            )
+        written += len(buckets)
+        day += timedelta(days=1)
+    return written
+
+
+def utilization(start_date, end_date, period="day", room_id=None):
+    """
+    Per-room utilization for [start_date, end_date], answered from the
+    rollups with two aggregate queries plus the room lookup.
+    """
+    open_seconds_per_day = settings.MEETINGROOM_OPEN_HOURS_PER_DAY * 3600
+    usage = RoomUsage.objects.filter(date__gte=start_date, date__lte=end_date)
+    rooms = MeetingRoom.objects.all()
+    if room_id:
+        usage = usage.filter(meeting_room_id=room_id)
+        rooms = rooms.filter(pk=room_id)
+    else:
+        rooms = rooms.filter(is_active=True)
+    bucket = TruncWeek("date") if period == "week" else F("date")
+
+    series = defaultdict(list)
+    booked_seconds = defaultdict(int)
+    rows = (
+        usage.annotate(period_start=bucket)
+        .values("meeting_room_id", "period_start")
+        .annotate(*[Sum(counter) for counter in COUNTERS])
+        .order_by("meeting_room_id", "period_start")
+    )
+    for row in rows:
+        period_start = row["period_start"]
+        if isinstance(period_start, datetime):
+            period_start = period_start.date()
+        days = 1
+        if period == "week":
+            days = (min(period_start + timedelta(days=6), end_date) - max(period_start, start_date)).days + 1
+        booked_seconds[row["meeting_room_id"]] += row["booked_seconds__sum"]
+        series[row["meeting_room_id"]].append({
+            "period_start": period_start,
+            "booked_hours": round(row["booked_seconds__sum"] / 3600, 2),
+            "utilization": round(row["booked_seconds__sum"] / (days * open_seconds_per_day), 4),
+            "bookings": row["created_count__sum"],
+            "cancellations": row["cancelled_count__sum"],
+        })
+
+    peaks = defaultdict(list)
+    rows = (
+        usage.values("meeting_room_id", "hour")
+        .annotate(Sum("booked_seconds"))
+        .filter(booked_seconds__sum__gt=0)
+        .order_by("meeting_room_id", "-booked_seconds__sum", "hour")
+    )
+    for row in rows:
+        if len(peaks[row["meeting_room_id"]]) < 3:
+            peaks[row["meeting_room_id"]].append(row["hour"])
+
+    total_days = (end_date - start_date).days + 1
+    results = []
+    for room in rooms:
+        room_series = series.get(room.pk, [])
+        bookings = sum(item["bookings"] for item in room_series)
+        cancellations = sum(item["cancellations"] for item in room_series)
+        results.append({
+            "room_id": room.pk,
+            "room_name": room.name,
+            "booked_hours": round(booked_seconds[room.pk] / 3600, 2),
+            "open_hours": total_days * settings.MEETINGROOM_OPEN_HOURS_PER_DAY,
+            "utilization": round(booked_seconds[room.pk] / (total_days * open_seconds_per_day), 4),
+            "bookings": bookings,
+            "cancellations": cancellations,
+            "cancellation_rate": round(cancellations / bookings, 4) if bookings else None,
+            "peak_hours": peaks.get(room.pk, []),
+            "series": room_series,
+        })
+    return results
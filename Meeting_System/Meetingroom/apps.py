@@ -3,3 +3,6 @@ from django.apps import AppConfig
 
 class MeetingroomConfig(AppConfig):
     name = 'Meetingroom'
+
+    def ready(self):
+        from . import receivers  # noqa: F401
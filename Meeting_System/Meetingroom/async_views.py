@@ -0,0 +1,175 @@
+"""
+Native async versions of the hot read endpoints, for ASGI deployments.
+
+They return the same payloads as AvailableRoomsView, MeetingRoomView and
+BookingRoomView but use the async ORM, so an idle poller waiting on the
+database does not hold a worker thread.
+"""
+import base64
+from asgiref.sync import sync_to_async
+from django.conf import settings
+from django.db.models import F, Q, Value
+from django.db.models.functions import Coalesce
+from django.http import HttpResponse, JsonResponse, StreamingHttpResponse
+from django.utils import timezone
+from django.utils.dateparse import parse_datetime
+from django.views.decorators.http import require_GET
+from rest_framework.exceptions import ValidationError
+from rest_framework.pagination import _positive_int
+from . import catalogue, events
+from .availability import room_index
+from .models import Booking, MeetingRoom
+from .serializers import AvailableRoomSerializer, BookingListSerializer, RoomSearchSerializer
+from .views import parse_booking_filters, search_rooms
+
+BOOKING_PAGE_SIZE = 50
+BOOKING_MAX_PAGE_SIZE = 500
+
+
+def _datetime(value):
+    # Same output as DRF's DateTimeField.
+    if value is None:
+        return None
+    value = timezone.localtime(value).isoformat()
+    if value.endswith("+00:00"):
+        value = value[:-6] + "Z"
+    return value
+
+
+def _catalogue_response(request, data, etag, hit, wrap=None):
+    headers = {"ETag": etag, "X-Cache": "HIT" if hit else "MISS"}
+    if catalogue.not_modified(request, etag):
+        return HttpResponse(status=304, headers=headers)
+    return JsonResponse(wrap(data) if wrap else data, safe=False, headers=headers)
+
+
+@require_GET
+async def meeting_rooms(request):
+    data, etag, hit = await catalogue.aget_catalogue("rooms")
+    return _catalogue_response(request, data, etag, hit)
+
+
+@require_GET
+async def available_rooms(request):
+    start_time_str = request.GET.get("start_time")
+    end_time_str = request.GET.get("end_time")
+    search = RoomSearchSerializer(data=request.GET)
+    if not search.is_valid():
+        return JsonResponse(search.errors, status=400)
+    start_time = end_time = None
+    if start_time_str and end_time_str:
+        start_time = parse_datetime(start_time_str)
+        end_time = parse_datetime(end_time_str)
+        if not start_time or not end_time:
+            return JsonResponse({"error": "Invalid datetime format. Use ISO 8601 (e.g., 2026-01-28T10:00:00Z)"}, status=400)
+        if start_time >= end_time:
+            return JsonResponse({"error": "End time must be after start time"}, status=400)
+    if search.validated_data:
+        data = await sync_to_async(search_rooms)(search.validated_data, start_time, end_time)
+        response = {"available_rooms": data}
+        if start_time:
+            response.update(start_time=start_time.isoformat(), end_time=end_time.isoformat())
+        response["count"] = len(data)
+        return JsonResponse(response)
+    if not start_time:
+        data, etag, hit = await catalogue.aget_catalogue("available")
+        return _catalogue_response(request, data, etag, hit, lambda data: {"available_rooms": data, "count": len(data)})
+
+    rooms = MeetingRoom.objects.filter(is_active=True)
+    fields = AvailableRoomSerializer.Meta.fields
+    if settings.MEETINGROOM_AVAILABILITY_INDEX:
+        candidates = [room async for room in rooms.values(*fields)]
+        free = await sync_to_async(room_index.free_rooms)(
+            [MeetingRoom(pk=room["id"]) for room in candidates], start_time, end_time
+        )
+        free_ids = {room.pk for room in free}
+        data = [room for room in candidates if room["id"] in free_ids]
+    else:
+        booked = Booking.objects.overlapping(start_time, end_time).values("meeting_room_id")
+        data = [room async for room in rooms.exclude(id__in=booked).values(*fields)]
+    return JsonResponse({
+        "available_rooms": data,
+        "start_time": start_time.isoformat(),
+        "end_time": end_time.isoformat(),
+        "count": len(data),
+    })
+
+
+def _encode_cursor(start_time, pk):
+    return base64.urlsafe_b64encode(f"{start_time.isoformat()}|{pk}".encode()).decode()
+
+
+def _decode_cursor(cursor):
+    try:
+        start_time, pk = base64.urlsafe_b64decode(cursor.encode()).decode().split("|")
+        return parse_datetime(start_time), int(pk)
+    except (ValueError, UnicodeDecodeError):
+        return None
+
+
+@require_GET
+async def bookings(request):
+    try:
+        filters = parse_booking_filters(request.GET)
+    except ValidationError as e:
+        return JsonResponse(e.detail, status=400)
+    try:
+        # Same parsing as BookingCursorPagination: non-positive values fall back to the default.
+        page_size = _positive_int(request.GET["page_size"], strict=True, cutoff=BOOKING_MAX_PAGE_SIZE)
+    except (KeyError, ValueError):
+        page_size = BOOKING_PAGE_SIZE
+
+    queryset = Booking.objects.search(**filters).order_by("-start_time", "id")
+    if request.GET.get("cursor"):
+        position = _decode_cursor(request.GET["cursor"])
+        if position is None or position[0] is None:
+            return JsonResponse({"error": "Invalid cursor"}, status=404)
+        start_time, pk = position
+        queryset = queryset.filter(Q(start_time__lt=start_time) | Q(start_time=start_time, id__gt=pk))
+
+    rows = queryset.values(
+        *[field for field in BookingListSerializer.Meta.fields if field not in ("meeting_room_name", "user_name")],
+        meeting_room_name=F("meeting_room__name"),
+        user_name=Coalesce(F("user__username"), Value("Anonymous")),
+    )
+    page = [row async for row in rows[:page_size + 1]]
+    next_url = None
+    if len(page) > page_size:
+        page = page[:page_size]
+        params = request.GET.copy()
+        params["cursor"] = _encode_cursor(page[-1]["start_time"], page[-1]["id"])
+        next_url = request.build_absolute_uri(f"{request.path}?{params.urlencode()}")
+
+    results = []
+    for row in page:
+        results.append({
+            field: _datetime(row[field]) if field in ("start_time", "end_time", "created_at", "updated_at") else row[field]
+            for field in BookingListSerializer.Meta.fields
+        })
+    return JsonResponse({"next": next_url, "previous": None, "results": results})
+
+
+@require_GET
+async def room_events(request):
+    """
+    Server-sent booking.created / booking.cancelled events, for ``room_id``
+    (repeatable or comma separated) or all rooms. A new subscriber starts
+    at the current event; a reconnecting one sends Last-Event-ID.
+    """
+    try:
+        room_ids = {int(value) for param in request.GET.getlist("room_id") for value in param.split(",") if value}
+        last_event_id = request.headers.get("Last-Event-ID") or request.GET.get("last_event_id")
+        last_event_id = int(last_event_id) if last_event_id else None
+    except ValueError:
+        return JsonResponse({"error": "room_id and Last-Event-ID must be integers"}, status=400)
+
+    backend = events.get_backend()
+    if last_event_id is None:
+        last_event_id = await backend.alast_id()
+    response = StreamingHttpResponse(
+        events.stream(backend, last_event_id, room_ids), content_type="text/event-stream"
+    )
+    response["Cache-Control"] = "no-cache"
+    # Stop nginx from buffering the stream.
+    response["X-Accel-Buffering"] = "no"
+    return response
@@ -0,0 +1,193 @@
+import base64
+import heapq
+import threading
+from bisect import bisect_left, insort
+from itertools import islice
+from .models import Booking
+from .routers import use_primary
+
+
+class RoomIntervalIndex:
+    """
+    Process-local index of active bookings, kept per room as a list of
+    (start_time, end_time, booking_id) tuples sorted by start time.
+
+    Active bookings in one room never overlap, so ends are sorted too and a
+    free/busy check is a single bisect. The index loads lazily on first use
+    and is kept current after commit by the receivers in receivers.py:
+    Booking post_save/post_delete, and the bookings_bulk_created,
+    bookings_bulk_rescheduled and bookings_bulk_cancelled signals sent by
+    the bulk paths in services.py. cancel_booking() and reschedule_booking()
+    update it directly. Other writes that bypass these (a bare
+    queryset.update or bulk_create) are not seen; use the
+    check_availability_index command to detect drift.
+    """
+
+    def __init__(self):
+        self._lock = threading.RLock()
+        self._rooms = None
+        self._bookings = None
+
+    @property
+    def loaded(self):
+        return self._rooms is not None
+
+    def reset(self):
+        with self._lock:
+            self._rooms = None
+            self._bookings = None
+
+    def load(self):
+        rooms = {}
+        bookings = {}
+        rows = (
+            Booking.objects.active()
+            .order_by("meeting_room_id", "start_time")
+            .values_list("id", "meeting_room_id", "start_time", "end_time")
+        )
+        # Later changes arrive through signals, so a load from a lagging
+        # replica would stay wrong for the life of the process.
+        with use_primary():
+            for booking_id, room_id, start_time, end_time in rows.iterator(chunk_size=2000):
+                rooms.setdefault(room_id, []).append((start_time, end_time, booking_id))
+                bookings[booking_id] = (room_id, start_time, end_time)
+        with self._lock:
+            self._rooms = rooms
+            self._bookings = bookings
+
+    def _ensure_loaded(self):
+        if self._rooms is None:
+            self.load()
+
+    def add(self, booking_id, room_id, start_time, end_time):
+        with self._lock:
+            if self._rooms is None:
+                return
+            self._discard(booking_id)
+            insort(self._rooms.setdefault(room_id, []), (start_time, end_time, booking_id))
+            self._bookings[booking_id] = (room_id, start_time, end_time)
+
+    def remove(self, booking_id):
+        with self._lock:
+            if self._rooms is None:
+                return
+            self._discard(booking_id)
+
+    def _discard(self, booking_id):
+        entry = self._bookings.pop(booking_id, None)
+        if entry is None:
+            return
+        room_id, start_time, end_time = entry
+        intervals = self._rooms.get(room_id, [])
+        i = bisect_left(intervals, (start_time, end_time, booking_id))
+        if i < len(intervals) and intervals[i][2] == booking_id:
+            del intervals[i]
+
+    def is_free(self, room_id, start_time, end_time):
+        with self._lock:
+            self._ensure_loaded()
+            intervals = self._rooms.get(room_id)
+            if not intervals:
+                return True
+            # Last booking starting before end_time is the only candidate overlap.
+            i = bisect_left(intervals, (end_time,))
+            return i == 0 or intervals[i - 1][1] <= start_time
+
+    def free_rooms(self, rooms, start_time, end_time):
+        return [room for room in rooms if self.is_free(room.pk, start_time, end_time)]
+
+    def diff(self):
+        """Return (missing, stale) booking ids compared with the database."""
+        with self._lock:
+            self._ensure_loaded()
+            indexed = dict(self._bookings)
+        missing = []
+        rows = Booking.objects.active().values_list("id", "meeting_room_id", "start_time", "end_time")
+        for booking_id, room_id, start_time, end_time in rows.iterator(chunk_size=2000):
+            if indexed.pop(booking_id, None) != (room_id, start_time, end_time):
+                missing.append(booking_id)
+        return missing, sorted(indexed)
+
+
+room_index = RoomIntervalIndex()
+
+
+def find_free_slots(rooms, window_start, window_end, duration, granularity, limit):
+    """
+    Return up to ``limit`` (slot_start, room) pairs, earliest first, where
+    ``room`` is free for ``duration`` starting at ``slot_start``. Slot starts
+    are aligned to ``granularity`` steps from ``window_start``; ties go to
+    the room listed first.
+
+    All candidate rooms' bookings are read with one query ordered by start
+    time and swept once to collect each room's free gaps.
+    """
+    rooms = list(rooms)
+    cursors = {room.pk: window_start for room in rooms}
+    gaps = []
+    rows = (
+        Booking.objects.filter(meeting_room_id__in=list(cursors))
+        .overlapping(window_start, window_end)
+        .order_by("start_time")
+        .values_list("meeting_room_id", "start_time", "end_time")
+    )
+    for room_id, start_time, end_time in rows:
+        cursor = cursors[room_id]
+        if start_time - cursor >= duration:
+            gaps.append((cursor, start_time, room_id))
+        if end_time > cursor:
+            cursors[room_id] = end_time
+    for room_id, cursor in cursors.items():
+        if window_end - cursor >= duration:
+            gaps.append((cursor, window_end, room_id))
+
+    rank = {room.pk: position for position, room in enumerate(rooms)}
+
+    def slots(gap_start, gap_end, room_id):
+        steps = -(-(gap_start - window_start) // granularity)
+        slot = window_start + steps * granularity
+        while slot + duration <= gap_end:
+            yield slot, rank[room_id]
+            slot += granularity
+
+    merged = heapq.merge(*(slots(*gap) for gap in gaps))
+    return [(slot, rooms[position]) for slot, position in islice(merged, limit)]
+
+
+def busy_runs(window_start, window_end, slot, room_ids=None):
+    """
+    Return {room_id: [(first, last), ...]}: for each room with active
+    bookings in the window, the merged ranges of ``slot``-sized steps from
+    ``window_start`` (slot indexes, ``last`` exclusive) that a booking
+    overlaps, even partly. Read with one range query over all rooms.
+    """
+    slots = -(-(window_end - window_start) // slot)
+    rows = Booking.objects.active().filter(start_time__lt=window_end, end_time__gt=window_start)
+    if room_ids is not None:
+        rows = rows.filter(meeting_room_id__in=room_ids)
+    rows = rows.order_by("meeting_room_id", "start_time").values_list("meeting_room_id", "start_time", "end_time")
+    runs = {}
+    for room_id, start_time, end_time in rows:
+        first = max(0, (start_time - window_start) // slot)
+        last = min(slots, -(-(end_time - window_start) // slot))
+        room_runs = runs.setdefault(room_id, [])
+        if room_runs and first <= room_runs[-1][1]:
+            room_runs[-1] = (room_runs[-1][0], max(room_runs[-1][1], last))
+        else:
+            room_runs.append((first, last))
+    return runs
+
+
+def encode_bitmap(runs, slots):
+    """Base64 bit array, one bit per slot; slot 0 is the high bit of the first byte."""
+    size = -(-slots // 8)
+    width = size * 8
+    bits = 0
+    for first, last in runs:
+        bits |= ((1 << (last - first)) - 1) << (width - last)
+    return base64.b64encode(bits.to_bytes(size, "big")).decode()
+
+
+def encode_runs(runs, slots):
+    """[[first slot, length], ...] for each busy run."""
+    return [[first, last - first] for first, last in runs]
@@ -0,0 +1,133 @@
+import hashlib
+import json
+from bisect import bisect_left, bisect_right
+from django.conf import settings
+from django.core.cache import caches
+from django.core.serializers.json import DjangoJSONEncoder
+from django.utils.http import parse_etags, quote_etag
+from .instrumentation import measure
+from .models import MeetingRoom
+from .routers import use_primary
+from .serializers import AvailableRoomSerializer, MeetingRoomSerializer
+
+# Serialized views of the active-room list, keyed by the endpoint using them.
+SERIALIZERS = {
+    "rooms": MeetingRoomSerializer,
+    "available": AvailableRoomSerializer,
+}
+KEY_PREFIX = "meetingroom:catalogue"
+
+# (etag, capacities, rooms): the "available" catalogue sorted by capacity.
+_by_capacity = (None, [], [])
+
+
+def get_cache():
+    return caches[settings.MEETINGROOM_CACHE_ALIAS]
+
+
+def _count(name):
+    cache = get_cache()
+    key = f"{KEY_PREFIX}:stats:{name}"
+    cache.add(key, 0, timeout=None)
+    try:
+        cache.incr(key)
+    except ValueError:
+        # Evicted between add() and incr(); losing one count is fine.
+        pass
+
+
+async def _acount(name):
+    cache = get_cache()
+    key = f"{KEY_PREFIX}:stats:{name}"
+    await cache.aadd(key, 0, timeout=None)
+    try:
+        await cache.aincr(key)
+    except ValueError:
+        pass
+
+
+def _etag(data):
+    body = json.dumps(data, cls=DjangoJSONEncoder, sort_keys=True).encode()
+    return quote_etag(hashlib.md5(body, usedforsecurity=False).hexdigest())
+
+
+def get_catalogue(kind):
+    """Return (data, etag, hit) for the serialized active-room list."""
+    cache = get_cache()
+    key = f"{KEY_PREFIX}:{kind}"
+    entry = cache.get(key)
+    if entry is not None:
+        _count("hits")
+        return entry["data"], entry["etag"], True
+
+    _count("misses")
+    rooms = MeetingRoom.objects.filter(is_active=True)
+    # Cached for the TTL, so never built from a lagging replica.
+    with use_primary(), measure("serializer"):
+        if settings.MEETINGROOM_FAST_SERIALIZERS:
+            # values() yields the serializers' fields unchanged, as in aget_catalogue().
+            data = list(rooms.values(*SERIALIZERS[kind].Meta.fields))
+        else:
+            data = list(SERIALIZERS[kind](rooms, many=True).data)
+    etag = _etag(data)
+    cache.set(key, {"data": data, "etag": etag}, timeout=settings.MEETINGROOM_CATALOGUE_TTL)
+    return data, etag, False
+
+
+async def aget_catalogue(kind):
+    """
+    Async get_catalogue(). Builds the same entry from values(), which
+    yields the serializers' fields unchanged, so both paths share the cache.
+    """
+    cache = get_cache()
+    key = f"{KEY_PREFIX}:{kind}"
+    entry = await cache.aget(key)
+    if entry is not None:
+        await _acount("hits")
+        return entry["data"], entry["etag"], True
+
+    await _acount("misses")
+    fields = SERIALIZERS[kind].Meta.fields
+    with use_primary():
+        data = [room async for room in MeetingRoom.objects.filter(is_active=True).values(*fields)]
+    etag = _etag(data)
+    await cache.aset(key, {"data": data, "etag": etag}, timeout=settings.MEETINGROOM_CATALOGUE_TTL)
+    return data, etag, False
+
+
+def capacity_range(data, etag, min_capacity=None, max_capacity=None):
+    """
+    Rooms of an "available" catalogue with min_capacity <= capacity <=
+    max_capacity, smallest first (then by name). The sorted copy is kept
+    per process and rebuilt only when the catalogue's ETag changes.
+    """
+    global _by_capacity
+    cached_etag, capacities, rooms = _by_capacity
+    if cached_etag != etag:
+        rooms = sorted(data, key=lambda room: (room["capacity"], room["name"]))
+        capacities = [room["capacity"] for room in rooms]
+        _by_capacity = (etag, capacities, rooms)
+    low = bisect_left(capacities, min_capacity) if min_capacity is not None else 0
+    high = bisect_right(capacities, max_capacity) if max_capacity is not None else len(rooms)
+    return rooms[low:high]
+
+
+def invalidate():
+    get_cache().delete_many([f"{KEY_PREFIX}:{kind}" for kind in SERIALIZERS])
+
+
+def not_modified(request, etag):
+    header = request.headers.get("If-None-Match")
+    if not header:
+        return False
+    etags = {tag.removeprefix("W/") for tag in parse_etags(header)}
+    return "*" in etags or etag in etags
+
+
+def stats():
+    cache = get_cache()
+    counts = cache.get_many([f"{KEY_PREFIX}:stats:hits", f"{KEY_PREFIX}:stats:misses"])
+    hits = counts.get(f"{KEY_PREFIX}:stats:hits", 0)
+    misses = counts.get(f"{KEY_PREFIX}:stats:misses", 0)
+    total = hits + misses
+    return {"hits": hits, "misses": misses, "hit_ratio": round(hits / total, 4) if total else None}
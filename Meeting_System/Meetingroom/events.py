@@ -0,0 +1,239 @@
+"""
+Booking events for live room-availability feeds.
+
+Committed booking creations and cancellations are published to a backend
+that numbers them; the SSE endpoint in async_views streams them to
+subscribers, which resume after a reconnect from their Last-Event-ID.
+"""
+import asyncio
+import json
+import threading
+import time
+from collections import deque
+from asgiref.sync import sync_to_async
+from django.conf import settings
+from django.core.cache import caches
+from django.utils.module_loading import import_string
+from rest_framework.fields import DateTimeField
+
+EVENT_TYPES = {"created": "booking.created", "updated": "booking.updated", "cancelled": "booking.cancelled"}
+RETRY_MS = 3000
+
+
+class EventBackend:
+    """
+    Base backend. Subclasses implement publish(), read() and last_id();
+    wait() polls read() unless a subclass can be woken up directly.
+    """
+
+    poll_interval = 0.5
+
+    def __init__(self, size):
+        self.size = size
+
+    def publish(self, event):
+        """Store ``event`` under the next sequence number and return it with its ``id``."""
+        raise NotImplementedError
+
+    def read(self, after):
+        """
+        Return (events, complete): the stored events with ids above ``after``,
+        and False if some events after ``after`` are no longer available.
+        """
+        raise NotImplementedError
+
+    def last_id(self):
+        raise NotImplementedError
+
+    async def aread(self, after):
+        return await sync_to_async(self.read, thread_sensitive=False)(after)
+
+    async def alast_id(self):
+        return await sync_to_async(self.last_id, thread_sensitive=False)()
+
+    async def wait(self, after, timeout):
+        """Like read(), but wait up to ``timeout`` seconds for an event."""
+        deadline = time.monotonic() + timeout
+        while True:
+            events, complete = await self.aread(after)
+            remaining = deadline - time.monotonic()
+            if events or not complete or remaining <= 0:
+                return events, complete
+            await asyncio.sleep(min(self.poll_interval, remaining))
+
+
+class MemoryBackend(EventBackend):
+    """Ring buffer in this process; subscribers on other workers never see the events."""
+
+    def __init__(self, size):
+        super().__init__(size)
+        self._lock = threading.Lock()
+        self._events = deque(maxlen=size)
+        self._last_id = 0
+        self._waiters = set()
+
+    def publish(self, event):
+        with self._lock:
+            self._last_id += 1
+            event = dict(event, id=self._last_id)
+            self._events.append(event)
+            waiters = list(self._waiters)
+        # Publishers run in sync code; wake subscribers on their own loops.
+        for loop, waiter in waiters:
+            try:
+                loop.call_soon_threadsafe(waiter.set)
+            except RuntimeError:
+                # Loop already closed.
+                pass
+        return event
+
+    def read(self, after):
+        with self._lock:
+            if after > self._last_id:
+                # Ids from before a restart.
+                return [], False
+            oldest = self._events[0]["id"] if self._events else self._last_id + 1
+            return [event for event in self._events if event["id"] > after], after + 1 >= oldest
+
+    def last_id(self):
+        with self._lock:
+            return self._last_id
+
+    async def aread(self, after):
+        return self.read(after)
+
+    async def alast_id(self):
+        return self.last_id()
+
+    async def wait(self, after, timeout):
+        waiter = (asyncio.get_running_loop(), asyncio.Event())
+        with self._lock:
+            self._waiters.add(waiter)
+        try:
+            events, complete = self.read(after)
+            if events or not complete:
+                return events, complete
+            try:
+                await asyncio.wait_for(waiter[1].wait(), timeout)
+            except asyncio.TimeoutError:
+                return [], True
+            return self.read(after)
+        finally:
+            with self._lock:
+                self._waiters.discard(waiter)
+
+
+class CacheBackend(EventBackend):
+    """
+    Events stored in the MEETINGROOM_CACHE_ALIAS cache, so every worker
+    sharing that cache (Redis, Memcached) sees them. Subscribers poll.
+    """
+
+    KEY_PREFIX = "meetingroom:events"
+    ttl = 3600
+
+    def __init__(self, size):
+        super().__init__(size)
+        self.cache = caches[settings.MEETINGROOM_CACHE_ALIAS]
+        self.sequence_key = f"{self.KEY_PREFIX}:seq"
+
+    def _key(self, event_id):
+        return f"{self.KEY_PREFIX}:{event_id}"
+
+    def publish(self, event):
+        self.cache.add(self.sequence_key, 0, timeout=None)
+        event = dict(event, id=self.cache.incr(self.sequence_key))
+        self.cache.set(self._key(event["id"]), event, timeout=self.ttl)
+        return event
+
+    def read(self, after):
+        last_id = self.last_id()
+        if after > last_id:
+            return [], False
+        first = max(after + 1, last_id - self.size + 1)
+        keys = [self._key(event_id) for event_id in range(first, last_id + 1)]
+        found = self.cache.get_many(keys)
+        events, complete, missing = [], first == after + 1, False
+        for key in keys:
+            if key not in found:
+                missing = True
+                continue
+            if missing:
+                # A later event exists, so the missing ones expired or were evicted.
+                complete = False
+                missing = False
+            events.append(found[key])
+        # Trailing missing ids are allocated but not stored yet; the next read picks them up.
+        return events, complete
+
+    def last_id(self):
+        return self.cache.get(self.sequence_key, 0)
+
+
+_backends = {}
+_backends_lock = threading.Lock()
+
+
+def get_backend():
+    key = (settings.MEETINGROOM_EVENTS_BACKEND, settings.MEETINGROOM_EVENTS_BUFFER)
+    with _backends_lock:
+        if key not in _backends:
+            _backends[key] = import_string(key[0])(key[1])
+        return _backends[key]
+
+
+def reset():
+    with _backends_lock:
+        _backends.clear()
+
+
+def booking_event(action, booking_id, room_id, start_time, end_time):
+    field = DateTimeField()
+    return {
+        "type": EVENT_TYPES[action],
+        "booking_id": booking_id,
+        "room_id": room_id,
+        "start_time": field.to_representation(start_time),
+        "end_time": field.to_representation(end_time),
+    }
+
+
+def publish(action, booking_id, room_id, start_time, end_time):
+    return get_backend().publish(booking_event(action, booking_id, room_id, start_time, end_time))
+
+
+def format_event(event_id, event_type, data):
+    lines = [] if event_id is None else [f"id: {event_id}"]
+    lines += [f"event: {event_type}", f"data: {json.dumps(data)}"]
+    return "\n".join(lines) + "\n\n"
+
+
+async def stream(backend, after, room_ids=None, duration=None, heartbeat=None):
+    """
+    Yield server-sent events for ids above ``after``, optionally only for
+    ``room_ids``. When the backend has dropped events the client missed, a
+    ``reset`` event tells it to reload availability before following again.
+    The stream ends after ``duration`` seconds; EventSource reconnects.
+    """
+    duration = settings.MEETINGROOM_EVENTS_STREAM_SECONDS if duration is None else duration
+    heartbeat = settings.MEETINGROOM_EVENTS_HEARTBEAT if heartbeat is None else heartbeat
+    deadline = time.monotonic() + duration
+    yield f"retry: {RETRY_MS}\n\n"
+    while True:
+        remaining = deadline - time.monotonic()
+        if remaining <= 0:
+            return
+        events, complete = await backend.wait(after, min(heartbeat, remaining))
+        if not complete:
+            after = events[-1]["id"] if events else await backend.alast_id()
+            yield format_event(after, "reset", {})
+            continue
+        if not events:
+            yield ": keep-alive\n\n"
+            continue
+        for event in events:
+            after = event["id"]
+            if room_ids and event["room_id"] not in room_ids:
+                continue
+            data = {key: value for key, value in event.items() if key not in ("id", "type")}
+            yield format_event(event["id"], event["type"], data)
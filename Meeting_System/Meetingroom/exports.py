@@ -0,0 +1,88 @@
+import csv
+import json
+from datetime import datetime
+from django.core.serializers.json import DjangoJSONEncoder
+from django.db.models import F
+from .models import Booking
+
+BOOKING_FIELDS = [
+    'id', 'meeting_room_id', 'meeting_room_name', 'user_id', 'user_name',
+    'start_time', 'end_time', 'status', 'purpose', 'created_at', 'updated_at',
+]
+HISTORY_FIELDS = [
+    'history_id', 'history_action', 'history_user_id', 'history_timestamp',
+    'history_notes', 'history_previous_start_time', 'history_previous_end_time',
+]
+EXPORT_FORMATS = ['ndjson', 'csv']
+CONTENT_TYPES = {'ndjson': 'application/x-ndjson', 'csv': 'text/csv'}
+
+
+def export_fields(include_history=False):
+    return BOOKING_FIELDS + HISTORY_FIELDS if include_history else BOOKING_FIELDS
+
+
+def export_rows(filters, include_history=False, chunk_size=2000):
+    """
+    Yield one dict per booking (or per booking/history pair when
+    ``include_history`` is set) straight from ``values()``.
+
+    Rows are read in keyset batches of ``chunk_size`` bookings ordered by id.
+    MySQLdb buffers a whole result set client-side even under
+    ``iterator()``, so batching is what keeps memory flat on every backend.
+    """
+    bookings = Booking.objects.search(**filters).order_by('id')
+    queryset = bookings.annotate(
+        meeting_room_name=F('meeting_room__name'),
+        user_name=F('user__username'),
+    )
+    order = ['id']
+    if include_history:
+        # values() over the reverse relation is a LEFT JOIN: bookings without
+        # history still appear once, with empty history columns.
+        queryset = queryset.annotate(
+            history_id=F('history__id'),
+            history_action=F('history__action'),
+            history_user_id=F('history__user_id'),
+            history_timestamp=F('history__timestamp'),
+            history_notes=F('history__notes'),
+            history_previous_start_time=F('history__previous_start_time'),
+            history_previous_end_time=F('history__previous_end_time'),
+        )
+        order.append('history_id')
+    rows = queryset.order_by(*order).values(*export_fields(include_history))
+
+    last_id = 0
+    while True:
+        ids = list(bookings.filter(id__gt=last_id).values_list('id', flat=True)[:chunk_size])
+        if not ids:
+            return
+        yield from rows.filter(id__gte=ids[0], id__lte=ids[-1]).iterator(chunk_size=chunk_size)
+        last_id = ids[-1]
+
+
+class Echo:
+    """File-like object whose write() returns the value, for csv.writer."""
+
+    def write(self, value):
+        return value
+
+
+def render_ndjson(rows):
+    for row in rows:
+        yield json.dumps(row, cls=DjangoJSONEncoder) + '\n'
+
+
+def render_csv(rows, fields):
+    writer = csv.DictWriter(Echo(), fieldnames=fields)
+    yield writer.writeheader()
+    for row in rows:
+        yield writer.writerow({
+            key: value.isoformat() if isinstance(value, datetime) else value
+            for key, value in row.items()
+        })
+
+
+def render(rows, export_format, include_history=False):
+    if export_format == 'csv':
+        return render_csv(rows, export_fields(include_history))
+    return render_ndjson(rows)
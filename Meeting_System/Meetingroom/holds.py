@@ -0,0 +1,49 @@
+"""
+Expires tentative holds: pending bookings whose hold_expires_at has passed
+are cancelled in batches, each in its own transaction, with a History entry
+per hold.
+
+create_booking() already cancels expired holds that are in its way, so the
+sweep interval only bounds how long a dead hold still shows as busy in
+availability searches.
+"""
+import time
+from django.db import transaction
+from django.utils import timezone
+from .models import Booking
+from .services import expire_holds
+
+
+def expire_batch(batch_size=1000):
+    """Cancel up to ``batch_size`` expired holds; return how many."""
+    now = timezone.now()
+    with transaction.atomic():
+        # skip_locked passes over holds being confirmed right now and the
+        # rows another sweeper took, instead of waiting on them.
+        holds = list(
+            Booking.objects.expired_holds(now).select_for_update(skip_locked=True)
+            .order_by("hold_expires_at")
+            .values_list("id", "meeting_room_id", "start_time", "end_time")[:batch_size]
+        )
+        if holds:
+            expire_holds(holds, now)
+    return len(holds)
+
+
+def sweep(batch_size=1000, max_batches=None, pause=0, log=None):
+    """
+    Expire batches until no expired hold is left or ``max_batches`` ran,
+    sleeping ``pause`` seconds between batches. Returns the holds expired.
+    """
+    expired = batches = 0
+    while max_batches is None or batches < max_batches:
+        count = expire_batch(batch_size)
+        if not count:
+            break
+        expired += count
+        batches += 1
+        if log:
+            log(f"Batch {batches}: {count} holds")
+        if pause:
+            time.sleep(pause)
+    return expired
@@ -0,0 +1,148 @@
+"""
+iCalendar (RFC 5545) feeds of confirmed bookings, per room and per user.
+
+A feed covers MEETINGROOM_ICAL_PAST_DAYS before today to
+MEETINGROOM_ICAL_FUTURE_DAYS after it. Its ETag and Last-Modified come from
+one query: the owner's newest Booking.updated_at (every booking write,
+including the ones that add History, bumps it), the number of confirmed
+bookings in the window and the newest change to the rooms they are in.
+Rendered bodies are cached under their ETag, so a booking change moves the
+feed to a new key and the old body is never served.
+"""
+import hashlib
+from datetime import timedelta, timezone as dt_timezone
+from django.conf import settings
+from django.contrib.auth.models import User
+from django.db.models import Count, Max, OuterRef, Subquery
+from django.utils import timezone
+from django.utils.http import quote_etag
+from .catalogue import get_cache
+from .models import Booking, MeetingRoom
+
+CONTENT_TYPE = "text/calendar; charset=utf-8"
+PRODID = "-//Meeting System//Meetingroom//EN"
+KEY_PREFIX = "meetingroom:ical"
+# kind: (owner model, Booking field pointing at it, owner field used as the calendar name)
+FEEDS = {
+    "room": (MeetingRoom, "meeting_room", "name"),
+    "user": (User, "user", "username"),
+}
+
+
+def today():
+    return timezone.now().replace(hour=0, minute=0, second=0, microsecond=0)
+
+
+def window():
+    today_start = today()
+    return (
+        today_start - timedelta(days=settings.MEETINGROOM_ICAL_PAST_DAYS),
+        today_start + timedelta(days=settings.MEETINGROOM_ICAL_FUTURE_DAYS),
+    )
+
+
+def feed_bookings(kind, owner_id, start, end):
+    field = FEEDS[kind][1]
+    return Booking.objects.filter(**{field: owner_id}, status="confirmed", start_time__lt=end, end_time__gt=start)
+
+
+def feed_state(kind, owner_id):
+    """Return (name, etag, last_modified) for a feed, or None if its owner does not exist."""
+    model, field, name_field = FEEDS[kind]
+    start, end = window()
+    newest = (
+        Booking.objects.filter(**{field: OuterRef("pk")}).order_by()
+        .values(field).annotate(newest=Max("updated_at")).values("newest")
+    )
+    in_window = feed_bookings(kind, OuterRef("pk"), start, end).order_by().values(field)
+    confirmed = in_window.annotate(confirmed=Count("pk")).values("confirmed")
+    # Events carry their room's name, so a renamed room changes the feed too.
+    rooms_changed = in_window.annotate(rooms_changed=Max("meeting_room__updated_at")).values("rooms_changed")
+    row = (
+        model.objects.filter(pk=owner_id)
+        .annotate(newest=Subquery(newest), confirmed=Subquery(confirmed), rooms_changed=Subquery(rooms_changed))
+        .values_list(name_field, "newest", "confirmed", "rooms_changed").first()
+    )
+    if row is None:
+        return None
+    name, newest, confirmed, rooms_changed = row
+    # The window moves daily, so the feed changes at midnight even when no booking does.
+    last_modified = max(value for value in (newest, rooms_changed, today()) if value)
+    state = f"{kind}:{owner_id}:{name}:{start.date()}:{newest}:{confirmed or 0}:{rooms_changed}"
+    return name, quote_etag(hashlib.md5(state.encode(), usedforsecurity=False).hexdigest()), last_modified
+
+
+def escape(text):
+    return (text.replace("\\", "\\\\").replace(";", "\\;").replace(",", "\\,")
+            .replace("\r\n", "\\n").replace("\n", "\\n").replace("\r", "\\n"))
+
+
+def fold(line):
+    """Split a content line into 75-octet lines, never inside a UTF-8 sequence."""
+    encoded = line.encode()
+    if len(encoded) <= 75:
+        return line
+    parts = []
+    limit = 75
+    while len(encoded) > limit:
+        cut = limit
+        # Continuation bytes look like 0b10xxxxxx.
+        while encoded[cut] & 0xC0 == 0x80:
+            cut -= 1
+        parts.append(encoded[:cut].decode())
+        encoded = encoded[cut:]
+        # Continuation lines start with a space, which counts towards their 75 octets.
+        limit = 74
+    parts.append(encoded.decode())
+    return "\r\n ".join(parts)
+
+
+def format_datetime(value):
+    return value.astimezone(dt_timezone.utc).strftime("%Y%m%dT%H%M%SZ")
+
+
+def render(kind, owner_id, name):
+    """Render the owner's confirmed bookings in the window, read in chunks."""
+    start, end = window()
+    rows = (
+        feed_bookings(kind, owner_id, start, end)
+        .order_by("start_time", "id")
+        .values_list("id", "start_time", "end_time", "purpose", "version", "updated_at", "meeting_room__name")
+    )
+    calendar_name = name if kind == "room" else f"{name} bookings"
+    lines = [
+        "BEGIN:VCALENDAR",
+        "VERSION:2.0",
+        f"PRODID:{PRODID}",
+        "CALSCALE:GREGORIAN",
+        "METHOD:PUBLISH",
+        fold(f"X-WR-CALNAME:{escape(calendar_name)}"),
+    ]
+    for booking_id, start_time, end_time, purpose, version, updated_at, room_name in rows.iterator(chunk_size=2000):
+        lines += [
+            "BEGIN:VEVENT",
+            f"UID:booking-{booking_id}@meetingroom",
+            f"DTSTAMP:{format_datetime(updated_at)}",
+            f"LAST-MODIFIED:{format_datetime(updated_at)}",
+            f"DTSTART:{format_datetime(start_time)}",
+            f"DTEND:{format_datetime(end_time)}",
+            fold(f"SUMMARY:{escape(purpose or 'Booked')}"),
+            fold(f"LOCATION:{escape(room_name)}"),
+            f"SEQUENCE:{version - 1}",
+            "STATUS:CONFIRMED",
+            "END:VEVENT",
+        ]
+    lines.append("END:VCALENDAR")
+    return "\r\n".join(lines) + "\r\n"
+
+
+def get_body(kind, owner_id, name, etag):
+    """The rendered feed for ``etag``, from the cache or rendered and cached now."""
+    cache = get_cache()
+    digest = etag.strip('"')
+    key = f"{KEY_PREFIX}:{kind}:{owner_id}:{digest}"
+    body = cache.get(key)
+    if body is None:
+        body = render(kind, owner_id, name)
+        cache.set(key, body, timeout=settings.MEETINGROOM_ICAL_CACHE_TTL)
+    return body
@@ -0,0 +1,117 @@
+"""
+Idempotency-Key support for POST endpoints.
+
+The first request with a key claims an IdempotencyRecord row and stores its
+response there for MEETINGROOM_IDEMPOTENCY_TTL seconds; a retry with the
+same key gets that response back without running the view again. The
+records live in the database, so a retry that reaches another worker or
+server is still replayed. purge_idempotency_keys deletes expired records.
+"""
+import hashlib
+import json
+from datetime import timedelta
+from functools import wraps
+from django.conf import settings
+from django.core.serializers.json import DjangoJSONEncoder
+from django.db import IntegrityError, transaction
+from django.http.request import RawPostDataException
+from django.utils import timezone
+from rest_framework import status
+from rest_framework.response import Response
+from .models import IdempotencyRecord
+
+MAX_KEY_LENGTH = 255
+# How long a key stays claimed by a request that has not finished yet.
+PENDING_TTL = 60
+CLAIM_ATTEMPTS = 3
+
+
+def _fingerprint(request):
+    try:
+        body = request.body
+    except RawPostDataException:
+        # Something already consumed the stream; fall back to the parsed data.
+        body = json.dumps(request.data, cls=DjangoJSONEncoder, sort_keys=True).encode()
+    return hashlib.sha256(f"{request.method} {request.get_full_path()}\n".encode() + body).hexdigest()
+
+
+def _lookup(request, key):
+    scope = str(request.user.pk) if request.user.is_authenticated else ""
+    return {"scope": scope, "key": key, "method": request.method, "path": request.path}
+
+
+def _claim(lookup, fingerprint):
+    """
+    Return the live record that holds the key in ``lookup``, or None once a
+    pending record has been inserted for this request. Expired records are
+    replaced. A replay costs one SELECT.
+    """
+    for _ in range(CLAIM_ATTEMPTS):
+        now = timezone.now()
+        record = IdempotencyRecord.objects.filter(**lookup).first()
+        if record is not None:
+            if record.expires_at > now:
+                return record
+            IdempotencyRecord.objects.filter(pk=record.pk, expires_at__lte=now).delete()
+        try:
+            with transaction.atomic():
+                IdempotencyRecord.objects.create(
+                    **lookup, fingerprint=fingerprint, expires_at=now + timedelta(seconds=PENDING_TTL)
+                )
+            return None
+        except IntegrityError:
+            # A concurrent request claimed it first; read its record.
+            continue
+    # Lost every race for the key: another request holds it now.
+    return IdempotencyRecord(fingerprint=fingerprint)
+
+
+def purge_expired():
+    """Delete expired records; return how many."""
+    return IdempotencyRecord.objects.filter(expires_at__lte=timezone.now()).delete()[0]
+
+
+def idempotent(view_method):
+    """
+    Decorate an APIView handler. Responses below 500 are stored and replayed
+    with an Idempotent-Replayed header; a 5xx releases the key so the client
+    can retry. Reusing a key for a different request is a 422, and a retry
+    that arrives while the first request is still running is a 409.
+    """
+
+    @wraps(view_method)
+    def wrapper(self, request, *args, **kwargs):
+        key = request.headers.get("Idempotency-Key")
+        if not key:
+            return view_method(self, request, *args, **kwargs)
+        if len(key) > MAX_KEY_LENGTH:
+            return Response({"error": f"Idempotency-Key must be at most {MAX_KEY_LENGTH} characters"}, status=status.HTTP_400_BAD_REQUEST)
+
+        lookup = _lookup(request, key)
+        fingerprint = _fingerprint(request)
+        record = _claim(lookup, fingerprint)
+        if record is not None:
+            if record.fingerprint != fingerprint:
+                return Response({"error": "Idempotency-Key was already used for a different request"}, status=status.HTTP_422_UNPROCESSABLE_ENTITY)
+            if record.status is None:
+                return Response({"error": "A request with this Idempotency-Key is still in progress"}, status=status.HTTP_409_CONFLICT)
+            return Response(record.data, status=record.status, headers=dict(record.headers, **{"Idempotent-Replayed": "true"}))
+
+        pending = IdempotencyRecord.objects.filter(**lookup, fingerprint=fingerprint, status__isnull=True)
+        try:
+            response = view_method(self, request, *args, **kwargs)
+        except Exception:
+            pending.delete()
+            raise
+        if response.status_code >= 500:
+            pending.delete()
+            return response
+        pending.update(
+            status=response.status_code,
+            data=json.loads(json.dumps(response.data, cls=DjangoJSONEncoder)),
+            headers={name: response[name] for name in ("ETag", "Location") if response.has_header(name)},
+            expires_at=timezone.now() + timedelta(seconds=settings.MEETINGROOM_IDEMPOTENCY_TTL),
+        )
+        return response
+
+    return wrapper
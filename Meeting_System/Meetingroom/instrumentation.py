@@ -0,0 +1,243 @@
+import logging
+import random
+import threading
+import time
+from contextlib import ExitStack, contextmanager
+from contextvars import ContextVar
+from functools import wraps
+from asgiref.sync import iscoroutinefunction, markcoroutinefunction
+from django.conf import settings
+from django.db import connections
+
+logger = logging.getLogger("Meetingroom.performance")
+
+LATENCY_BUCKETS = [0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0]
+
+_current = ContextVar("meetingroom_request_metrics", default=None)
+
+
+class RequestMetrics:
+    """Measurements for one sampled request, filled in by QueryTimer and measure()."""
+
+    def __init__(self):
+        self.queries = 0
+        self.db_time = 0.0
+        self.worst_sql = None
+        self.worst_sql_time = 0.0
+        self.spans = {}
+        self.active_span = None
+        self.span_db_time = 0.0
+
+
+class QueryTimer:
+    """connection.execute_wrapper callable that times every query."""
+
+    def __init__(self, metrics):
+        self.metrics = metrics
+
+    def __call__(self, execute, sql, params, many, context):
+        started = time.perf_counter()
+        try:
+            return execute(sql, params, many, context)
+        finally:
+            elapsed = time.perf_counter() - started
+            metrics = self.metrics
+            metrics.queries += 1
+            metrics.db_time += elapsed
+            if metrics.active_span:
+                metrics.span_db_time += elapsed
+            if elapsed > metrics.worst_sql_time:
+                metrics.worst_sql = sql
+                metrics.worst_sql_time = elapsed
+
+
+@contextmanager
+def measure(name):
+    """
+    Time a block (e.g. serialization) of the current sampled request.
+    Queries run inside the block are billed to DB time, not to the span.
+    """
+    metrics = _current.get()
+    if metrics is None or metrics.active_span:
+        yield
+        return
+    metrics.active_span = name
+    metrics.span_db_time = 0.0
+    started = time.perf_counter()
+    try:
+        yield
+    finally:
+        elapsed = time.perf_counter() - started - metrics.span_db_time
+        metrics.spans[name] = metrics.spans.get(name, 0.0) + max(elapsed, 0.0)
+        metrics.active_span = None
+
+
+class MetricsRegistry:
+    """Process-local aggregates, rendered in Prometheus text format."""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.reset()
+
+    def reset(self):
+        with self._lock:
+            self._endpoints = {}
+
+    def record(self, endpoint, method, status_code, wall_time, metrics, response_bytes):
+        with self._lock:
+            stats = self._endpoints.get((endpoint, method))
+            if stats is None:
+                stats = self._endpoints[(endpoint, method)] = {
+                    "count": 0, "wall": 0.0, "queries": 0, "db": 0.0, "serializer": 0.0,
+                    "bytes": 0, "buckets": [0] * len(LATENCY_BUCKETS), "statuses": {},
+                }
+            stats["count"] += 1
+            stats["wall"] += wall_time
+            stats["queries"] += metrics.queries
+            stats["db"] += metrics.db_time
+            stats["serializer"] += metrics.spans.get("serializer", 0.0)
+            stats["bytes"] += response_bytes
+            stats["statuses"][status_code] = stats["statuses"].get(status_code, 0) + 1
+            for i, bound in enumerate(LATENCY_BUCKETS):
+                if wall_time <= bound:
+                    stats["buckets"][i] += 1
+
+    def snapshot(self):
+        with self._lock:
+            return {key: dict(stats, statuses=dict(stats["statuses"]), buckets=list(stats["buckets"]))
+                    for key, stats in self._endpoints.items()}
+
+    def render(self):
+        endpoints = sorted(self.snapshot().items())
+        lines = []
+
+        def family(name, kind, help_text, samples):
+            lines.append(f"# HELP {name} {help_text}")
+            lines.append(f"# TYPE {name} {kind}")
+            lines.extend(samples)
+
+        def labels(endpoint, method, **extra):
+            pairs = {"endpoint": endpoint, "method": method, **extra}
+            return ",".join(f'{key}="{value}"' for key, value in pairs.items())
+
+        family("meetingroom_requests_total", "counter", "Sampled requests by status.", [
+            f"meetingroom_requests_total{{{labels(e, m, status=code)}}} {count}"
+            for (e, m), stats in endpoints for code, count in sorted(stats["statuses"].items())
+        ])
+        histogram = []
+        for (e, m), stats in endpoints:
+            for bound, count in zip(LATENCY_BUCKETS, stats["buckets"]):
+                histogram.append(f"meetingroom_request_seconds_bucket{{{labels(e, m, le=bound)}}} {count}")
+            histogram.append(f'meetingroom_request_seconds_bucket{{{labels(e, m, le="+Inf")}}} {stats["count"]}')
+            histogram.append(f"meetingroom_request_seconds_sum{{{labels(e, m)}}} {stats['wall']:.6f}")
+            histogram.append(f"meetingroom_request_seconds_count{{{labels(e, m)}}} {stats['count']}")
+        family("meetingroom_request_seconds", "histogram", "Wall time of sampled requests.", histogram)
+        for name, field, help_text in [
+            ("meetingroom_db_queries_total", "queries", "Database queries run by sampled requests."),
+            ("meetingroom_db_seconds_total", "db", "Time spent in database queries."),
+            ("meetingroom_serializer_seconds_total", "serializer", "Time spent serializing, excluding queries."),
+            ("meetingroom_response_bytes_total", "bytes", "Response body bytes."),
+        ]:
+            family(name, "counter", help_text, [
+                f"{name}{{{labels(e, m)}}} {stats[field]:.6f}" if isinstance(stats[field], float)
+                else f"{name}{{{labels(e, m)}}} {stats[field]}"
+                for (e, m), stats in endpoints
+            ])
+        return "\n".join(lines) + "\n"
+
+
+registry = MetricsRegistry()
+
+
+def _sampled():
+    if not settings.MEETINGROOM_METRICS_ENABLED:
+        return False
+    rate = settings.MEETINGROOM_METRICS_SAMPLE_RATE
+    return rate >= 1 or random.random() < rate
+
+
+def _endpoint(request):
+    match = getattr(request, "resolver_match", None)
+    if match is None:
+        return "unmatched"
+    return match.view_name or match.route
+
+
+def _response_bytes(response):
+    if getattr(response, "streaming", False):
+        return 0
+    return len(response.content)
+
+
+def observe(request, get_response):
+    """Run get_response(request) and record it if the request is sampled."""
+    if _current.get() is not None or not _sampled():
+        return get_response(request)
+    metrics = RequestMetrics()
+    token = _current.set(metrics)
+    started = time.perf_counter()
+    try:
+        with ExitStack() as stack:
+            timer = QueryTimer(metrics)
+            for connection in connections.all():
+                stack.enter_context(connection.execute_wrapper(timer))
+            response = get_response(request)
+            if hasattr(response, "render") and not getattr(response, "is_rendered", True):
+                response.render()
+    finally:
+        _current.reset(token)
+    wall_time = time.perf_counter() - started
+    endpoint = _endpoint(request)
+    registry.record(endpoint, request.method, response.status_code, wall_time, metrics, _response_bytes(response))
+    if wall_time * 1000 >= settings.MEETINGROOM_SLOW_REQUEST_MS:
+        logger.warning(
+            "Slow request %s %s (%s): %.1f ms, %d queries, %.1f ms in DB; worst query %.1f ms: %s",
+            request.method, request.path, endpoint, wall_time * 1000, metrics.queries,
+            metrics.db_time * 1000, metrics.worst_sql_time * 1000, (metrics.worst_sql or "")[:2000],
+        )
+    return response
+
+
+async def aobserve(request, get_response):
+    """
+    Async observe(). ORM calls from async code run on executor threads
+    whose connections the wrapper cannot reach, so only wall time, status
+    and response size are recorded.
+    """
+    if not _sampled():
+        return await get_response(request)
+    started = time.perf_counter()
+    response = await get_response(request)
+    wall_time = time.perf_counter() - started
+    registry.record(_endpoint(request), request.method, response.status_code, wall_time,
+                    RequestMetrics(), _response_bytes(response))
+    if wall_time * 1000 >= settings.MEETINGROOM_SLOW_REQUEST_MS:
+        logger.warning("Slow request %s %s (%s): %.1f ms", request.method, request.path,
+                       _endpoint(request), wall_time * 1000)
+    return response
+
+
+class PerformanceMiddleware:
+    sync_capable = True
+    async_capable = True
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+        self.async_mode = iscoroutinefunction(get_response)
+        if self.async_mode:
+            markcoroutinefunction(self)
+
+    def __call__(self, request):
+        if self.async_mode:
+            return aobserve(request, self.get_response)
+        return observe(request, self.get_response)
+
+
+def instrument(view):
+    """Record a single view when PerformanceMiddleware is not installed."""
+
+    @wraps(view)
+    def wrapper(request, *args, **kwargs):
+        return observe(request, lambda request: view(request, *args, **kwargs))
+
+    return wrapper
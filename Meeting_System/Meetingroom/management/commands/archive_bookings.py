@@ -0,0 +1,25 @@
+from django.conf import settings
+from django.core.management.base import BaseCommand
+from Meetingroom import archive
+
+
+class Command(BaseCommand):
+    help = "Move bookings that ended more than --days ago, with their history, into the archive tables."
+
+    def add_arguments(self, parser):
+        parser.add_argument("--days", type=int, default=settings.MEETINGROOM_ARCHIVE_AFTER_DAYS)
+        parser.add_argument("--batch-size", type=int, default=1000)
+        parser.add_argument("--max-batches", type=int, help="Stop after this many batches; rerun to continue.")
+        parser.add_argument("--pause", type=float, default=0, help="Seconds to sleep between batches.")
+        parser.add_argument("--dry-run", action="store_true", help="Only count the bookings that would be archived.")
+
+    def handle(self, *args, **options):
+        cutoff = archive.cutoff_for(options["days"])
+        if options["dry_run"]:
+            self.stdout.write(f"{archive.archivable(cutoff).count()} bookings ended before {cutoff:%Y-%m-%d %H:%M}")
+            return
+        bookings, history = archive.archive(
+            cutoff, batch_size=options["batch_size"], max_batches=options["max_batches"],
+            pause=options["pause"], log=self.stdout.write,
+        )
+        self.stdout.write(self.style.SUCCESS(f"Archived {bookings} bookings and {history} history rows"))
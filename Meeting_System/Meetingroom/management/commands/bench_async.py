@@ -0,0 +1,26 @@
+import json
+from django.core.management.base import BaseCommand
+from Meetingroom import benchmark
+
+
+class Command(BaseCommand):
+    help = "Compare the DRF read endpoints under WSGI with their async versions under ASGI."
+
+    def add_arguments(self, parser):
+        parser.add_argument("--requests", type=int, default=200)
+        parser.add_argument("--concurrency", type=int, default=10)
+        parser.add_argument("--seed", type=int, default=0)
+        parser.add_argument("--json", action="store_true", help="Print results as JSON.")
+
+    def handle(self, *args, **options):
+        results = benchmark.compare_read_paths(
+            options["requests"], concurrency=options["concurrency"], random_seed=options["seed"]
+        )
+        if options["json"]:
+            self.stdout.write(json.dumps(results, indent=2, sort_keys=True))
+            return
+        columns = ["requests", "errors", "rps", "p50_ms", "p95_ms"]
+        self.stdout.write(f"{'endpoint':<12}{'handler':<8}" + "".join(f"{column:>12}" for column in columns))
+        for name, handlers in results.items():
+            for handler, result in handlers.items():
+                self.stdout.write(f"{name:<12}{handler:<8}" + "".join(f"{str(result[column]):>12}" for column in columns))
@@ -0,0 +1,27 @@
+import json
+from django.core.management.base import BaseCommand
+from Meetingroom import benchmark
+
+
+class Command(BaseCommand):
+    help = "Compare per-request latency with new, persistent and pooled database connections."
+
+    def add_arguments(self, parser):
+        parser.add_argument("--requests", type=int, default=500)
+        parser.add_argument("--concurrency", type=int, default=4)
+        parser.add_argument("--path", default="/api/v1/bookings/", help="GET endpoint to request.")
+        parser.add_argument("--json", action="store_true", help="Print results as JSON.")
+
+    def handle(self, *args, **options):
+        results = benchmark.compare_connection_modes(
+            options["requests"], path=options["path"], concurrency=options["concurrency"]
+        )
+        if options["json"]:
+            self.stdout.write(json.dumps(results, indent=2, sort_keys=True))
+            return
+        columns = ["requests", "errors", "connections", "rps", "p50_ms", "p95_ms"]
+        self.stdout.write(f"{'mode':<14}" + "".join(f"{column:>13}" for column in columns))
+        for mode, result in results.items():
+            self.stdout.write(f"{mode:<14}" + "".join(f"{str(result[column]):>13}" for column in columns))
+        if "pooled" not in results:
+            self.stdout.write("pooled: skipped, Django only pools PostgreSQL connections (psycopg[pool]).")
@@ -0,0 +1,46 @@
+import json
+from django.core.management.base import BaseCommand, CommandError
+from Meetingroom import benchmark
+
+
+class Command(BaseCommand):
+    help = "Run booking API load scenarios and report latency, throughput and queries per request."
+
+    def add_arguments(self, parser):
+        parser.add_argument("--scenario", action="append", choices=sorted(benchmark.SCENARIOS),
+                            help="Scenario to run; repeat for several. Defaults to all.")
+        parser.add_argument("--requests", type=int, default=200)
+        parser.add_argument("--concurrency", type=int, default=1)
+        parser.add_argument("--seed", type=int, default=0)
+        parser.add_argument("--baseline", help="JSON results of an earlier run to compare against.")
+        parser.add_argument("--tolerance", type=float, default=0.2, help="Allowed slowdown before flagging, as a fraction.")
+        parser.add_argument("--save-baseline", help="Write this run's results to a JSON file.")
+        parser.add_argument("--json", action="store_true", help="Print results as JSON.")
+
+    def handle(self, *args, **options):
+        results = {}
+        for name in options["scenario"] or list(benchmark.SCENARIOS):
+            try:
+                results[name] = benchmark.run_scenario(
+                    name, options["requests"], concurrency=options["concurrency"], random_seed=options["seed"]
+                )
+            except ValueError as e:
+                raise CommandError(str(e))
+
+        if options["json"]:
+            self.stdout.write(json.dumps(results, indent=2, sort_keys=True))
+        else:
+            columns = ["requests", "errors", "rps", "p50_ms", "p95_ms", "p99_ms", "queries_per_request"]
+            self.stdout.write(f"{'scenario':<15}" + "".join(f"{column:>20}" for column in columns))
+            for name, result in results.items():
+                self.stdout.write(f"{name:<15}" + "".join(f"{str(result[column]):>20}" for column in columns))
+
+        if options["save_baseline"]:
+            benchmark.save_baseline(options["save_baseline"], results)
+        if options["baseline"]:
+            regressions = benchmark.compare(results, benchmark.load_baseline(options["baseline"]), options["tolerance"])
+            for regression in regressions:
+                self.stderr.write(regression)
+            if regressions:
+                raise CommandError(f"{len(regressions)} regression(s) against {options['baseline']}")
+            self.stdout.write(self.style.SUCCESS("No regressions against baseline"))
@@ -0,0 +1,35 @@
+from django.core.management.base import BaseCommand, CommandError
+from Meetingroom import benchmark
+
+
+class Command(BaseCommand):
+    help = "Seed benchmark rooms and bookings with realistic distributions."
+
+    def add_arguments(self, parser):
+        parser.add_argument("--rooms", type=int, default=100)
+        parser.add_argument("--bookings", type=int, default=100000)
+        parser.add_argument("--days-back", type=int, default=180)
+        parser.add_argument("--days-ahead", type=int, default=30)
+        parser.add_argument("--with-history", action="store_true", help="Also write a History row per booking.")
+        parser.add_argument("--batch-size", type=int, default=5000)
+        parser.add_argument("--seed", type=int, default=0)
+        parser.add_argument("--reset", action="store_true", help="Delete existing benchmark rooms first.")
+
+    def handle(self, *args, **options):
+        if options["reset"]:
+            benchmark.reset()
+        log = self.stdout.write if options["verbosity"] > 1 else None
+        try:
+            rooms, bookings = benchmark.seed(
+                options["rooms"],
+                options["bookings"],
+                days_back=options["days_back"],
+                days_ahead=options["days_ahead"],
+                with_history=options["with_history"],
+                batch_size=options["batch_size"],
+                random_seed=options["seed"],
+                log=log,
+            )
+        except ValueError as e:
+            raise CommandError(str(e))
+        self.stdout.write(self.style.SUCCESS(f"Seeded {bookings} bookings across {rooms} benchmark rooms"))
@@ -0,0 +1,26 @@
+import json
+from django.core.management.base import BaseCommand
+from Meetingroom import benchmark
+
+
+class Command(BaseCommand):
+    help = "Compare DRF serializers with the fast path (and orjson) on the hot read endpoints."
+
+    def add_arguments(self, parser):
+        parser.add_argument("--requests", type=int, default=50)
+        parser.add_argument("--page-size", type=int, default=500)
+        parser.add_argument("--seed", type=int, default=0)
+        parser.add_argument("--json", action="store_true", help="Print results as JSON.")
+
+    def handle(self, *args, **options):
+        results = benchmark.compare_serialization(
+            options["requests"], page_size=options["page_size"], random_seed=options["seed"]
+        )
+        if options["json"]:
+            self.stdout.write(json.dumps(results, indent=2, sort_keys=True))
+            return
+        columns = ["requests", "errors", "bytes", "identical", "rps", "p50_ms", "p95_ms"]
+        self.stdout.write(f"{'endpoint':<17}{'mode':<13}" + "".join(f"{column:>11}" for column in columns))
+        for name, modes in results.items():
+            for mode, result in modes.items():
+                self.stdout.write(f"{name:<17}{mode:<13}" + "".join(f"{str(result[column]):>11}" for column in columns))
@@ -0,0 +1,45 @@
+import random
+from datetime import timedelta
+from django.core.management.base import BaseCommand, CommandError
+from django.utils import timezone
+from Meetingroom.availability import room_index
+from Meetingroom.models import MeetingRoom, Booking
+
+
+class Command(BaseCommand):
+    help = "Compare the in-memory room availability index against the database."
+
+    def add_arguments(self, parser):
+        parser.add_argument("--windows", type=int, default=0,
+                            help="Also compare free-room answers for N random one-hour windows in the next week.")
+        parser.add_argument("--reload", action="store_true", help="Rebuild the index before checking.")
+
+    def handle(self, *args, **options):
+        if options["reload"]:
+            room_index.reset()
+        missing, stale = room_index.diff()
+        if options["verbosity"] > 1:
+            for booking_id in missing:
+                self.stdout.write(f"missing or outdated: booking {booking_id}")
+            for booking_id in stale:
+                self.stdout.write(f"stale: booking {booking_id}")
+
+        mismatched_windows = 0
+        rooms = list(MeetingRoom.objects.filter(is_active=True))
+        now = timezone.now()
+        for _ in range(options["windows"]):
+            start_time = now + timedelta(minutes=15 * random.randrange(7 * 24 * 4))
+            end_time = start_time + timedelta(hours=1)
+            booked = set(Booking.objects.overlapping(start_time, end_time).values_list("meeting_room_id", flat=True))
+            expected = {room.pk for room in rooms if room.pk not in booked}
+            actual = {room.pk for room in room_index.free_rooms(rooms, start_time, end_time)}
+            if expected != actual:
+                mismatched_windows += 1
+                self.stdout.write(f"window {start_time.isoformat()}: rooms {sorted(expected ^ actual)} disagree")
+
+        if missing or stale or mismatched_windows:
+            raise CommandError(
+                f"Availability index out of sync: {len(missing)} missing, {len(stale)} stale, "
+                f"{mismatched_windows} mismatched windows"
+            )
+        self.stdout.write(self.style.SUCCESS("Availability index matches the database"))
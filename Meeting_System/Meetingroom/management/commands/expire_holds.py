@@ -0,0 +1,30 @@
+import time
+from django.core.management.base import BaseCommand
+from django.utils import timezone
+from Meetingroom import holds
+from Meetingroom.models import Booking
+
+
+class Command(BaseCommand):
+    help = "Cancel tentative holds whose time ran out."
+
+    def add_arguments(self, parser):
+        parser.add_argument("--batch-size", type=int, default=1000)
+        parser.add_argument("--max-batches", type=int, help="Stop after this many batches; rerun to continue.")
+        parser.add_argument("--pause", type=float, default=0, help="Seconds to sleep between batches.")
+        parser.add_argument("--every", type=float, help="Keep running, sweeping every this many seconds.")
+        parser.add_argument("--dry-run", action="store_true", help="Only count the holds that would be expired.")
+
+    def handle(self, *args, **options):
+        if options["dry_run"]:
+            self.stdout.write(f"{Booking.objects.expired_holds(timezone.now()).count()} expired holds")
+            return
+        while True:
+            expired = holds.sweep(
+                batch_size=options["batch_size"], max_batches=options["max_batches"],
+                pause=options["pause"], log=self.stdout.write,
+            )
+            self.stdout.write(self.style.SUCCESS(f"Expired {expired} holds"))
+            if not options["every"]:
+                break
+            time.sleep(options["every"])
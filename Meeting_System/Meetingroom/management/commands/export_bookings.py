@@ -0,0 +1,41 @@
+from django.core.management.base import BaseCommand
+from django.utils.dateparse import parse_datetime
+from Meetingroom import exports
+from Meetingroom.models import Booking
+
+
+def datetime_arg(value):
+    parsed = parse_datetime(value)
+    if not parsed:
+        raise ValueError(value)
+    return parsed
+
+
+class Command(BaseCommand):
+    help = "Stream bookings (optionally with history) as NDJSON or CSV."
+
+    def add_arguments(self, parser):
+        parser.add_argument("--output", choices=exports.EXPORT_FORMATS, default="ndjson")
+        parser.add_argument("--file", help="Write to this path instead of stdout.")
+        parser.add_argument("--include-history", action="store_true")
+        parser.add_argument("--room-id", type=int)
+        parser.add_argument("--status", choices=[choice for choice, _ in Booking.STATUS_CHOICES])
+        parser.add_argument("--start-time", type=datetime_arg, help="ISO 8601; bookings ending after this time.")
+        parser.add_argument("--end-time", type=datetime_arg, help="ISO 8601; bookings starting before this time.")
+        parser.add_argument("--chunk-size", type=int, default=2000)
+
+    def handle(self, *args, **options):
+        filters = {
+            "room_id": options["room_id"],
+            "status": options["status"],
+            "start_time": options["start_time"],
+            "end_time": options["end_time"],
+        }
+        rows = exports.export_rows(filters, options["include_history"], chunk_size=options["chunk_size"])
+        chunks = exports.render(rows, options["output"], include_history=options["include_history"])
+        if options["file"]:
+            with open(options["file"], "w", newline="") as f:
+                f.writelines(chunks)
+        else:
+            for chunk in chunks:
+                self.stdout.write(chunk, ending="")
@@ -0,0 +1,10 @@
+from django.core.management.base import BaseCommand
+from Meetingroom import idempotency
+
+
+class Command(BaseCommand):
+    help = "Delete Idempotency-Key records whose replay window has passed."
+
+    def handle(self, *args, **options):
+        deleted = idempotency.purge_expired()
+        self.stdout.write(self.style.SUCCESS(f"Deleted {deleted} expired idempotency records"))
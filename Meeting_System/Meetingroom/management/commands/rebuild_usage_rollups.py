@@ -0,0 +1,30 @@
+from datetime import date
+from django.core.management.base import BaseCommand
+from django.db.models import Max, Min
+from django.utils import timezone
+from Meetingroom import analytics
+from Meetingroom.models import Booking
+
+
+class Command(BaseCommand):
+    help = "Recompute the hourly room usage rollups from bookings."
+
+    def add_arguments(self, parser):
+        parser.add_argument("--start-date", type=date.fromisoformat, help="YYYY-MM-DD; defaults to the first booking.")
+        parser.add_argument("--end-date", type=date.fromisoformat, help="YYYY-MM-DD; defaults to the last booking.")
+        parser.add_argument("--chunk-size", type=int, default=2000)
+
+    def handle(self, *args, **options):
+        start_date = options["start_date"]
+        end_date = options["end_date"]
+        if start_date is None or end_date is None:
+            bounds = Booking.objects.aggregate(first=Min("start_time"), last=Max("end_time"))
+            if bounds["first"] is None:
+                self.stdout.write("No bookings to roll up")
+                return
+            start_date = start_date or timezone.localtime(bounds["first"]).date()
+            end_date = end_date or timezone.localtime(bounds["last"]).date()
+        written = analytics.rebuild(start_date, end_date, chunk_size=options["chunk_size"])
+        self.stdout.write(self.style.SUCCESS(
+            f"Rebuilt usage rollups for {start_date} to {end_date}: {written} rows"
+        ))
@@ -0,0 +1,41 @@
+import sys
+from django.core.management.base import BaseCommand, CommandError
+from Meetingroom import room_sync
+
+
+class Command(BaseCommand):
+    help = "Create, update and deactivate meeting rooms from a CSV, JSON or NDJSON feed keyed by room name."
+
+    def add_arguments(self, parser):
+        parser.add_argument("path", help="Feed file, or - for stdin (then --format is required).")
+        parser.add_argument("--format", choices=room_sync.FEED_FORMATS, help="Defaults to the file extension.")
+        parser.add_argument("--chunk-size", type=int, default=1000)
+        parser.add_argument("--no-deactivate", action="store_true", help="Leave rooms missing from the feed active.")
+        parser.add_argument("--dry-run", action="store_true", help="Report what would change without writing.")
+
+    def handle(self, *args, **options):
+        feed_format = options["format"] or (room_sync.feed_format(options["path"]) if options["path"] != "-" else None)
+        if feed_format is None:
+            raise CommandError("Cannot tell the feed format; pass --format")
+        f = sys.stdin if options["path"] == "-" else open(options["path"], newline="", encoding="utf-8")
+        try:
+            counts, errors = room_sync.sync_rooms(
+                room_sync.read_feed(f, feed_format),
+                chunk_size=options["chunk_size"],
+                deactivate_missing=not options["no_deactivate"],
+                dry_run=options["dry_run"],
+            )
+        except ValueError as e:
+            raise CommandError(f"Invalid feed: {e}")
+        finally:
+            if f is not sys.stdin:
+                f.close()
+
+        for line, message in errors[:20]:
+            self.stderr.write(f"Line {line}: {message}")
+        if len(errors) > 20:
+            self.stderr.write(f"... and {len(errors) - 20} more")
+        if errors and not options["no_deactivate"]:
+            self.stderr.write("Feed had invalid rows; no rooms were deactivated")
+        summary = ", ".join(f"{count} {name}" for name, count in counts.items())
+        self.stdout.write(self.style.SUCCESS(("Dry run: " if options["dry_run"] else "") + summary))
@@ -0,0 +1,37 @@
+from django.db import migrations, models
+
+
+def add_no_overlap_constraint(apps, schema_editor):
+    # Only PostgreSQL can reject overlapping ranges itself; other backends
+    # rely on the room row lock taken in services.create_booking().
+    if schema_editor.connection.vendor != "postgresql":
+        return
+    table = schema_editor.quote_name(apps.get_model("Meetingroom", "Booking")._meta.db_table)
+    schema_editor.execute("CREATE EXTENSION IF NOT EXISTS btree_gist")
+    schema_editor.execute(
+        f"ALTER TABLE {table} ADD CONSTRAINT booking_no_overlap EXCLUDE USING gist "
+        "(meeting_room_id WITH =, tstzrange(start_time, end_time, '[)') WITH &&) "
+        "WHERE (status IN ('confirmed', 'pending'))"
+    )
+
+
+def remove_no_overlap_constraint(apps, schema_editor):
+    if schema_editor.connection.vendor != "postgresql":
+        return
+    table = schema_editor.quote_name(apps.get_model("Meetingroom", "Booking")._meta.db_table)
+    schema_editor.execute(f"ALTER TABLE {table} DROP CONSTRAINT IF EXISTS booking_no_overlap")
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('Meetingroom', '0001_initial'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='booking',
+            index=models.Index(fields=['meeting_room', 'status', 'start_time', 'end_time'], name='booking_room_overlap_idx'),
+        ),
+        migrations.RunPython(add_no_overlap_constraint, remove_no_overlap_constraint),
+    ]
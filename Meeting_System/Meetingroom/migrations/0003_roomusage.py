@@ -0,0 +1,31 @@
+# Generated by Django 6.0.1 on 2026-10-18 08:35
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('Meetingroom', '0002_booking_room_overlap'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='RoomUsage',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('date', models.DateField()),
+                ('hour', models.PositiveSmallIntegerField()),
+                ('booked_seconds', models.IntegerField(default=0)),
+                ('created_count', models.PositiveIntegerField(default=0)),
+                ('cancelled_count', models.PositiveIntegerField(default=0)),
+                ('meeting_room', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='usage', to='Meetingroom.meetingroom')),
+            ],
+            options={
+                'ordering': ['date', 'hour'],
+                'indexes': [models.Index(fields=['date'], name='Meetingroom_date_088a92_idx')],
+                'constraints': [models.UniqueConstraint(fields=('meeting_room', 'date', 'hour'), name='room_usage_unique_hour')],
+            },
+        ),
+    ]
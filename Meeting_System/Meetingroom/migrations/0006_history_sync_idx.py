@@ -0,0 +1,17 @@
+# Generated by Django 6.0.1 on 2026-10-18 11:05
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('Meetingroom', '0005_booking_version'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='history',
+            index=models.Index(fields=['timestamp', 'id'], name='history_sync_idx'),
+        ),
+    ]
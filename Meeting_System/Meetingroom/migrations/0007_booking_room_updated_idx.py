@@ -0,0 +1,17 @@
+# Generated by Django 6.0.1 on 2026-10-18 11:40
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('Meetingroom', '0006_history_sync_idx'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='booking',
+            index=models.Index(fields=['meeting_room', 'updated_at'], name='booking_room_updated_idx'),
+        ),
+    ]
@@ -4,6 +4,9 @@ from django.core.exceptions import ValidationError
 from django.utils import timezone
 
 
+ACTIVE_STATUSES = ["confirmed", "pending"]
+
+
 class MeetingRoom(models.Model):
     name = models.CharField(max_length=100, unique=True)
     capacity = models.PositiveIntegerField()
@@ -19,12 +22,34 @@ class MeetingRoom(models.Model):
         return f"{self.name} (Capacity: {self.capacity})"
 
     def is_available(self, start_time, end_time):
-        overlapping_bookings = self.bookings.filter(
-            status__in=["confirmed", "pending"],
-            start_time__lt=end_time,
-            end_time__gt=start_time,
-        )
-        return not overlapping_bookings.exists()
+        return not self.bookings.overlapping(start_time, end_time).exists()
+
+
+class BookingQuerySet(models.QuerySet):
+    def active(self):
+        return self.filter(status__in=ACTIVE_STATUSES)
+
+    def overlapping(self, start_time, end_time, exclude_pk=None):
+        overlapping = self.active().filter(start_time__lt=end_time, end_time__gt=start_time)
+        if exclude_pk is not None:
+            overlapping = overlapping.exclude(pk=exclude_pk)
+        return overlapping
+
+    def expired_holds(self, now):
+        return self.filter(status="pending", hold_expires_at__lte=now)
+
+    def search(self, room_id=None, status=None, start_time=None, end_time=None):
+        # Date range selects bookings overlapping [start_time, end_time).
+        queryset = self
+        if room_id:
+            queryset = queryset.filter(meeting_room_id=room_id)
+        if status:
+            queryset = queryset.filter(status=status)
+        if start_time:
+            queryset = queryset.filter(end_time__gt=start_time)
+        if end_time:
+            queryset = queryset.filter(start_time__lt=end_time)
+        return queryset
 
 
 class Booking(models.Model):
@@ -39,19 +64,35 @@ class Booking(models.Model):
     end_time = models.DateTimeField()
     status = models.CharField(max_length=20, choices=STATUS_CHOICES, default="confirmed")
     purpose = models.TextField(blank=True, null=True)
+    # Bumped on every change; clients send it back in If-Match (see etag).
+    version = models.PositiveIntegerField(default=1)
+    # Set on pending bookings placed as tentative holds (see holds.py).
+    hold_expires_at = models.DateTimeField(null=True, blank=True)
     created_at = models.DateTimeField(auto_now_add=True)
     updated_at = models.DateTimeField(auto_now=True)
 
+    objects = BookingQuerySet.as_manager()
+
     class Meta:
         ordering = ["-start_time"]
         indexes = [
             models.Index(fields=["start_time", "end_time"]),
             models.Index(fields=["status"]),
+            # Shaped for the per-room overlap query in BookingQuerySet.overlapping().
+            models.Index(fields=["meeting_room", "status", "start_time", "end_time"], name="booking_room_overlap_idx"),
+            # Newest change per room, for the calendar feed validators in ical.py.
+            models.Index(fields=["meeting_room", "updated_at"], name="booking_room_updated_idx"),
+            # The hold sweeper's scan in BookingQuerySet.expired_holds().
+            models.Index(fields=["status", "hold_expires_at"], name="booking_hold_expiry_idx"),
         ]
 
     def __str__(self):
         return f"{self.meeting_room.name} - {self.start_time.strftime('%Y-%m-%d %H:%M')}"
 
+    @property
+    def etag(self):
+        return f'"{self.version}"'
+
     def clean(self):
         if self.start_time and self.end_time:
             if self.start_time >= self.end_time:
@@ -60,23 +101,21 @@ class Booking(models.Model):
             if self.start_time < timezone.now():
                 raise ValidationError("Cannot book in the past")
 
-            if self.meeting_room:
-                overlapping = (
-                    Booking.objects.filter(
-                        meeting_room=self.meeting_room,
-                        status__in=["confirmed", "pending"],
-                        start_time__lt=self.end_time,
-                        end_time__gt=self.start_time,
-                    )
-                    .exclude(pk=self.pk)
+            if self.meeting_room_id:
+                overlapping = Booking.objects.filter(meeting_room_id=self.meeting_room_id).overlapping(
+                    self.start_time, self.end_time, exclude_pk=self.pk
                 )
 
                 if overlapping.exists():
                     raise ValidationError("This room is already booked for the selected time")
 
-    def save(self, *args, **kwargs):
-        if self.status != "cancelled":
+    def save(self, *args, validate=True, **kwargs):
+        # The booking service checks conflicts under a room lock and passes
+        # validate=False so the overlap query is not repeated by full_clean().
+        if validate and self.status != "cancelled":
             self.full_clean()
+        if not self._state.adding:
+            self.version += 1
         super().save(*args, **kwargs)
 
 
@@ -97,6 +136,108 @@ class History(models.Model):
     class Meta:
         ordering = ["-timestamp"]
         verbose_name_plural = "Histories"
+        indexes = [
+            # Delta sync (sync.py) walks the log in (timestamp, id) order.
+            models.Index(fields=["timestamp", "id"], name="history_sync_idx"),
+        ]
+
+    def __str__(self):
+        return f"{self.action} - {self.booking} at {self.timestamp}"
+
+
+class RoomUsage(models.Model):
+    """Hourly usage rollup per room, maintained from History by analytics.py."""
+
+    meeting_room = models.ForeignKey(MeetingRoom, on_delete=models.CASCADE, related_name="usage")
+    date = models.DateField()
+    hour = models.PositiveSmallIntegerField()
+    booked_seconds = models.IntegerField(default=0)
+    created_count = models.PositiveIntegerField(default=0)
+    cancelled_count = models.PositiveIntegerField(default=0)
+
+    class Meta:
+        ordering = ["date", "hour"]
+        constraints = [
+            models.UniqueConstraint(fields=["meeting_room", "date", "hour"], name="room_usage_unique_hour"),
+        ]
+        indexes = [
+            models.Index(fields=["date"]),
+        ]
+
+    def __str__(self):
+        return f"{self.meeting_room.name} - {self.date} {self.hour:02d}:00"
+
+
+class ArchivedBooking(models.Model):
+    """A Booking moved out of the live table by archive.py; keeps its original id."""
+
+    id = models.BigIntegerField(primary_key=True)
+    meeting_room = models.ForeignKey(MeetingRoom, on_delete=models.CASCADE, related_name="archived_bookings")
+    user = models.ForeignKey(User, on_delete=models.CASCADE, related_name="archived_bookings", null=True, blank=True)
+    start_time = models.DateTimeField()
+    end_time = models.DateTimeField()
+    status = models.CharField(max_length=20, choices=Booking.STATUS_CHOICES)
+    purpose = models.TextField(blank=True, null=True)
+    version = models.PositiveIntegerField(default=1)
+    created_at = models.DateTimeField()
+    updated_at = models.DateTimeField()
+    archived_at = models.DateTimeField(auto_now_add=True)
+
+    objects = BookingQuerySet.as_manager()
+
+    class Meta:
+        ordering = ["-start_time"]
+        indexes = [
+            models.Index(fields=["start_time", "end_time"]),
+            models.Index(fields=["meeting_room", "start_time"]),
+        ]
+
+    def __str__(self):
+        return f"{self.meeting_room.name} - {self.start_time.strftime('%Y-%m-%d %H:%M')} (archived)"
+
+
+class ArchivedHistory(models.Model):
+    """History of an ArchivedBooking; keeps its original id."""
+
+    id = models.BigIntegerField(primary_key=True)
+    booking = models.ForeignKey(ArchivedBooking, on_delete=models.CASCADE, related_name="history")
+    action = models.CharField(max_length=20, choices=History.ACTION_CHOICES)
+    user = models.ForeignKey(User, on_delete=models.SET_NULL, null=True, blank=True, related_name="+")
+    timestamp = models.DateTimeField()
+    notes = models.TextField(blank=True, null=True)
+    previous_start_time = models.DateTimeField(null=True, blank=True)
+    previous_end_time = models.DateTimeField(null=True, blank=True)
+
+    class Meta:
+        ordering = ["-timestamp"]
+        verbose_name_plural = "Archived histories"
 
     def __str__(self):
         return f"{self.action} - {self.booking} at {self.timestamp}"
+
+
+class IdempotencyRecord(models.Model):
+    """A POST response kept for replay under its Idempotency-Key (see idempotency.py)."""
+
+    # The user's pk, or "" for anonymous requests.
+    scope = models.CharField(max_length=64, blank=True)
+    key = models.CharField(max_length=255)
+    method = models.CharField(max_length=10)
+    path = models.CharField(max_length=255)
+    fingerprint = models.CharField(max_length=64)
+    # Null while the first request is still running.
+    status = models.PositiveSmallIntegerField(null=True, blank=True)
+    data = models.JSONField(null=True, blank=True)
+    headers = models.JSONField(default=dict)
+    expires_at = models.DateTimeField()
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(fields=["scope", "key", "method", "path"], name="idempotency_record_unique"),
+        ]
+        indexes = [
+            models.Index(fields=["expires_at"]),
+        ]
+
+    def __str__(self):
+        return f"{self.method} {self.path} [{self.key}]"
@@ -0,0 +1,84 @@
+from django.db import transaction
+from django.db.models.signals import post_delete, post_save
+from django.dispatch import receiver
+from . import analytics, catalogue, events
+from .availability import room_index
+from .models import ACTIVE_STATUSES, Booking, History, MeetingRoom
+from .signals import bookings_bulk_cancelled, bookings_bulk_created, bookings_bulk_rescheduled
+
+
+@receiver(post_save, sender=Booking)
+def booking_saved(sender, instance, **kwargs):
+    booking_id = instance.pk
+    if instance.status in ACTIVE_STATUSES:
+        args = (booking_id, instance.meeting_room_id, instance.start_time, instance.end_time)
+        transaction.on_commit(lambda: room_index.add(*args))
+    else:
+        transaction.on_commit(lambda: room_index.remove(booking_id))
+
+
+@receiver(post_delete, sender=Booking)
+def booking_deleted(sender, instance, **kwargs):
+    booking_id = instance.pk
+    transaction.on_commit(lambda: room_index.remove(booking_id))
+
+
+@receiver(bookings_bulk_created, sender=Booking)
+def bookings_created(sender, bookings, **kwargs):
+    entries = [(b.pk, b.meeting_room_id, b.start_time, b.end_time) for b in bookings]
+
+    def apply():
+        for booking_id, room_id, start_time, end_time in entries:
+            room_index.add(booking_id, room_id, start_time, end_time)
+            analytics.record_history("created", room_id, start_time, end_time)
+            events.publish("created", booking_id, room_id, start_time, end_time)
+
+    transaction.on_commit(apply)
+
+
+@receiver(bookings_bulk_rescheduled, sender=Booking)
+def bookings_rescheduled(sender, changes, **kwargs):
+    def apply():
+        for booking_id, room_id, start_time, end_time, previous_start_time, previous_end_time in changes:
+            room_index.add(booking_id, room_id, start_time, end_time)
+            analytics.record_history("updated", room_id, start_time, end_time, previous_start_time, previous_end_time)
+            events.publish("updated", booking_id, room_id, start_time, end_time)
+
+    transaction.on_commit(apply)
+
+
+@receiver(bookings_bulk_cancelled, sender=Booking)
+def bookings_cancelled(sender, changes, **kwargs):
+    def apply():
+        for booking_id, room_id, start_time, end_time in changes:
+            room_index.remove(booking_id)
+            analytics.record_history("cancelled", room_id, start_time, end_time)
+            events.publish("cancelled", booking_id, room_id, start_time, end_time)
+
+    transaction.on_commit(apply)
+
+
+@receiver(post_save, sender=History)
+def history_saved(sender, instance, created, **kwargs):
+    if not created:
+        return
+    booking = instance.booking
+    args = (
+        instance.action, booking.meeting_room_id, booking.start_time, booking.end_time,
+        instance.previous_start_time, instance.previous_end_time,
+    )
+    # Rollups are derived data; update them after commit so they never
+    # lengthen the booking transaction (rebuild_usage_rollups repairs gaps).
+    transaction.on_commit(lambda: analytics.record_history(*args))
+    if instance.action in events.EVENT_TYPES:
+        event_args = (instance.action, booking.pk, booking.meeting_room_id, booking.start_time, booking.end_time)
+        transaction.on_commit(lambda: events.publish(*event_args))
+
+
+@receiver(post_save, sender=MeetingRoom)
+@receiver(post_delete, sender=MeetingRoom)
+def meeting_room_changed(sender, instance, **kwargs):
+    # Drop the catalogue now, and again after commit in case a concurrent
+    # request re-cached the pre-commit rows in between.
+    catalogue.invalidate()
+    transaction.on_commit(catalogue.invalidate)
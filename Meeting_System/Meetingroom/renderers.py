@@ -0,0 +1,37 @@
+from django.conf import settings
+from rest_framework.renderers import BrowsableAPIRenderer, JSONRenderer
+
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
+
+class FastJSONRenderer(JSONRenderer):
+    """
+    JSONRenderer that encodes with orjson when it is installed and
+    MEETINGROOM_ORJSON is on. For the compact UTF-8 output JSONRenderer
+    produces by default the bytes are the same, except for floats, which
+    orjson may write differently (1e16 rather than 1e+16); use it for
+    endpoints without floats. Indented output and data orjson cannot
+    encode go through JSONRenderer.
+    """
+
+    def render(self, data, accepted_media_type=None, renderer_context=None):
+        if (
+            orjson is None or not settings.MEETINGROOM_ORJSON or data is None
+            or not self.compact or self.ensure_ascii
+            or self.get_indent(accepted_media_type, renderer_context or {}) is not None
+        ):
+            return super().render(data, accepted_media_type, renderer_context)
+        try:
+            # Datetimes go through the DRF encoder for its format.
+            ret = orjson.dumps(data, default=self.encoder_class().default, option=orjson.OPT_PASSTHROUGH_DATETIME)
+        except orjson.JSONEncodeError:
+            return super().render(data, accepted_media_type, renderer_context)
+        # JSONRenderer escapes these for JavaScript.
+        return ret.replace(b"\xe2\x80\xa8", b"\\u2028").replace(b"\xe2\x80\xa9", b"\\u2029")
+
+
+# DRF's default renderers, with FastJSONRenderer in place of JSONRenderer.
+FAST_RENDERER_CLASSES = [FastJSONRenderer, BrowsableAPIRenderer]
@@ -0,0 +1,189 @@
+import csv
+import json
+from django.db import transaction
+from django.utils import timezone
+from . import catalogue
+from .models import MeetingRoom
+
+FEED_FORMATS = ['csv', 'json', 'ndjson']
+SYNC_FIELDS = ['capacity', 'description', 'is_active']
+TRUE_VALUES = {'1', 'true', 'yes', 'y'}
+FALSE_VALUES = {'0', 'false', 'no', 'n'}
+
+
+def feed_format(path):
+    extension = path.rsplit('.', 1)[-1].lower()
+    if extension == 'jsonl':
+        return 'ndjson'
+    return extension if extension in FEED_FORMATS else None
+
+
+def iter_json_array(f, chunk_size=65536):
+    """Yield the items of a top-level JSON array without loading the whole document."""
+    decoder = json.JSONDecoder()
+    buffer = ''
+    started = False
+    eof = False
+    while True:
+        stripped = buffer.lstrip()
+        if not started:
+            if stripped:
+                if stripped[0] != '[':
+                    raise ValueError('JSON feed must be an array of rooms')
+                buffer = stripped[1:]
+                started = True
+                continue
+        elif stripped.startswith(']'):
+            return
+        elif stripped.startswith(','):
+            buffer = stripped[1:]
+            continue
+        elif stripped:
+            try:
+                item, end = decoder.raw_decode(stripped)
+            except json.JSONDecodeError:
+                if eof:
+                    raise
+            else:
+                # A number at the end of the buffer may be cut short; wait for more text.
+                if end < len(stripped) or eof:
+                    yield item
+                    buffer = stripped[end:]
+                    continue
+        if eof:
+            raise ValueError('JSON feed ended before the closing bracket')
+        chunk = f.read(chunk_size)
+        eof = not chunk
+        buffer += chunk
+
+
+def read_feed(f, feed_format):
+    """Yield (line, raw row dict) from an open feed."""
+    if feed_format == 'csv':
+        reader = csv.DictReader(f)
+        for row in reader:
+            yield reader.line_num, row
+    elif feed_format == 'ndjson':
+        for line, text in enumerate(f, start=1):
+            if text.strip():
+                yield line, json.loads(text)
+    else:
+        yield from enumerate(iter_json_array(f), start=1)
+
+
+def parse_bool(value):
+    if isinstance(value, bool):
+        return value
+    value = str(value).strip().lower()
+    if value in TRUE_VALUES:
+        return True
+    if value in FALSE_VALUES:
+        return False
+    raise ValueError(f'invalid is_active {value!r}')
+
+
+def clean_row(row):
+    name = str(row.get('name') or '').strip()
+    if not name:
+        raise ValueError('name is required')
+    if len(name) > MeetingRoom._meta.get_field('name').max_length:
+        raise ValueError('name is too long')
+    try:
+        capacity = int(row.get('capacity'))
+    except (TypeError, ValueError):
+        raise ValueError(f'invalid capacity {row.get("capacity")!r}')
+    if capacity < 0:
+        raise ValueError(f'invalid capacity {capacity}')
+    is_active = row.get('is_active')
+    return {
+        'name': name,
+        'capacity': capacity,
+        'description': row.get('description') or '',
+        'is_active': True if is_active in (None, '') else parse_bool(is_active),
+    }
+
+
+def _apply_chunk(rows, counts, dry_run):
+    existing = {
+        room.name: room
+        for room in MeetingRoom.objects.filter(name__in=list(rows)).order_by().only('id', 'name', *SYNC_FIELDS)
+    }
+    now = timezone.now()
+    to_create, to_update = [], []
+    for name, values in rows.items():
+        room = existing.get(name)
+        if room is None:
+            to_create.append(MeetingRoom(**values))
+            continue
+        changed = (
+            room.capacity != values['capacity']
+            or (room.description or '') != values['description']
+            or room.is_active != values['is_active']
+        )
+        if not changed:
+            counts['unchanged'] += 1
+            continue
+        room.capacity = values['capacity']
+        room.description = values['description']
+        room.is_active = values['is_active']
+        # bulk_update() does not apply auto_now.
+        room.updated_at = now
+        to_update.append(room)
+    counts['created'] += len(to_create)
+    counts['updated'] += len(to_update)
+    if dry_run or not (to_create or to_update):
+        return
+    with transaction.atomic():
+        MeetingRoom.objects.bulk_create(to_create, batch_size=len(rows))
+        MeetingRoom.objects.bulk_update(to_update, SYNC_FIELDS + ['updated_at'], batch_size=len(rows))
+
+
+def _deactivate_missing(seen, counts, chunk_size, dry_run):
+    # Collected before updating so the scan never reads rows it is changing.
+    active = MeetingRoom.objects.filter(is_active=True).order_by('id').values_list('id', 'name')
+    missing = [room_id for room_id, name in active.iterator(chunk_size=chunk_size) if name not in seen]
+    counts['deactivated'] += len(missing)
+    if dry_run:
+        return
+    for i in range(0, len(missing), chunk_size):
+        MeetingRoom.objects.filter(id__in=missing[i:i + chunk_size]).update(is_active=False, updated_at=timezone.now())
+
+
+def sync_rooms(rows, chunk_size=1000, deactivate_missing=True, dry_run=False):
+    """
+    Create or update rooms from ``rows``, an iterable of (line, dict) keyed by
+    name, and deactivate active rooms missing from the feed. Rows are applied
+    in chunks of ``chunk_size``, each with one lookup query and bulk writes,
+    so only the chunk and the set of names seen are held in memory. Running
+    the same feed twice changes nothing the second time.
+
+    Returns a dict of counts and the list of (line, message) errors.
+    """
+    counts = dict.fromkeys(['created', 'updated', 'unchanged', 'deactivated', 'duplicates', 'errors'], 0)
+    errors = []
+    seen = set()
+    chunk = {}
+    for line, row in rows:
+        try:
+            values = clean_row(row)
+        except (AttributeError, ValueError) as e:
+            counts['errors'] += 1
+            errors.append((line, str(e)))
+            continue
+        if values['name'] in seen:
+            counts['duplicates'] += 1
+            continue
+        seen.add(values['name'])
+        chunk[values['name']] = values
+        if len(chunk) >= chunk_size:
+            _apply_chunk(chunk, counts, dry_run)
+            chunk = {}
+    if chunk:
+        _apply_chunk(chunk, counts, dry_run)
+    # A feed with bad rows may be truncated; never deactivate from it.
+    if deactivate_missing and not errors:
+        _deactivate_missing(seen, counts, chunk_size, dry_run)
+    if not dry_run:
+        # Bulk writes skip the MeetingRoom signals that normally do this.
+        catalogue.invalidate()
+    return counts, errors
@@ -0,0 +1,117 @@
+"""
+Read-replica routing.
+
+ReplicaMiddleware marks GET/HEAD/OPTIONS requests as read-only, and within
+them ReplicaRouter sends reads to one of MEETINGROOM_READ_REPLICAS. All
+writes, reads inside transaction.atomic blocks, other requests and code
+outside a request (management commands, shells) use 'default'.
+
+A request that writes sets a cookie that pins the client to the primary for
+MEETINGROOM_REPLICA_STICKY_SECONDS, so it reads its own writes while the
+replicas catch up.
+"""
+import random
+from contextlib import contextmanager
+from contextvars import ContextVar
+from asgiref.sync import iscoroutinefunction, markcoroutinefunction
+from django.conf import settings
+from django.db import DEFAULT_DB_ALIAS, connections
+
+STICKY_COOKIE = "meetingroom_primary"
+SAFE_METHODS = ("GET", "HEAD", "OPTIONS")
+
+_state = ContextVar("meetingroom_routing", default=None)
+
+
+class RoutingState:
+    def __init__(self, replica_reads, parent=None):
+        self.replica_reads = replica_reads
+        self.parent = parent
+        self.wrote = False
+
+    def mark_written(self):
+        state = self
+        while state is not None:
+            state.wrote = True
+            state = state.parent
+
+
+@contextmanager
+def use_primary():
+    """
+    Read from the primary inside the block. For state that outlives the
+    request (caches, the availability index), where replication lag would
+    otherwise be kept long after the replica caught up.
+    """
+    token = _state.set(RoutingState(False, parent=_state.get()))
+    try:
+        yield
+    finally:
+        _state.reset(token)
+
+
+class ReplicaRouter:
+    def db_for_read(self, model, **hints):
+        state = _state.get()
+        replicas = settings.MEETINGROOM_READ_REPLICAS
+        if state is None or not state.replica_reads or state.wrote or not replicas:
+            return DEFAULT_DB_ALIAS
+        if connections[DEFAULT_DB_ALIAS].in_atomic_block:
+            # Reads that decide a write (overlap checks, select_for_update)
+            # must see the primary.
+            return DEFAULT_DB_ALIAS
+        return random.choice(replicas)
+
+    def db_for_write(self, model, **hints):
+        state = _state.get()
+        if state is not None:
+            state.mark_written()
+        return DEFAULT_DB_ALIAS
+
+    def allow_relation(self, obj1, obj2, **hints):
+        # Replicas hold the same rows as the primary.
+        databases = {DEFAULT_DB_ALIAS, *settings.MEETINGROOM_READ_REPLICAS}
+        if obj1._state.db in databases and obj2._state.db in databases:
+            return True
+        return None
+
+
+class ReplicaMiddleware:
+    sync_capable = True
+    async_capable = True
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+        self.async_mode = iscoroutinefunction(get_response)
+        if self.async_mode:
+            markcoroutinefunction(self)
+
+    def _state_for(self, request):
+        pinned = STICKY_COOKIE in request.COOKIES
+        return RoutingState(request.method in SAFE_METHODS and not pinned)
+
+    def _finish(self, response, state):
+        sticky = settings.MEETINGROOM_REPLICA_STICKY_SECONDS
+        if state.wrote and sticky and settings.MEETINGROOM_READ_REPLICAS:
+            response.set_cookie(STICKY_COOKIE, "1", max_age=sticky, httponly=True, samesite="Lax")
+        return response
+
+    def __call__(self, request):
+        if self.async_mode:
+            return self._acall(request)
+        state = self._state_for(request)
+        token = _state.set(state)
+        try:
+            response = self.get_response(request)
+        finally:
+            _state.reset(token)
+        return self._finish(response, state)
+
+    async def _acall(self, request):
+        state = self._state_for(request)
+        token = _state.set(state)
+        try:
+            response = await self.get_response(request)
+        finally:
+            _state.reset(token)
+        return self._finish(response, state)
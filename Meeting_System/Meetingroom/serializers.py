@@ -1,6 +1,9 @@
+from datetime import timedelta
 from rest_framework import serializers
+from django.conf import settings
 from django.utils import timezone
-from .models import MeetingRoom, Booking, History
+from .models import MeetingRoom, Booking, History, ArchivedBooking, ArchivedHistory
+from .services import BookingConflict, RoomInactive, create_booking, expand_recurrence
 
 
 class MeetingRoomSerializer(serializers.ModelSerializer):
@@ -35,10 +38,10 @@ class BookingSerializer(serializers.ModelSerializer):
         model = Booking
         fields = [
             'id', 'meeting_room', 'meeting_room_name', 'user', 'user_name',
-            'start_time', 'end_time', 'status', 'purpose', 
+            'start_time', 'end_time', 'status', 'purpose', 'version',
             'created_at', 'updated_at', 'history'
         ]
-        read_only_fields = ['id', 'created_at', 'updated_at', 'user']
+        read_only_fields = ['id', 'version', 'created_at', 'updated_at', 'user']
 
     def get_user_name(self, obj):
         return obj.user.username if obj.user else 'Anonymous'
@@ -60,19 +63,12 @@ class BookingSerializer(serializers.ModelSerializer):
                 "Cannot book in the past"
             )
 
-        # Check room availability
-        if meeting_room:
-            overlapping = Booking.objects.filter(
-                meeting_room=meeting_room,
-                status__in=['confirmed', 'pending'],
-                start_time__lt=end_time,
-                end_time__gt=start_time
+        # New bookings are conflict-checked once, under the room lock, in
+        # create(); only updates need the overlap query here.
+        if meeting_room and self.instance:
+            overlapping = Booking.objects.filter(meeting_room=meeting_room).overlapping(
+                start_time, end_time, exclude_pk=self.instance.pk
             )
-            
-            # Exclude current booking if updating
-            if self.instance:
-                overlapping = overlapping.exclude(pk=self.instance.pk)
-            
             if overlapping.exists():
                 raise serializers.ValidationError(
                     "This room is already booked for the selected time"
@@ -86,17 +82,43 @@ class BookingSerializer(serializers.ModelSerializer):
         if request and request.user.is_authenticated:
             validated_data['user'] = request.user
 
-        booking = super().create(validated_data)
-        
-        # Create history entry
-        History.objects.create(
-            booking=booking,
-            action='created',
-            user=validated_data.get('user'),
-            notes='Booking created'
-        )
-        
-        return booking
+        try:
+            return create_booking(
+                validated_data['meeting_room'].pk,
+                validated_data['start_time'],
+                validated_data['end_time'],
+                user=validated_data.get('user'),
+                purpose=validated_data.get('purpose', ''),
+                status=validated_data.get('status', 'confirmed'),
+            )
+        except (BookingConflict, RoomInactive) as e:
+            raise serializers.ValidationError(str(e))
+
+
+class BookingListSerializer(BookingSerializer):
+    """BookingSerializer without the nested history, for listings."""
+
+    class Meta(BookingSerializer.Meta):
+        fields = [field for field in BookingSerializer.Meta.fields if field != 'history']
+
+
+class ArchivedHistorySerializer(HistorySerializer):
+    class Meta(HistorySerializer.Meta):
+        model = ArchivedHistory
+
+
+class ArchivedBookingSerializer(BookingSerializer):
+    """Same output as BookingSerializer, read from the archive tables."""
+
+    history = ArchivedHistorySerializer(many=True, read_only=True)
+
+    class Meta(BookingSerializer.Meta):
+        model = ArchivedBooking
+
+
+class ArchivedBookingListSerializer(ArchivedBookingSerializer):
+    class Meta(ArchivedBookingSerializer.Meta):
+        fields = BookingListSerializer.Meta.fields
 
 
 class BookingCreateSerializer(serializers.Serializer):
@@ -121,6 +143,165 @@ class BookingCreateSerializer(serializers.Serializer):
         return data
 
 
+class HoldSerializer(BookingCreateSerializer):
+    ttl = serializers.IntegerField(required=False, min_value=1)
+
+    def validate_ttl(self, value):
+        if value > settings.MEETINGROOM_HOLD_MAX_TTL_SECONDS:
+            raise serializers.ValidationError(
+                f"Ensure this value is less than or equal to {settings.MEETINGROOM_HOLD_MAX_TTL_SECONDS}."
+            )
+        return value
+
+
+class RescheduleSerializer(BookingCreateSerializer):
+    purpose = None
+
+
+class ShiftBookingsSerializer(serializers.Serializer):
+    minutes = serializers.IntegerField()
+    start_time = serializers.DateTimeField(required=False)
+    end_time = serializers.DateTimeField(required=False)
+
+    def validate_minutes(self, value):
+        if value == 0:
+            raise serializers.ValidationError("Must not be zero")
+        return value
+
+
+class FreeSlotQuerySerializer(serializers.Serializer):
+    start_time = serializers.DateTimeField()
+    end_time = serializers.DateTimeField()
+    duration = serializers.IntegerField(min_value=1)
+    min_capacity = serializers.IntegerField(min_value=0, required=False, default=0)
+    granularity = serializers.IntegerField(min_value=1, required=False, default=15)
+    limit = serializers.IntegerField(min_value=1, max_value=100, required=False, default=10)
+
+    def validate(self, data):
+        if data['start_time'] >= data['end_time']:
+            raise serializers.ValidationError(
+                "End time must be after start time"
+            )
+        return data
+
+
+class TimelineQuerySerializer(serializers.Serializer):
+    # A week at one-minute resolution.
+    MAX_SLOTS = 7 * 24 * 60
+
+    start_time = serializers.DateTimeField()
+    end_time = serializers.DateTimeField()
+    slot = serializers.IntegerField(min_value=1, required=False, default=30)
+    room_id = serializers.ListField(child=serializers.CharField(), required=False)
+    encoding = serializers.ChoiceField(choices=['bitmap', 'runs'], required=False, default='bitmap')
+
+    def validate_room_id(self, value):
+        try:
+            return sorted({int(part) for item in value for part in item.split(',') if part})
+        except ValueError:
+            raise serializers.ValidationError("room_id must be comma separated integers")
+
+    def validate(self, data):
+        if data['start_time'] >= data['end_time']:
+            raise serializers.ValidationError(
+                "End time must be after start time"
+            )
+        if (data['end_time'] - data['start_time']) / timedelta(minutes=data['slot']) > self.MAX_SLOTS:
+            raise serializers.ValidationError(
+                f"A timeline can have at most {self.MAX_SLOTS} slots; use a larger slot"
+            )
+        return data
+
+
+class SyncQuerySerializer(serializers.Serializer):
+    sync_token = serializers.CharField(required=False)
+    limit = serializers.IntegerField(min_value=1, max_value=1000, required=False, default=500)
+
+
+class RoomSearchSerializer(serializers.Serializer):
+    min_capacity = serializers.IntegerField(min_value=0, required=False)
+    max_capacity = serializers.IntegerField(min_value=0, required=False)
+    q = serializers.CharField(required=False)
+    limit = serializers.IntegerField(min_value=1, required=False)
+
+    def validate(self, data):
+        if data.get('min_capacity') is not None and data.get('max_capacity') is not None:
+            if data['min_capacity'] > data['max_capacity']:
+                raise serializers.ValidationError(
+                    "min_capacity must not exceed max_capacity"
+                )
+        return data
+
+
+class BatchItemSerializer(serializers.Serializer):
+    room_id = serializers.IntegerField()
+    start_time = serializers.DateTimeField()
+    end_time = serializers.DateTimeField()
+
+
+class RecurrenceSerializer(serializers.Serializer):
+    room_ids = serializers.ListField(child=serializers.IntegerField(), min_length=1)
+    start_time = serializers.DateTimeField()
+    end_time = serializers.DateTimeField()
+    frequency = serializers.ChoiceField(choices=['daily', 'weekly'])
+    interval = serializers.IntegerField(min_value=1, required=False, default=1)
+    count = serializers.IntegerField(min_value=1, required=False)
+    until = serializers.DateTimeField(required=False)
+
+    def validate(self, data):
+        if ('count' in data) == ('until' in data):
+            raise serializers.ValidationError(
+                "Provide exactly one of count or until"
+            )
+        return data
+
+
+class BatchBookingSerializer(serializers.Serializer):
+    MAX_OCCURRENCES = 500
+
+    items = BatchItemSerializer(many=True, required=False)
+    recurrence = RecurrenceSerializer(required=False)
+    purpose = serializers.CharField(required=False, allow_blank=True, default='')
+    mode = serializers.ChoiceField(choices=['atomic', 'best_effort'], required=False, default='atomic')
+
+    def validate(self, data):
+        if ('items' in data) == ('recurrence' in data):
+            raise serializers.ValidationError(
+                "Provide exactly one of items or recurrence"
+            )
+        if 'items' in data:
+            occurrences = [
+                (item['room_id'], item['start_time'], item['end_time'])
+                for item in data['items']
+            ]
+        else:
+            occurrences = expand_recurrence(
+                limit=self.MAX_OCCURRENCES, **data['recurrence']
+            )
+        if not occurrences:
+            raise serializers.ValidationError("The batch is empty")
+        if len(occurrences) > self.MAX_OCCURRENCES:
+            raise serializers.ValidationError(
+                f"A batch may contain at most {self.MAX_OCCURRENCES} bookings"
+            )
+        data['occurrences'] = occurrences
+        return data
+
+
+class UtilizationQuerySerializer(serializers.Serializer):
+    start_date = serializers.DateField()
+    end_date = serializers.DateField()
+    period = serializers.ChoiceField(choices=['day', 'week'], required=False, default='day')
+    room_id = serializers.IntegerField(required=False)
+
+    def validate(self, data):
+        if data['start_date'] > data['end_date']:
+            raise serializers.ValidationError(
+                "End date must not be before start date"
+            )
+        return data
+
+
 class AvailableRoomSerializer(serializers.ModelSerializer):
     class Meta:
         model = MeetingRoom
@@ -0,0 +1,484 @@
+from bisect import bisect_left
+from datetime import timedelta
+from django.conf import settings
+from django.core.exceptions import ValidationError
+from django.db import IntegrityError, transaction
+from django.db.models import F, Q
+from django.utils import timezone
+from .availability import room_index
+from .models import ACTIVE_STATUSES, MeetingRoom, Booking, History
+from .signals import bookings_bulk_cancelled, bookings_bulk_created, bookings_bulk_rescheduled
+
+
+class BookingError(Exception):
+    pass
+
+
+class RoomInactive(BookingError):
+    pass
+
+
+class BookingConflict(BookingError):
+    def __init__(self, message, booking_ids=None):
+        super().__init__(message)
+        self.booking_ids = booking_ids or []
+
+
+class AlreadyCancelled(BookingError):
+    pass
+
+
+class VersionMismatch(BookingError):
+    pass
+
+
+class HoldExpired(BookingError):
+    pass
+
+
+class NotAHold(BookingError):
+    pass
+
+
+def validate_slot(start_time, end_time):
+    if start_time >= end_time:
+        raise ValidationError("End time must be after start time")
+    if start_time < timezone.now():
+        raise ValidationError("Cannot book in the past")
+
+
+def attach_history(booking, entries):
+    # Seed the prefetch cache so serializing the new booking does not
+    # re-read the History rows that were just written.
+    history = booking.history.all()
+    history._result_cache = list(entries)
+    history._prefetch_done = True
+    booking._prefetched_objects_cache = {"history": history}
+
+
+def create_booking(room_id, start_time, end_time, user=None, purpose="", status="confirmed", notes="Booking created",
+                   hold_expires_at=None):
+    """
+    Book a room in a single pass: lock the room row, run one overlap query,
+    then insert the Booking and its History entry.
+
+    Concurrent requests for the same room are serialized on the room lock,
+    so the conflict check cannot be raced between check and insert. On
+    PostgreSQL the booking_no_overlap exclusion constraint backs this up.
+    Expired holds in the way are cancelled rather than reported as conflicts
+    (see slot_taken()).
+    """
+    validate_slot(start_time, end_time)
+    try:
+        with transaction.atomic():
+            room = MeetingRoom.objects.select_for_update().get(pk=room_id)
+            if not room.is_active:
+                raise RoomInactive("Meeting room is not active")
+            overlapping = Booking.objects.filter(meeting_room_id=room.pk).overlapping(start_time, end_time)
+            if slot_taken(overlapping):
+                raise BookingConflict("This room is already booked for the selected time")
+
+            booking = Booking(
+                meeting_room=room,
+                user=user,
+                start_time=start_time,
+                end_time=end_time,
+                status=status,
+                purpose=purpose,
+                hold_expires_at=hold_expires_at,
+            )
+            booking.save(force_insert=True, validate=False)
+            entry = History.objects.create(booking=booking, action="created", user=user, notes=notes)
+    except IntegrityError as e:
+        if "booking_no_overlap" in str(e):
+            raise BookingConflict("This room is already booked for the selected time")
+        raise
+    attach_history(booking, [entry])
+    return booking
+
+
+def expire_holds(holds, now, notes="Hold expired"):
+    """
+    Cancel ``holds``, (booking_id, room_id, start_time, end_time) rows of
+    expired holds locked by the caller, with one UPDATE and one History insert.
+    """
+    ids = [booking_id for booking_id, _, _, _ in holds]
+    Booking.objects.filter(id__in=ids, status="pending").update(
+        status="cancelled", version=F("version") + 1, updated_at=now
+    )
+    History.objects.bulk_create([
+        History(booking_id=booking_id, action="cancelled", notes=notes,
+                previous_start_time=start_time, previous_end_time=end_time)
+        for booking_id, _, start_time, end_time in holds
+    ])
+    bookings_bulk_cancelled.send(sender=Booking, changes=holds)
+
+
+def release_expired_holds(bookings, now=None):
+    """Lock and cancel the expired holds among ``bookings``; return how many there were."""
+    now = now or timezone.now()
+    holds = list(
+        bookings.expired_holds(now).select_for_update()
+        .values_list("id", "meeting_room_id", "start_time", "end_time")
+    )
+    if holds:
+        expire_holds(holds, now)
+    return len(holds)
+
+
+def slot_taken(overlapping):
+    """
+    Whether ``overlapping`` (active bookings in the way of a write) is
+    non-empty once expired holds in it are cancelled, so a hold that ran out
+    before the sweeper got to it never turns a booking away.
+    """
+    if not overlapping.exists():
+        return False
+    return not release_expired_holds(overlapping) or overlapping.exists()
+
+
+def live_rows(bookings, fields, now):
+    """
+    ``bookings.values_list(*fields)`` without expired holds, which are
+    cancelled first; the extra queries only run when there are some.
+    """
+    rows = list(bookings.values_list(*fields, "status", "hold_expires_at"))
+    if any(status == "pending" and expires and expires <= now for *_, status, expires in rows):
+        release_expired_holds(bookings, now)
+        rows = list(bookings.values_list(*fields, "status", "hold_expires_at"))
+    return [tuple(row[:-2]) for row in rows]
+
+
+def place_hold(room_id, start_time, end_time, user=None, purpose="", ttl=None):
+    """
+    Reserve a slot for ``ttl`` seconds (MEETINGROOM_HOLD_TTL_SECONDS by
+    default) as a pending booking. It blocks the slot like any booking until
+    confirm_hold() confirms it or the sweeper in holds.py cancels it.
+    """
+    ttl = settings.MEETINGROOM_HOLD_TTL_SECONDS if ttl is None else ttl
+    return create_booking(
+        room_id, start_time, end_time, user=user, purpose=purpose, status="pending", notes="Hold placed",
+        hold_expires_at=timezone.now() + timedelta(seconds=ttl),
+    )
+
+
+def confirm_hold(booking_id, expected_version=None, user=None, notes="Hold confirmed"):
+    """
+    Confirm a hold with a conditional UPDATE that only matches while it is
+    pending and unexpired. The slot was checked when the hold was placed, so
+    no room lock or overlap query is needed. Returns the confirmed booking.
+    """
+    now = timezone.now()
+    held = Booking.objects.filter(pk=booking_id, status="pending", hold_expires_at__gt=now)
+    if expected_version is not None:
+        held = held.filter(version=expected_version)
+    with transaction.atomic():
+        if not held.update(status="confirmed", hold_expires_at=None, version=F("version") + 1, updated_at=now):
+            current = Booking.objects.filter(pk=booking_id).values("status", "version", "hold_expires_at").first()
+            if current is None:
+                raise Booking.DoesNotExist
+            if expected_version is not None and current["version"] != expected_version:
+                raise VersionMismatch("Booking was modified; reload it and retry")
+            if current["status"] == "cancelled":
+                raise AlreadyCancelled("Booking already cancelled")
+            if current["status"] == "pending" and current["hold_expires_at"]:
+                raise HoldExpired("Hold has expired")
+            raise NotAHold("Booking is not a pending hold")
+        booking = Booking.objects.get(pk=booking_id)
+        History.objects.create(booking=booking, action="updated", user=user, notes=notes)
+    return booking
+
+
+def _raise_lost_race(booking_id):
+    # A conditional UPDATE matched nothing: report what the winner left behind.
+    current = Booking.objects.filter(pk=booking_id).values("status").first()
+    if current is None:
+        raise Booking.DoesNotExist
+    if current["status"] == "cancelled":
+        raise AlreadyCancelled("Booking already cancelled")
+    raise VersionMismatch("Booking was modified; reload it and retry")
+
+
+def cancel_booking(booking_id, expected_version=None, user=None, notes="Cancelled via API", attempts=3):
+    """
+    Cancel a booking with a conditional UPDATE instead of a row lock: it only
+    matches while the booking is active and still at the version that was
+    read. Of two concurrent cancels exactly one wins; the other gets
+    AlreadyCancelled. If ``expected_version`` is given a changed booking
+    raises VersionMismatch, otherwise the cancel is retried on the new
+    version. Returns the booking with its new version.
+    """
+    for attempt in range(attempts):
+        booking = Booking.objects.get(pk=booking_id)
+        if expected_version is not None and booking.version != expected_version:
+            raise VersionMismatch("Booking was modified; reload it and retry")
+        if booking.status == "cancelled":
+            raise AlreadyCancelled("Booking already cancelled")
+        with transaction.atomic():
+            updated = Booking.objects.filter(
+                pk=booking.pk, version=booking.version, status__in=ACTIVE_STATUSES
+            ).update(status="cancelled", version=F("version") + 1, updated_at=timezone.now())
+            if updated:
+                History.objects.create(
+                    booking=booking,
+                    action="cancelled",
+                    user=user,
+                    notes=notes,
+                    previous_start_time=booking.start_time,
+                    previous_end_time=booking.end_time,
+                )
+                # update() skips post_save, which would normally drop it from the index.
+                transaction.on_commit(lambda: room_index.remove(booking.pk))
+                booking.status = "cancelled"
+                booking.version += 1
+                return booking
+        if expected_version is not None or attempt == attempts - 1:
+            _raise_lost_race(booking.pk)
+
+
+def newly_covered(old_start, old_end, new_start, new_end):
+    """The parts of [new_start, new_end) outside [old_start, old_end)."""
+    if new_end <= old_start or new_start >= old_end:
+        return [(new_start, new_end)]
+    ranges = []
+    if new_start < old_start:
+        ranges.append((new_start, old_start))
+    if new_end > old_end:
+        ranges.append((old_end, new_end))
+    return ranges
+
+
+def reschedule_booking(booking_id, start_time, end_time, expected_version=None, user=None, notes="Rescheduled via API",
+                       attempts=3):
+    """
+    Move a booking to [start_time, end_time) in one transaction, so the old
+    slot is never free in between. Only the newly covered time is checked
+    for overlaps, under the same room lock create_booking() takes, and the
+    move is a conditional UPDATE on the version that was read. As in
+    cancel_booking(), a lost race is retried on the new version unless
+    ``expected_version`` was given.
+    """
+    validate_slot(start_time, end_time)
+    for attempt in range(attempts):
+        booking = Booking.objects.get(pk=booking_id)
+        if expected_version is not None and booking.version != expected_version:
+            raise VersionMismatch("Booking was modified; reload it and retry")
+        if booking.status not in ACTIVE_STATUSES:
+            raise AlreadyCancelled("Cannot reschedule a cancelled booking")
+        previous_start, previous_end = booking.start_time, booking.end_time
+        try:
+            with transaction.atomic():
+                room = MeetingRoom.objects.select_for_update().get(pk=booking.meeting_room_id)
+                if not room.is_active:
+                    raise RoomInactive("Meeting room is not active")
+                ranges = newly_covered(previous_start, previous_end, start_time, end_time)
+                if ranges:
+                    covered = Q()
+                    for range_start, range_end in ranges:
+                        covered |= Q(start_time__lt=range_end, end_time__gt=range_start)
+                    clash = Booking.objects.filter(meeting_room_id=booking.meeting_room_id).active().filter(covered)
+                    if slot_taken(clash.exclude(pk=booking.pk)):
+                        raise BookingConflict("This room is already booked for the selected time")
+                updated = Booking.objects.filter(
+                    pk=booking.pk, version=booking.version, status__in=ACTIVE_STATUSES
+                ).update(start_time=start_time, end_time=end_time, version=F("version") + 1, updated_at=timezone.now())
+                if not updated:
+                    if expected_version is not None or attempt == attempts - 1:
+                        _raise_lost_race(booking.pk)
+                    continue
+                # The History receivers read the new times from the instance.
+                booking.start_time, booking.end_time = start_time, end_time
+                History.objects.create(
+                    booking=booking,
+                    action="updated",
+                    user=user,
+                    notes=notes,
+                    previous_start_time=previous_start,
+                    previous_end_time=previous_end,
+                )
+                args = (booking.pk, booking.meeting_room_id, start_time, end_time)
+                transaction.on_commit(lambda: room_index.add(*args))
+        except IntegrityError as e:
+            if "booking_no_overlap" in str(e):
+                raise BookingConflict("This room is already booked for the selected time")
+            raise
+        booking.refresh_from_db()
+        return booking
+
+
+def shift_bookings(room_id, delta, start_time=None, end_time=None, user=None, notes="Shifted via API"):
+    """
+    Move every active future booking of a room that starts in
+    [start_time, end_time) by ``delta``, all or nothing. The moved bookings
+    keep their spacing, so they can only collide with bookings outside the
+    set: those are read with one query and swept against the new times.
+    Returns a list of (booking_id, new_start, new_end); raises
+    BookingConflict with ``booking_ids`` of the bookings that would collide.
+    """
+    now = timezone.now()
+    with transaction.atomic():
+        room = MeetingRoom.objects.select_for_update().get(pk=room_id)
+        # Row locks make a concurrent cancel either commit first, and drop
+        # out of the selection, or wait until the shift is done.
+        selected = (
+            Booking.objects.select_for_update().filter(meeting_room_id=room.pk, start_time__gte=now).active()
+            # Expired holds stay put; in the way, they are cancelled below.
+            .exclude(status="pending", hold_expires_at__lte=now)
+        )
+        if start_time:
+            selected = selected.filter(start_time__gte=start_time)
+        if end_time:
+            selected = selected.filter(start_time__lt=end_time)
+        moving = list(selected.order_by("start_time").values_list("id", "start_time", "end_time"))
+        if not moving:
+            return []
+        if moving[0][1] + delta < now:
+            raise ValidationError("Cannot move bookings into the past")
+        ids = [booking_id for booking_id, _, _ in moving]
+        moved = [(booking_id, start + delta, end + delta) for booking_id, start, end in moving]
+
+        others = live_rows(
+            Booking.objects.filter(meeting_room_id=room.pk)
+            .overlapping(moved[0][1], moved[-1][2])
+            .exclude(id__in=ids)
+            .order_by("start_time"),
+            ("start_time", "end_time"), now,
+        )
+        starts = [start for start, _ in others]
+        conflicts = []
+        for booking_id, new_start, new_end in moved:
+            # Others do not overlap each other, so only the last one starting
+            # before new_end can reach into the new slot.
+            i = bisect_left(starts, new_end)
+            if i and others[i - 1][1] > new_start:
+                conflicts.append(booking_id)
+        if conflicts:
+            raise BookingConflict("Shifted bookings would overlap other bookings", booking_ids=conflicts)
+
+        # Backends without row locks (SQLite) rely on the status guard.
+        updated = Booking.objects.filter(id__in=ids, status__in=ACTIVE_STATUSES).update(
+            start_time=F("start_time") + delta,
+            end_time=F("end_time") + delta,
+            version=F("version") + 1,
+            updated_at=now,
+        )
+        if updated != len(ids):
+            changed = list(Booking.objects.filter(id__in=ids).exclude(status__in=ACTIVE_STATUSES).values_list("id", flat=True))
+            raise BookingConflict("Bookings were cancelled during the shift; retry", booking_ids=changed)
+        History.objects.bulk_create([
+            History(booking_id=booking_id, action="updated", user=user, notes=notes,
+                    previous_start_time=start, previous_end_time=end)
+            for booking_id, start, end in moving
+        ])
+        bookings_bulk_rescheduled.send(sender=Booking, changes=[
+            (booking_id, room.pk, new_start, new_end, start, end)
+            for (booking_id, start, end), (_, new_start, new_end) in zip(moving, moved)
+        ])
+    return moved
+
+
+def expand_recurrence(room_ids, start_time, end_time, frequency, interval=1, count=None, until=None, limit=None):
+    """
+    Expand a daily/weekly rule into (room_id, start_time, end_time)
+    occurrences, stopping early once more than ``limit`` are produced.
+    """
+    step = timedelta(days=interval if frequency == "daily" else 7 * interval)
+    occurrences = []
+    n = 0
+    while (count is None or n < count) and (until is None or start_time + n * step <= until):
+        if limit is not None and len(occurrences) > limit:
+            break
+        for room_id in room_ids:
+            occurrences.append((room_id, start_time + n * step, end_time + n * step))
+        n += 1
+    return occurrences
+
+
+def create_bookings_batch(occurrences, user=None, purpose="", atomic=True, notes="Booking created (batch)"):
+    """
+    Validate and create many bookings at once.
+
+    Rooms are locked in id order, each room's existing bookings are read
+    with one range query, intra-batch overlaps are found in memory, and
+    accepted bookings plus their History rows are written with two
+    bulk_create calls. Returns one result dict per occurrence, in order.
+    In atomic mode nothing is written unless every occurrence is accepted.
+    """
+    now = timezone.now()
+    results = [
+        {"index": i, "room_id": room_id, "start_time": start_time, "end_time": end_time}
+        for i, (room_id, start_time, end_time) in enumerate(occurrences)
+    ]
+    with transaction.atomic():
+        room_ids = sorted({result["room_id"] for result in results})
+        rooms = {room.pk: room for room in MeetingRoom.objects.select_for_update().filter(pk__in=room_ids).order_by("pk")}
+
+        by_room = {}
+        for result in results:
+            room = rooms.get(result["room_id"])
+            if room is None:
+                result.update(status="error", error="Meeting room not found")
+            elif not room.is_active:
+                result.update(status="error", error="Meeting room is not active")
+            elif result["start_time"] >= result["end_time"]:
+                result.update(status="error", error="End time must be after start time")
+            elif result["start_time"] < now:
+                result.update(status="error", error="Cannot book in the past")
+            else:
+                by_room.setdefault(room.pk, []).append(result)
+
+        accepted = []
+        for room_id, candidates in by_room.items():
+            candidates.sort(key=lambda result: result["start_time"])
+            taken = live_rows(
+                Booking.objects.filter(meeting_room_id=room_id)
+                .overlapping(candidates[0]["start_time"], max(result["end_time"] for result in candidates))
+                .order_by("start_time"),
+                ("start_time", "end_time"), now,
+            )
+            for result in candidates:
+                # taken stays sorted and non-overlapping, so only the last
+                # interval starting before this end can overlap it.
+                i = bisect_left(taken, (result["end_time"],))
+                if i and taken[i - 1][1] > result["start_time"]:
+                    result.update(status="conflict", error="This room is already booked for the selected time")
+                    continue
+                taken.insert(i, (result["start_time"], result["end_time"]))
+                result["status"] = "created"
+                accepted.append(result)
+
+        if atomic and len(accepted) != len(results):
+            for result in accepted:
+                result.update(status="skipped", error="Batch rejected")
+            return results
+
+        bookings = Booking.objects.bulk_create([
+            Booking(
+                meeting_room=rooms[result["room_id"]],
+                user=user,
+                start_time=result["start_time"],
+                end_time=result["end_time"],
+                status="confirmed",
+                purpose=purpose,
+            )
+            for result in accepted
+        ])
+        if bookings and bookings[0].pk is None:
+            # MySQL does not return ids from bulk inserts; active bookings
+            # are unique per (room, start_time), so look them up once.
+            ids = dict(
+                ((room_id, start_time), pk)
+                for pk, room_id, start_time in Booking.objects.active()
+                .filter(meeting_room_id__in=by_room, start_time__in={b.start_time for b in bookings})
+                .values_list("pk", "meeting_room_id", "start_time")
+            )
+            for booking in bookings:
+                booking.pk = ids[(booking.meeting_room_id, booking.start_time)]
+        History.objects.bulk_create([
+            History(booking=booking, action="created", user=user, notes=notes)
+            for booking in bookings
+        ])
+        for result, booking in zip(accepted, bookings):
+            result["booking_id"] = booking.pk
+        bookings_bulk_created.send(sender=Booking, bookings=bookings)
+    return results
@@ -0,0 +1,12 @@
+from django.dispatch import Signal
+
+# bulk_create() skips post_save; sent with bookings=[...] after a batch insert.
+bookings_bulk_created = Signal()
+
+# queryset.update() skips post_save; sent with changes=[(booking_id, room_id,
+# start_time, end_time, previous_start_time, previous_end_time), ...].
+bookings_bulk_rescheduled = Signal()
+
+# Sent with changes=[(booking_id, room_id, start_time, end_time), ...] after
+# expired holds are cancelled with one update().
+bookings_bulk_cancelled = Signal()
@@ -1,9 +1,32 @@
-from django.test import TestCase
+import asyncio
+import json
+import os
+import shutil
+import tempfile
+import threading
+import time
+from io import StringIO
+from unittest import mock
+from unittest import skipUnless
+from django.conf import settings
+from django.contrib.auth.models import User
+from django.core.management import call_command
+from django.core.management.base import CommandError
+from django.db import connection, connections, router, transaction, OperationalError
+from django.http import HttpResponse
+from django.test import RequestFactory, TestCase, TransactionTestCase, override_settings
 from django.utils import timezone
 from datetime import timedelta
 from rest_framework.test import APIClient
 from rest_framework import status
-from .models import MeetingRoom, Booking, History
+from .models import MeetingRoom, Booking, BookingQuerySet, History, IdempotencyRecord, RoomUsage, ArchivedBooking, ArchivedHistory
+from django.core.cache import cache
+from django.db.models import Exists, F, OuterRef
+from . import benchmark, catalogue, events, ical, room_sync, sync
+from .availability import room_index
+from .instrumentation import registry
+from .routers import STICKY_COOKIE, ReplicaMiddleware
+from .services import AlreadyCancelled, BookingConflict, VersionMismatch, cancel_booking, create_booking, reschedule_booking
 
 
 class BookingAPITest(TestCase):
@@ -59,3 +82,1386 @@ class BookingAPITest(TestCase):
         booking = Booking.objects.get(id=booking_id)
         self.assertEqual(booking.status, "cancelled")
         self.assertTrue(booking.history.filter(action="cancelled").exists())
+
+
+class IdempotencyTest(TestCase):
+    def setUp(self):
+        cache.clear()
+        self.client = APIClient()
+        self.room = MeetingRoom.objects.create(name="Retry Room", capacity=4)
+        self.start = timezone.now() + timedelta(days=1)
+        self.payload = {"start_time": self.start.isoformat(), "end_time": (self.start + timedelta(hours=1)).isoformat()}
+
+    def book(self, key, payload=None):
+        return self.client.post(f"/api/v1/meeting-rooms/{self.room.id}/book/", payload or self.payload,
+                                format="json", HTTP_IDEMPOTENCY_KEY=key)
+
+    def test_replay_returns_original_response(self):
+        first = self.book("abc")
+        self.assertEqual(first.status_code, status.HTTP_201_CREATED)
+        # Replays come from the database, not a per-process cache, so a
+        # retry that reaches another worker is still replayed.
+        cache.clear()
+        # One read of the stored record; the view does not run.
+        with self.assertNumQueries(1):
+            replay = self.book("abc")
+        self.assertEqual(replay.status_code, status.HTTP_201_CREATED)
+        self.assertEqual(replay["Idempotent-Replayed"], "true")
+        self.assertEqual(replay["ETag"], first["ETag"])
+        self.assertEqual(replay.json(), first.json())
+        self.assertEqual(Booking.objects.count(), 1)
+        # Without a key the retry is a new request and conflicts.
+        self.assertEqual(self.book("").status_code, status.HTTP_409_CONFLICT)
+
+    def test_key_reused_for_different_request(self):
+        self.book("abc")
+        later = dict(self.payload, start_time=(self.start + timedelta(hours=2)).isoformat(),
+                     end_time=(self.start + timedelta(hours=3)).isoformat())
+        self.assertEqual(self.book("abc", later).status_code, status.HTTP_422_UNPROCESSABLE_ENTITY)
+
+    def test_in_progress_and_expired_keys(self):
+        self.assertEqual(self.book("abc").status_code, status.HTTP_201_CREATED)
+        record = IdempotencyRecord.objects.get(key="abc")
+        # The first request is still running.
+        IdempotencyRecord.objects.filter(pk=record.pk).update(status=None)
+        self.assertEqual(self.book("abc").status_code, status.HTTP_409_CONFLICT)
+        # A record past its window is replaced; the request runs again (and conflicts).
+        IdempotencyRecord.objects.filter(pk=record.pk).update(expires_at=timezone.now() - timedelta(seconds=1))
+        self.assertEqual(self.book("abc").status_code, status.HTTP_409_CONFLICT)
+        self.assertEqual(IdempotencyRecord.objects.get(key="abc").status, 409)
+        IdempotencyRecord.objects.update(expires_at=timezone.now() - timedelta(seconds=1))
+        call_command("purge_idempotency_keys", stdout=StringIO())
+        self.assertFalse(IdempotencyRecord.objects.exists())
+
+    def test_cancel_replay(self):
+        booking_id = self.book("abc").data["booking"]["id"]
+        url = f"/api/v1/bookings/{booking_id}/cancel/"
+        self.assertEqual(self.client.post(url, HTTP_IDEMPOTENCY_KEY="c1").status_code, status.HTTP_200_OK)
+        self.assertEqual(self.client.post(url, HTTP_IDEMPOTENCY_KEY="c1").status_code, status.HTTP_200_OK)
+        self.assertEqual(self.client.post(url).status_code, status.HTTP_400_BAD_REQUEST)
+
+
+class OptimisticCancelTest(TestCase):
+    def setUp(self):
+        self.client = APIClient()
+        self.room = MeetingRoom.objects.create(name="Version Room", capacity=4)
+        start = timezone.now() + timedelta(days=1)
+        self.booking = create_booking(self.room.id, start, start + timedelta(hours=1))
+        self.url = f"/api/v1/bookings/{self.booking.id}/cancel/"
+
+    def test_if_match(self):
+        self.assertEqual(self.booking.version, 1)
+        response = self.client.post(self.url, HTTP_IF_MATCH='"7"')
+        self.assertEqual(response.status_code, status.HTTP_412_PRECONDITION_FAILED)
+        response = self.client.post(self.url, HTTP_IF_MATCH=self.booking.etag)
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(response["ETag"], '"2"')
+        self.booking.refresh_from_db()
+        self.assertEqual((self.booking.status, self.booking.version), ("cancelled", 2))
+        self.assertEqual(self.booking.history.filter(action="cancelled").count(), 1)
+
+    def test_losing_a_race_does_not_cancel_twice(self):
+        stale = Booking.objects.get(pk=self.booking.pk)
+        self.assertEqual(self.client.post(self.url).status_code, status.HTTP_200_OK)
+        # The second cancel read the booking before the first one committed.
+        with mock.patch.object(Booking.objects, "get", return_value=stale):
+            with self.assertRaises(AlreadyCancelled):
+                cancel_booking(self.booking.pk)
+        self.assertEqual(self.booking.history.filter(action="cancelled").count(), 1)
+
+    def test_missing_booking(self):
+        self.assertEqual(self.client.post("/api/v1/bookings/999999/cancel/").status_code, status.HTTP_404_NOT_FOUND)
+
+
+class RescheduleTest(TestCase):
+    def setUp(self):
+        self.client = APIClient()
+        self.room = MeetingRoom.objects.create(name="Move Room", capacity=4)
+        self.day = (timezone.now() + timedelta(days=2)).replace(hour=10, minute=0, second=0, microsecond=0)
+        with self.captureOnCommitCallbacks(execute=True):
+            self.bookings = [
+                create_booking(self.room.id, self.day + timedelta(hours=h), self.day + timedelta(hours=h + 1))
+                for h in (0, 1, 2)
+            ]
+            self.later = create_booking(self.room.id, self.day + timedelta(hours=4), self.day + timedelta(hours=5))
+
+    def reschedule(self, booking, start, end, **extra):
+        return self.client.post(f"/api/v1/bookings/{booking.id}/reschedule/",
+                                {"start_time": start.isoformat(), "end_time": end.isoformat()}, format="json", **extra)
+
+    def test_reschedule_checks_only_new_time(self):
+        booking = self.bookings[2]
+        with self.captureOnCommitCallbacks(execute=True):
+            response = self.reschedule(booking, self.day + timedelta(hours=2, minutes=30), self.day + timedelta(hours=3, minutes=30))
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(response["ETag"], '"2"')
+        self.assertEqual(response.data["booking"]["start_time"], (self.day + timedelta(hours=2, minutes=30)).isoformat().replace("+00:00", "Z"))
+        entry = booking.history.get(action="updated")
+        self.assertEqual((entry.previous_start_time, entry.previous_end_time), (booking.start_time, booking.end_time))
+        usage = dict(RoomUsage.objects.filter(meeting_room=self.room).values_list("hour", "booked_seconds"))
+        hour = timezone.localtime(self.day).hour
+        self.assertEqual([usage[hour + i] for i in range(5)], [3600, 3600, 1800, 1800, 3600])
+
+        response = self.reschedule(booking, self.day + timedelta(hours=3, minutes=30), self.day + timedelta(hours=4, minutes=30))
+        self.assertEqual(response.status_code, status.HTTP_409_CONFLICT)
+        response = self.reschedule(booking, self.day, self.day + timedelta(hours=1), HTTP_IF_MATCH='"1"')
+        self.assertEqual(response.status_code, status.HTTP_412_PRECONDITION_FAILED)
+
+    def test_cannot_reschedule_into_inactive_room(self):
+        MeetingRoom.objects.filter(pk=self.room.pk).update(is_active=False)
+        response = self.reschedule(self.bookings[0], self.day + timedelta(hours=6), self.day + timedelta(hours=7))
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+        self.assertEqual(response.data["error"], "Meeting room is not active")
+        self.bookings[0].refresh_from_db()
+        self.assertEqual(self.bookings[0].version, 1)
+
+    def test_cannot_reschedule_cancelled(self):
+        cancel_booking(self.bookings[0].id)
+        response = self.reschedule(self.bookings[0], self.day + timedelta(hours=6), self.day + timedelta(hours=7))
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+
+    def test_shift_room_bookings(self):
+        url = f"/api/v1/meeting-rooms/{self.room.id}/shift/"
+        response = self.client.post(url, {"minutes": 90, "end_time": (self.day + timedelta(hours=3)).isoformat()}, format="json")
+        self.assertEqual(response.status_code, status.HTTP_409_CONFLICT)
+        self.assertEqual(response.data["booking_ids"], [self.bookings[2].id])
+        self.assertFalse(History.objects.filter(action="updated").exists())
+
+        with self.captureOnCommitCallbacks(execute=True), self.assertNumQueries(7):
+            # room lock, selection, outside bookings, update, history insert + savepoint pair
+            response = self.client.post(url, {"minutes": 30, "end_time": (self.day + timedelta(hours=3)).isoformat()}, format="json")
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(response.data["moved"], 3)
+        starts = list(Booking.objects.filter(meeting_room=self.room).order_by("start_time").values_list("start_time", flat=True))
+        self.assertEqual(starts, [self.day + timedelta(minutes=m) for m in (30, 90, 150, 240)])
+        self.assertEqual(History.objects.filter(action="updated").count(), 3)
+        self.assertEqual(set(Booking.objects.filter(pk__in=[b.pk for b in self.bookings]).values_list("version", flat=True)), {2})
+
+
+    def test_reschedule_retries_a_lost_race_without_if_match(self):
+        booking = self.bookings[0]
+        stale = Booking.objects.get(pk=booking.pk)
+        # Another writer bumps the version after this request read the booking.
+        Booking.objects.filter(pk=booking.pk).update(version=F("version") + 1)
+        fresh = Booking.objects.get(pk=booking.pk)
+        new_start = self.day + timedelta(hours=6)
+        with mock.patch.object(Booking.objects, "get", side_effect=[stale, fresh]):
+            moved = reschedule_booking(booking.pk, new_start, new_start + timedelta(hours=1))
+        self.assertEqual((moved.start_time, moved.version), (new_start, 3))
+
+        stale = Booking.objects.get(pk=booking.pk)
+        Booking.objects.filter(pk=booking.pk).update(version=F("version") + 1)
+        with mock.patch.object(Booking.objects, "get", return_value=stale):
+            with self.assertRaises(VersionMismatch):
+                reschedule_booking(booking.pk, self.day, self.day + timedelta(hours=1), expected_version=3)
+
+    def test_shift_does_not_move_a_booking_cancelled_midway(self):
+        url = f"/api/v1/meeting-rooms/{self.room.id}/shift/"
+        victim = self.bookings[1]
+        overlapping = BookingQuerySet.overlapping
+
+        def cancel_then_overlapping(queryset, *args, **kwargs):
+            # Lands between the shift's selection and its UPDATE.
+            if Booking.objects.filter(pk=victim.pk, status="confirmed").exists():
+                cancel_booking(victim.pk)
+            return overlapping(queryset, *args, **kwargs)
+
+        with mock.patch.object(BookingQuerySet, "overlapping", cancel_then_overlapping):
+            response = self.client.post(url, {"minutes": 15, "end_time": (self.day + timedelta(hours=3)).isoformat()}, format="json")
+        self.assertEqual(response.status_code, status.HTTP_409_CONFLICT)
+        self.assertEqual(response.data["booking_ids"], [victim.pk])
+        starts = list(Booking.objects.filter(pk__in=[b.pk for b in self.bookings]).order_by("start_time").values_list("start_time", flat=True))
+        self.assertEqual(starts, [b.start_time for b in self.bookings])
+        self.assertFalse(History.objects.filter(action="updated").exists())
+
+
+class BookingServiceTest(TestCase):
+    def setUp(self):
+        self.client = APIClient()
+        self.room = MeetingRoom.objects.create(name="Service Room", capacity=6)
+
+    def test_book_room_query_count(self):
+        start = timezone.now().replace(minute=30, second=0, microsecond=0) + timedelta(hours=1)
+        end = start + timedelta(hours=2)
+        data = {"start_time": start.isoformat(), "end_time": end.isoformat()}
+        # savepoint, room lock, overlap check, booking insert, history insert,
+        # release, then after commit one rollup upsert for all three hours
+        with self.assertNumQueries(7), self.captureOnCommitCallbacks(execute=True):
+            response = self.client.post(
+                f"/api/v1/meeting-rooms/{self.room.id}/book/", data, format="json"
+            )
+        self.assertEqual(response.status_code, status.HTTP_201_CREATED)
+        self.assertEqual(len(response.data["booking"]["history"]), 1)
+        usage = RoomUsage.objects.filter(meeting_room=self.room).order_by("date", "hour")
+        self.assertEqual([u.booked_seconds for u in usage], [1800, 3600, 1800])
+
+        with self.captureOnCommitCallbacks(execute=True):
+            self.client.post(f"/api/v1/bookings/{response.data['booking']['id']}/cancel/")
+        self.assertEqual({u.booked_seconds for u in usage.all()}, {0})
+
+    def test_book_missing_room(self):
+        start = timezone.now() + timedelta(hours=1)
+        end = start + timedelta(hours=1)
+        data = {"start_time": start.isoformat(), "end_time": end.isoformat()}
+        response = self.client.post("/api/v1/meeting-rooms/9999/book/", data, format="json")
+        self.assertEqual(response.status_code, status.HTTP_404_NOT_FOUND)
+
+
+class ConcurrentBookingTest(TransactionTestCase):
+    def test_parallel_bookings_single_winner(self):
+        room = MeetingRoom.objects.create(name="Hot Room", capacity=4)
+        start = timezone.now() + timedelta(hours=1)
+        end = start + timedelta(hours=1)
+        workers = 8
+        barrier = threading.Barrier(workers)
+        results = []
+
+        def attempt(offset):
+            barrier.wait()
+            try:
+                for _ in range(50):
+                    try:
+                        create_booking(room.id, start + timedelta(minutes=offset), end + timedelta(minutes=offset))
+                        results.append("won")
+                        return
+                    except BookingConflict:
+                        results.append("lost")
+                        return
+                    except OperationalError:
+                        # SQLite has no row locks and reports "table is locked"
+                        # instead; retry until the conflict check decides.
+                        time.sleep(0.01)
+                results.append("error")
+            finally:
+                connection.close()
+
+        threads = [threading.Thread(target=attempt, args=(i,)) for i in range(workers)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+
+        self.assertEqual(results.count("won"), 1)
+        self.assertEqual(results.count("lost"), workers - 1)
+        self.assertEqual(Booking.objects.filter(meeting_room=room).count(), 1)
+        self.assertEqual(History.objects.filter(booking__meeting_room=room).count(), 1)
+
+
+@skipUnless("replica" in settings.DATABASES, "needs the SQLite stand-in replica")
+@override_settings(MEETINGROOM_READ_REPLICAS=["replica"], MEETINGROOM_REPLICA_STICKY_SECONDS=5)
+class ReplicaRoutingTest(TransactionTestCase):
+    # Nothing replicates between the two databases, so where a row is
+    # visible shows which one a request read from.
+    databases = {"default", "replica"}
+
+    def setUp(self):
+        cache.clear()
+        self.client = APIClient()
+        self.room = MeetingRoom.objects.create(name="Primary Room", capacity=4)
+        MeetingRoom.objects.using("replica").create(id=self.room.id, name="Primary Room", capacity=4)
+        self.start = timezone.now() + timedelta(hours=1)
+
+    def test_reads_go_to_replica(self):
+        Booking.objects.create(meeting_room=self.room, start_time=self.start, end_time=self.start + timedelta(hours=1))
+        response = self.client.get("/api/v1/bookings/")
+        self.assertEqual(response.data["results"], [])
+        # bulk_create skips save()'s overlap check, which reads the primary.
+        Booking.objects.using("replica").bulk_create([
+            Booking(meeting_room_id=self.room.id, start_time=self.start, end_time=self.start + timedelta(hours=1))
+        ])
+        response = self.client.get("/api/v1/bookings/")
+        self.assertEqual(len(response.data["results"]), 1)
+        self.assertNotIn(STICKY_COOKIE, response.cookies)
+
+    def test_catalogue_is_built_from_primary(self):
+        MeetingRoom.objects.create(name="New Room", capacity=8)
+        response = self.client.get("/api/v1/meeting-rooms/")
+        self.assertEqual({room["name"] for room in response.data}, {"Primary Room", "New Room"})
+
+    def test_writer_reads_own_writes(self):
+        data = {"start_time": self.start.isoformat(), "end_time": (self.start + timedelta(hours=1)).isoformat()}
+        response = self.client.post(f"/api/v1/meeting-rooms/{self.room.id}/book/", data, format="json")
+        self.assertEqual(response.status_code, status.HTTP_201_CREATED)
+        self.assertEqual(response.cookies[STICKY_COOKIE]["max-age"], 5)
+        response = self.client.get("/api/v1/bookings/")
+        self.assertEqual(len(response.data["results"]), 1)
+
+        del self.client.cookies[STICKY_COOKIE]
+        response = self.client.get("/api/v1/bookings/")
+        self.assertEqual(response.data["results"], [])
+
+    def test_writes_and_transactions_use_primary(self):
+        seen = []
+
+        def view(request):
+            seen.append(router.db_for_read(Booking))
+            with transaction.atomic():
+                seen.append(router.db_for_read(Booking))
+            seen.append(router.db_for_write(Booking))
+            seen.append(router.db_for_read(Booking))
+            return HttpResponse()
+
+        factory = RequestFactory()
+        ReplicaMiddleware(view)(factory.get("/"))
+        ReplicaMiddleware(view)(factory.post("/"))
+        self.assertEqual(seen, ["replica", "default", "default", "default"] + ["default"] * 4)
+        self.assertEqual(router.db_for_read(Booking), "default")
+
+    @override_settings(MEETINGROOM_SYNC_SETTLE_SECONDS=0)
+    def test_sync_reads_primary(self):
+        booking = create_booking(self.room.id, self.start, self.start + timedelta(hours=1))
+        response = self.client.get("/api/v1/bookings/sync/")
+        self.assertNotEqual(response.data["sync_token"], sync.encode_token(sync.EPOCH, 0))
+        response = self.client.get("/api/v1/bookings/sync/", {"sync_token": sync.encode_token(sync.EPOCH, 0)})
+        self.assertEqual([b["id"] for b in response.data["changed"]], [booking.id])
+
+
+@override_settings(MEETINGROOM_AVAILABILITY_INDEX=True)
+class AvailabilityIndexTest(TestCase):
+    def setUp(self):
+        self.client = APIClient()
+        self.room = MeetingRoom.objects.create(name="Index Room", capacity=8)
+        self.other = MeetingRoom.objects.create(name="Other Room", capacity=8)
+        self.start = timezone.now() + timedelta(hours=1)
+        self.end = self.start + timedelta(hours=1)
+        room_index.reset()
+        self.addCleanup(room_index.reset)
+
+    def available(self, start, end):
+        response = self.client.get(
+            "/api/v1/meeting-rooms/available/",
+            {"start_time": start.isoformat(), "end_time": end.isoformat()},
+        )
+        return {room["id"] for room in response.data["available_rooms"]}
+
+    def test_index_tracks_bookings_without_booking_queries(self):
+        # First query loads the index; later bookings are applied incrementally.
+        self.assertEqual(self.available(self.start, self.end), {self.room.id, self.other.id})
+        with self.captureOnCommitCallbacks(execute=True):
+            booking = create_booking(self.room.id, self.start, self.end)
+        # Rooms come from the cached catalogue, bookings from the index.
+        with self.assertNumQueries(0):
+            self.assertEqual(self.available(self.start, self.end), {self.other.id})
+        self.assertEqual(self.available(self.end, self.end + timedelta(hours=1)), {self.room.id, self.other.id})
+
+        with self.captureOnCommitCallbacks(execute=True):
+            booking.status = "cancelled"
+            booking.save()
+        self.assertEqual(self.available(self.start, self.end), {self.room.id, self.other.id})
+
+    def test_check_command_detects_drift(self):
+        Booking.objects.create(meeting_room=self.room, start_time=self.start, end_time=self.end)
+        call_command("check_availability_index", windows=5, stdout=StringIO())
+        # Writes that bypass signals are invisible to the index.
+        Booking.objects.filter(meeting_room=self.room).update(status="cancelled")
+        with self.assertRaises(CommandError):
+            call_command("check_availability_index", stdout=StringIO())
+
+
+class RoomSearchTest(TestCase):
+    def setUp(self):
+        cache.clear()
+        self.client = APIClient()
+        self.rooms = {
+            name: MeetingRoom.objects.create(name=name, capacity=capacity, description=description)
+            for name, capacity, description in [
+                ("Huddle", 4, "Screen"), ("Beta", 8, ""), ("Alpha", 8, "Whiteboard"),
+                ("Board", 12, "Screen and phone"), ("Hall", 20, "Stage"),
+            ]
+        }
+        MeetingRoom.objects.create(name="Closed", capacity=6, is_active=False)
+        self.start = timezone.now() + timedelta(days=1)
+        self.end = self.start + timedelta(hours=1)
+        Booking.objects.create(meeting_room=self.rooms["Beta"], start_time=self.start, end_time=self.end)
+
+    def search(self, **params):
+        params.setdefault("start_time", self.start.isoformat())
+        params.setdefault("end_time", self.end.isoformat())
+        response = self.client.get("/api/v1/meeting-rooms/available/", params)
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        return [room["name"] for room in response.data["available_rooms"]]
+
+    def test_capacity_bounds_best_fit_first(self):
+        self.assertEqual(self.search(min_capacity=6), ["Alpha", "Board", "Hall"])
+        self.assertEqual(self.search(max_capacity=8), ["Huddle", "Alpha"])
+        self.assertEqual(self.search(min_capacity=5, max_capacity=12, limit=1), ["Alpha"])
+        self.assertEqual(self.search(min_capacity=6, start_time="", end_time=""), ["Alpha", "Beta", "Board", "Hall"])
+
+    def test_text_filter(self):
+        self.assertEqual(self.search(q="screen"), ["Huddle", "Board"])
+
+    def test_catalogue_prunes_before_overlap_query(self):
+        self.search(min_capacity=6)
+        with self.assertNumQueries(1):
+            self.search(min_capacity=6)
+        room_index.reset()
+        self.addCleanup(room_index.reset)
+        room_index.load()
+        with override_settings(MEETINGROOM_AVAILABILITY_INDEX=True), self.assertNumQueries(0):
+            self.assertEqual(self.search(min_capacity=6), ["Alpha", "Board", "Hall"])
+
+    def test_invalid_bounds(self):
+        response = self.client.get("/api/v1/meeting-rooms/available/", {"min_capacity": 10, "max_capacity": 2})
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+
+
+class RoomSyncTest(TestCase):
+    def sync(self, name, content, **options):
+        directory = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, directory)
+        path = os.path.join(directory, name)
+        with open(path, "w") as f:
+            f.write(content)
+        out = StringIO()
+        call_command("sync_rooms", path, chunk_size=2, stdout=out, stderr=StringIO(), **options)
+        return out.getvalue()
+
+    def test_csv_sync_is_idempotent_and_deactivates_missing(self):
+        MeetingRoom.objects.create(name="Legacy", capacity=4)
+        MeetingRoom.objects.create(name="Alpha", capacity=4, description="Old")
+        feed = "name,capacity,description\nAlpha,6,Screen\nBeta,8,\nGamma,10,Stage\n"
+        output = self.sync("rooms.csv", feed)
+        self.assertIn("2 created, 1 updated, 0 unchanged, 1 deactivated", output)
+        self.assertEqual(MeetingRoom.objects.get(name="Alpha").capacity, 6)
+        self.assertFalse(MeetingRoom.objects.get(name="Legacy").is_active)
+
+        with self.assertNumQueries(3):
+            # two chunk lookups and the active-room scan
+            output = self.sync("rooms.csv", feed)
+        self.assertIn("0 created, 0 updated, 3 unchanged, 0 deactivated", output)
+
+    def test_json_feed_and_invalid_rows(self):
+        MeetingRoom.objects.create(name="Keep", capacity=4)
+        feed = json.dumps([
+            {"name": "Delta", "capacity": 12, "is_active": False},
+            {"name": "Epsilon", "capacity": "lots"},
+            {"name": "Delta", "capacity": 14},
+        ])
+        output = self.sync("rooms.json", feed)
+        self.assertIn("1 created", output)
+        self.assertIn("1 duplicates, 1 errors", output)
+        self.assertFalse(MeetingRoom.objects.get(name="Delta").is_active)
+        # An invalid row means the feed may be incomplete: nothing is deactivated.
+        self.assertTrue(MeetingRoom.objects.get(name="Keep").is_active)
+
+    def test_json_array_is_streamed(self):
+        rows = [{"name": f"Room {i}", "capacity": i} for i in range(50)]
+        items = list(room_sync.iter_json_array(StringIO(json.dumps(rows, indent=2)), chunk_size=7))
+        self.assertEqual(items, rows)
+        with self.assertRaises(ValueError):
+            list(room_sync.iter_json_array(StringIO('[{"name": "Cut"'), chunk_size=4))
+
+
+class FreeSlotsTest(TestCase):
+    def setUp(self):
+        self.client = APIClient()
+        self.small = MeetingRoom.objects.create(name="Small Room", capacity=4)
+        self.large = MeetingRoom.objects.create(name="Large Room", capacity=10)
+        self.day = (timezone.now() + timedelta(days=1)).replace(hour=9, minute=0, second=0, microsecond=0)
+        Booking.objects.create(meeting_room=self.small, start_time=self.day, end_time=self.day + timedelta(hours=1))
+        Booking.objects.create(
+            meeting_room=self.large,
+            start_time=self.day + timedelta(minutes=30),
+            end_time=self.day + timedelta(hours=2),
+        )
+
+    def free_slots(self, **params):
+        query = {
+            "start_time": self.day.isoformat(),
+            "end_time": (self.day + timedelta(hours=3)).isoformat(),
+            "duration": 60,
+            "granularity": 30,
+        }
+        query.update(params)
+        return self.client.get("/api/v1/meeting-rooms/free-slots/", query)
+
+    def test_earliest_slots_across_rooms(self):
+        with self.assertNumQueries(2):
+            response = self.free_slots(limit=4)
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        slots = [(slot["room_id"], slot["start_time"]) for slot in response.data["slots"]]
+        expected_hours = [(self.small.id, 1), (self.small.id, 1.5), (self.small.id, 2), (self.large.id, 2)]
+        self.assertEqual(
+            slots,
+            [(room_id, (self.day + timedelta(hours=hours)).isoformat()) for room_id, hours in expected_hours],
+        )
+
+    def test_min_capacity_filters_rooms(self):
+        response = self.free_slots(min_capacity=5, limit=10)
+        self.assertEqual({slot["room_id"] for slot in response.data["slots"]}, {self.large.id})
+        self.assertEqual(response.data["count"], 1)
+
+    def test_invalid_duration(self):
+        response = self.free_slots(duration=0)
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+
+
+class TimelineTest(TestCase):
+    def setUp(self):
+        cache.clear()
+        self.client = APIClient()
+        self.small = MeetingRoom.objects.create(name="Small Room", capacity=4)
+        self.large = MeetingRoom.objects.create(name="Large Room", capacity=10)
+        self.day = (timezone.now() + timedelta(days=1)).replace(hour=8, minute=0, second=0, microsecond=0)
+        # Small is busy in slots 2-3; Large in slots 4-5, from two touching
+        # bookings, the second ending mid-slot. Cancelled bookings don't count.
+        Booking.objects.create(meeting_room=self.small, start_time=self.day + timedelta(hours=1), end_time=self.day + timedelta(hours=2))
+        Booking.objects.create(meeting_room=self.large, start_time=self.day + timedelta(hours=2), end_time=self.day + timedelta(hours=2, minutes=30))
+        Booking.objects.create(meeting_room=self.large, start_time=self.day + timedelta(hours=2, minutes=30), end_time=self.day + timedelta(hours=2, minutes=45))
+        Booking.objects.create(
+            meeting_room=self.large, start_time=self.day + timedelta(hours=3), end_time=self.day + timedelta(hours=4), status="cancelled"
+        )
+
+    def timeline(self, **params):
+        query = {"start_time": self.day.isoformat(), "end_time": (self.day + timedelta(hours=5)).isoformat(), "slot": 30}
+        query.update(params)
+        return self.client.get("/api/v1/meeting-rooms/timeline/", query)
+
+    def test_bitmap(self):
+        self.timeline()
+        with self.assertNumQueries(1):
+            response = self.timeline()
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(response.data["slots"], 10)
+        busy = {room["room_id"]: room["busy"] for room in response.data["rooms"]}
+        # 10 slots padded to two bytes: 0x30 0x00 and 0x0C 0x00.
+        self.assertEqual(busy, {self.small.id: "MAA=", self.large.id: "DAA="})
+
+    def test_runs_and_room_filter(self):
+        response = self.timeline(encoding="runs", room_id=f"{self.large.id},999")
+        self.assertEqual(response.data["rooms"], [{"room_id": self.large.id, "busy": [[4, 2]]}])
+
+    def test_week_payload_is_small(self):
+        response = self.timeline(end_time=(self.day + timedelta(days=7)).isoformat(), slot=15)
+        self.assertEqual(response.data["slots"], 672)
+        self.assertLess(len(response.content) / len(response.data["rooms"]), 200)
+
+    def test_too_many_slots(self):
+        response = self.timeline(end_time=(self.day + timedelta(days=8)).isoformat(), slot=1)
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+
+
+class BookingListTest(TestCase):
+    def setUp(self):
+        self.client = APIClient()
+        self.room = MeetingRoom.objects.create(name="List Room", capacity=6)
+        self.other = MeetingRoom.objects.create(name="Other List Room", capacity=6)
+        self.start = timezone.now() + timedelta(days=1)
+        for i in range(5):
+            room = self.room if i % 2 == 0 else self.other
+            booking = Booking.objects.create(
+                meeting_room=room,
+                start_time=self.start + timedelta(hours=i),
+                end_time=self.start + timedelta(hours=i, minutes=30),
+            )
+            History.objects.create(booking=booking, action="created", notes="Booking created")
+
+    def test_list_is_paginated_without_history(self):
+        with self.assertNumQueries(1):
+            response = self.client.get("/api/v1/bookings/", {"page_size": 2})
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(len(response.data["results"]), 2)
+        self.assertNotIn("history", response.data["results"][0])
+        self.assertIsNotNone(response.data["next"])
+
+        seen = []
+        url = "/api/v1/bookings/?page_size=2"
+        while url:
+            page = self.client.get(url).data
+            seen.extend(booking["start_time"] for booking in page["results"])
+            url = page["next"]
+        self.assertEqual(len(seen), 5)
+        self.assertEqual(seen, sorted(seen, reverse=True))
+
+    def test_expand_history_prefetches(self):
+        # bookings page + history; the history__user prefetch is skipped when no entry has a user
+        with self.assertNumQueries(2):
+            response = self.client.get("/api/v1/bookings/", {"expand": "history"})
+        self.assertEqual(len(response.data["results"][0]["history"]), 1)
+
+    def test_filters(self):
+        response = self.client.get("/api/v1/bookings/", {"room_id": self.room.id})
+        self.assertEqual(len(response.data["results"]), 3)
+        response = self.client.get(
+            "/api/v1/bookings/",
+            {
+                "start_time": (self.start + timedelta(hours=1)).isoformat(),
+                "end_time": (self.start + timedelta(hours=3)).isoformat(),
+            },
+        )
+        self.assertEqual(len(response.data["results"]), 2)
+        response = self.client.get("/api/v1/bookings/", {"start_time": "not-a-date"})
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+
+
+class FastPathTest(TestCase):
+    def setUp(self):
+        cache.clear()
+        self.client = APIClient()
+        self.user = User.objects.create_user(username="ana")
+        self.room = MeetingRoom.objects.create(name="Sala \u00e9t\u00e9", capacity=6, description="line\u2028break")
+        MeetingRoom.objects.create(name="Plain Room", capacity=12)
+        self.start = timezone.now().replace(microsecond=123456) + timedelta(days=1)
+        for i in range(4):
+            booking = Booking.objects.create(
+                meeting_room=self.room, user=self.user if i % 2 else None, purpose="caf\u00e9 \"sync\"\n" if i else None,
+                start_time=self.start + timedelta(hours=i), end_time=self.start + timedelta(hours=i, minutes=30),
+            )
+            History.objects.create(booking=booking, action="created", user=self.user if i % 2 else None)
+            History.objects.create(booking=booking, action="updated", previous_start_time=self.start)
+
+    def responses(self, **settings):
+        paths = [
+            "/api/v1/bookings/?page_size=3",
+            "/api/v1/bookings/?expand=history",
+            "/api/v1/meeting-rooms/",
+            "/api/v1/meeting-rooms/available/",
+            f"/api/v1/meeting-rooms/available/?start_time={self.start.isoformat().replace('+', '%2B')}"
+            f"&end_time={(self.start + timedelta(minutes=10)).isoformat().replace('+', '%2B')}",
+        ]
+        with self.settings(**settings):
+            cache.clear()
+            return [self.client.get(path).content for path in paths]
+
+    def test_fast_path_renders_same_bytes(self):
+        expected = self.responses(MEETINGROOM_FAST_SERIALIZERS=False, MEETINGROOM_ORJSON=False)
+        self.assertIn(b"\\u2028", expected[2])
+        self.assertEqual(self.responses(MEETINGROOM_FAST_SERIALIZERS=True, MEETINGROOM_ORJSON=False), expected)
+        self.assertEqual(self.responses(MEETINGROOM_FAST_SERIALIZERS=True, MEETINGROOM_ORJSON=True), expected)
+
+    def test_benchmark(self):
+        cache.clear()
+        results = benchmark.compare_serialization(2, page_size=10)
+        # Every room endpoint request rebuilt the catalogue instead of hitting the cache.
+        self.assertEqual(catalogue.stats()["hits"], 0)
+        for modes in results.values():
+            self.assertIn("fast", modes)
+            for result in modes.values():
+                self.assertEqual(result["errors"], 0)
+                self.assertTrue(result["identical"])
+
+    def test_expand_history_queries(self):
+        # bookings page + history for the page, names joined in both
+        with self.assertNumQueries(2):
+            response = self.client.get("/api/v1/bookings/", {"expand": "history"})
+        self.assertEqual([h["user_name"] for h in response.data["results"][0]["history"]], ["System", "ana"])
+
+
+@override_settings(MEETINGROOM_SYNC_SETTLE_SECONDS=0)
+class BookingSyncTest(TestCase):
+    def setUp(self):
+        self.client = APIClient()
+        self.room = MeetingRoom.objects.create(name="Sync Room", capacity=6)
+        self.start = timezone.now() + timedelta(days=1)
+        self.old = create_booking(self.room.id, self.start, self.start + timedelta(hours=1))
+
+    def sync(self, token=None, **params):
+        if token:
+            params["sync_token"] = token
+        response = self.client.get("/api/v1/bookings/sync/", params)
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        return response.data
+
+    def test_returns_changes_since_token(self):
+        token = self.sync()["sync_token"]
+        self.assertEqual(self.sync(token)["changed"], [])
+
+        kept = create_booking(self.room.id, self.start + timedelta(hours=2), self.start + timedelta(hours=3))
+        dropped = create_booking(self.room.id, self.start + timedelta(hours=4), self.start + timedelta(hours=5))
+        cancel_booking(dropped.id)
+        with self.assertNumQueries(2):
+            data = self.sync(token)
+        self.assertEqual([booking["id"] for booking in data["changed"]], [kept.id])
+        self.assertEqual(data["changed"][0]["meeting_room_name"], "Sync Room")
+        self.assertEqual(data["tombstones"], [{"id": dropped.id, "status": "cancelled"}])
+        self.assertFalse(data["more"])
+
+        data = self.sync(data["sync_token"])
+        self.assertEqual((data["changed"], data["tombstones"]), ([], []))
+
+    def test_pages_with_limit(self):
+        token = self.sync()["sync_token"]
+        created = [
+            create_booking(self.room.id, self.start + timedelta(hours=2 + i), self.start + timedelta(hours=3 + i)).id
+            for i in range(3)
+        ]
+        seen = []
+        while True:
+            data = self.sync(token, limit=2)
+            seen += [booking["id"] for booking in data["changed"]]
+            token = data["sync_token"]
+            if not data["more"]:
+                break
+        self.assertEqual(seen, created)
+
+    def test_settle_window_holds_back_recent_changes(self):
+        token = self.sync()["sync_token"]
+        create_booking(self.room.id, self.start + timedelta(hours=2), self.start + timedelta(hours=3))
+        with self.settings(MEETINGROOM_SYNC_SETTLE_SECONDS=60):
+            data = self.sync(token)
+        self.assertEqual(data["changed"], [])
+        self.assertEqual(data["sync_token"], token)
+        self.assertEqual(len(self.sync(token)["changed"]), 1)
+
+    def test_invalid_token(self):
+        response = self.client.get("/api/v1/bookings/sync/", {"sync_token": "not-a-token"})
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+
+
+class CalendarFeedTest(TestCase):
+    def setUp(self):
+        cache.clear()
+        self.client = APIClient()
+        self.user = User.objects.create_user(username="cal")
+        self.room = MeetingRoom.objects.create(name="Board Room, 2nd floor", capacity=10)
+        self.start = (timezone.now() + timedelta(days=1)).replace(hour=9, minute=0, second=0, microsecond=0)
+        self.booking = create_booking(self.room.id, self.start, self.start + timedelta(hours=1), user=self.user, purpose="Q3 review; budget")
+        create_booking(self.room.id, self.start + timedelta(hours=2), self.start + timedelta(hours=3), purpose="x" * 100)
+        cancel_booking(create_booking(self.room.id, self.start + timedelta(hours=4), self.start + timedelta(hours=5)).id)
+        # Outside the window.
+        create_booking(self.room.id, self.start + timedelta(days=400), self.start + timedelta(days=400, hours=1))
+        self.url = f"/api/v1/meeting-rooms/{self.room.id}/calendar.ics"
+
+    def test_room_feed(self):
+        with self.assertNumQueries(2):
+            response = self.client.get(self.url, HTTP_ACCEPT="text/calendar")
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(response["Content-Type"], "text/calendar; charset=utf-8")
+        body = response.content.decode()
+        self.assertTrue(body.startswith("BEGIN:VCALENDAR\r\n") and body.endswith("END:VCALENDAR\r\n"))
+        self.assertEqual(body.count("BEGIN:VEVENT"), 2)
+        self.assertIn("X-WR-CALNAME:Board Room\\, 2nd floor\r\n", body)
+        self.assertIn(f"UID:booking-{self.booking.id}@meetingroom\r\n", body)
+        self.assertIn(f"DTSTART:{self.start.strftime('%Y%m%dT%H%M%SZ')}\r\n", body)
+        self.assertIn("SUMMARY:Q3 review\\; budget\r\n", body)
+        self.assertTrue(all(len(line.encode()) <= 75 for line in body.split("\r\n")))
+        self.assertIn("\r\n x", body)
+
+        # The rendered body is cached under its ETag.
+        with self.assertNumQueries(1):
+            again = self.client.get(self.url)
+        self.assertEqual(again.content, response.content)
+
+    def test_conditional_get(self):
+        response = self.client.get(self.url)
+        with self.assertNumQueries(1):
+            not_modified = self.client.get(self.url, HTTP_IF_NONE_MATCH=response["ETag"])
+        self.assertEqual(not_modified.status_code, status.HTTP_304_NOT_MODIFIED)
+        self.assertEqual(not_modified.content, b"")
+        self.assertEqual(self.client.get(self.url, HTTP_IF_MODIFIED_SINCE=response["Last-Modified"]).status_code, 304)
+
+        cancel_booking(self.booking.id)
+        changed = self.client.get(self.url, HTTP_IF_NONE_MATCH=response["ETag"])
+        self.assertEqual(changed.status_code, status.HTTP_200_OK)
+        self.assertNotEqual(changed["ETag"], response["ETag"])
+        self.assertEqual(changed.content.decode().count("BEGIN:VEVENT"), 1)
+
+    def test_user_feed(self):
+        response = self.client.get(f"/api/v1/users/{self.user.id}/calendar.ics")
+        body = response.content.decode()
+        self.assertEqual(body.count("BEGIN:VEVENT"), 1)
+        self.assertIn("LOCATION:Board Room\\, 2nd floor\r\n", body)
+        self.assertEqual(self.client.get("/api/v1/users/999/calendar.ics").status_code, status.HTTP_404_NOT_FOUND)
+
+    def test_user_feed_follows_room_renames(self):
+        url = f"/api/v1/users/{self.user.id}/calendar.ics"
+        response = self.client.get(url)
+        self.room.name = "Boardroom"
+        self.room.save()
+        renamed = self.client.get(url, HTTP_IF_NONE_MATCH=response["ETag"])
+        self.assertEqual(renamed.status_code, status.HTTP_200_OK)
+        self.assertIn("LOCATION:Boardroom\r\n", renamed.content.decode())
+
+    def test_fold_keeps_utf8_sequences(self):
+        line = "SUMMARY:" + "\u00e9" * 80
+        folded = ical.fold(line).split("\r\n ")
+        self.assertEqual("".join(folded), line)
+        self.assertTrue(all(len(part.encode()) <= 74 for part in folded[1:]))
+
+
+class HoldTest(TestCase):
+    def setUp(self):
+        self.client = APIClient()
+        self.room = MeetingRoom.objects.create(name="Hold Room", capacity=6)
+        self.start = (timezone.now() + timedelta(days=1)).replace(minute=0, second=0, microsecond=0)
+        self.slot = {"start_time": self.start.isoformat(), "end_time": (self.start + timedelta(hours=1)).isoformat()}
+        room_index.reset()
+        self.addCleanup(room_index.reset)
+
+    def hold(self, **data):
+        return self.client.post(f"/api/v1/meeting-rooms/{self.room.id}/hold/", {**self.slot, **data}, format="json")
+
+    def expire(self, *bookings):
+        Booking.objects.filter(pk__in=[b.pk for b in bookings]).update(hold_expires_at=timezone.now() - timedelta(seconds=1))
+
+    def test_hold_then_confirm(self):
+        response = self.hold(ttl=60)
+        self.assertEqual(response.status_code, status.HTTP_201_CREATED)
+        self.assertEqual(response.data["booking"]["status"], "pending")
+        booking = Booking.objects.get(pk=response.data["booking"]["id"])
+        self.assertAlmostEqual(booking.hold_expires_at, timezone.now() + timedelta(seconds=60), delta=timedelta(seconds=5))
+        # A live hold blocks the slot.
+        response = self.client.post(f"/api/v1/meeting-rooms/{self.room.id}/book/", self.slot, format="json")
+        self.assertEqual(response.status_code, status.HTTP_409_CONFLICT)
+
+        url = f"/api/v1/bookings/{booking.id}/confirm/"
+        self.assertEqual(self.client.post(url, HTTP_IF_MATCH='"5"').status_code, status.HTTP_412_PRECONDITION_FAILED)
+        response = self.client.post(url, HTTP_IF_MATCH=booking.etag)
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(response["ETag"], '"2"')
+        self.assertEqual(response.data["booking"]["status"], "confirmed")
+        self.assertEqual([h["notes"] for h in response.data["booking"]["history"]], ["Hold confirmed", "Hold placed"])
+        booking.refresh_from_db()
+        self.assertIsNone(booking.hold_expires_at)
+        self.assertEqual(self.client.post(url).status_code, status.HTTP_400_BAD_REQUEST)
+
+    def test_ttl_is_bounded(self):
+        response = self.hold(ttl=settings.MEETINGROOM_HOLD_MAX_TTL_SECONDS + 1)
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+        self.assertIn("ttl", response.data)
+
+    def test_expired_hold_cannot_be_confirmed_and_frees_the_slot(self):
+        booking = Booking.objects.get(pk=self.hold().data["booking"]["id"])
+        self.expire(booking)
+        response = self.client.post(f"/api/v1/bookings/{booking.id}/confirm/")
+        self.assertEqual(response.status_code, status.HTTP_410_GONE)
+
+        # The sweeper has not run yet; a booking for the slot releases the hold itself.
+        with self.captureOnCommitCallbacks(execute=True):
+            response = self.client.post(f"/api/v1/meeting-rooms/{self.room.id}/book/", self.slot, format="json")
+        self.assertEqual(response.status_code, status.HTTP_201_CREATED)
+        booking.refresh_from_db()
+        self.assertEqual((booking.status, booking.version), ("cancelled", 2))
+        self.assertEqual(booking.history.get(action="cancelled").notes, "Hold expired")
+
+    def test_expired_hold_does_not_block_other_writes(self):
+        held = Booking.objects.get(pk=self.hold().data["booking"]["id"])
+        self.expire(held)
+        end = self.start + timedelta(hours=1)
+        response = self.client.post("/api/v1/bookings/batch/", {
+            "items": [{"room_id": self.room.id, "start_time": self.start.isoformat(), "end_time": end.isoformat()}],
+        }, format="json")
+        self.assertEqual(response.status_code, status.HTTP_201_CREATED)
+        held.refresh_from_db()
+        self.assertEqual(held.status, "cancelled")
+
+        # Reschedule onto an expired hold, then shift into one.
+        later = create_booking(self.room.id, self.start + timedelta(hours=3), self.start + timedelta(hours=4))
+        held = Booking.objects.get(pk=self.hold(start_time=(self.start + timedelta(hours=1)).isoformat(),
+                                                end_time=(self.start + timedelta(hours=2)).isoformat()).data["booking"]["id"])
+        self.expire(held)
+        moved = reschedule_booking(later.pk, self.start + timedelta(hours=1), self.start + timedelta(hours=2))
+        self.assertEqual(moved.start_time, self.start + timedelta(hours=1))
+        held.refresh_from_db()
+        self.assertEqual(held.status, "cancelled")
+
+        held = Booking.objects.get(pk=self.hold(start_time=(self.start + timedelta(hours=2)).isoformat(),
+                                                end_time=(self.start + timedelta(hours=3)).isoformat()).data["booking"]["id"])
+        self.expire(held)
+        response = self.client.post(f"/api/v1/meeting-rooms/{self.room.id}/shift/",
+                                    {"minutes": 60, "start_time": (self.start + timedelta(minutes=30)).isoformat()}, format="json")
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        held.refresh_from_db()
+        self.assertEqual(held.status, "cancelled")
+        self.assertEqual(History.objects.filter(action="cancelled", notes="Hold expired").count(), 3)
+
+    def test_sweeper_expires_in_batches(self):
+        with self.captureOnCommitCallbacks(execute=True):
+            holds = [
+                Booking.objects.get(pk=self.hold(start_time=(self.start + timedelta(hours=h)).isoformat(),
+                                                 end_time=(self.start + timedelta(hours=h + 1)).isoformat()).data["booking"]["id"])
+                for h in range(3)
+            ]
+        self.expire(*holds[:2])
+        self.assertFalse(room_index.is_free(self.room.id, self.start, self.start + timedelta(hours=1)))
+        out = StringIO()
+        call_command("expire_holds", dry_run=True, stdout=out)
+        self.assertIn("2 expired holds", out.getvalue())
+
+        with self.captureOnCommitCallbacks(execute=True):
+            call_command("expire_holds", batch_size=1, stdout=out)
+        self.assertIn("Expired 2 holds", out.getvalue())
+        statuses = dict(Booking.objects.values_list("id", "status"))
+        self.assertEqual([statuses[b.pk] for b in holds], ["cancelled", "cancelled", "pending"])
+        self.assertEqual(History.objects.filter(action="cancelled", notes="Hold expired").count(), 2)
+        self.assertTrue(room_index.is_free(self.room.id, self.start, self.start + timedelta(hours=2)))
+        self.assertFalse(room_index.is_free(self.room.id, self.start + timedelta(hours=2), self.start + timedelta(hours=3)))
+        usage = RoomUsage.objects.filter(meeting_room=self.room).values_list("booked_seconds", flat=True)
+        self.assertEqual(sum(usage), 3600)
+
+
+class ArchiveTest(TestCase):
+    def setUp(self):
+        self.client = APIClient()
+        self.room = MeetingRoom.objects.create(name="Archive Room", capacity=6)
+        now = timezone.now()
+        self.old = []
+        for days in (400, 300, 100):
+            booking = Booking(meeting_room=self.room, start_time=now - timedelta(days=days),
+                              end_time=now - timedelta(days=days, minutes=-30), status="confirmed")
+            booking.save(validate=False)
+            History.objects.create(booking=booking, action="created", notes="Booking created")
+            self.old.append(booking)
+        self.live = Booking.objects.create(meeting_room=self.room, start_time=now + timedelta(days=1),
+                                           end_time=now + timedelta(days=1, hours=1))
+
+    def test_archives_in_resumable_batches(self):
+        out = StringIO()
+        call_command("archive_bookings", days=30, dry_run=True, stdout=out)
+        self.assertIn("3 bookings", out.getvalue())
+
+        call_command("archive_bookings", days=30, batch_size=2, max_batches=1, stdout=StringIO())
+        self.assertEqual(ArchivedBooking.objects.count(), 2)
+        self.assertEqual(Booking.objects.count(), 2)
+
+        call_command("archive_bookings", days=30, batch_size=2, stdout=StringIO())
+        self.assertEqual(list(Booking.objects.all()), [self.live])
+        self.assertEqual(set(ArchivedBooking.objects.values_list("id", flat=True)), {b.pk for b in self.old})
+        self.assertEqual(ArchivedHistory.objects.count(), 3)
+        self.assertFalse(History.objects.filter(booking_id__in=[b.pk for b in self.old]).exists())
+
+    def test_listing_reads_archive_only_when_asked(self):
+        call_command("archive_bookings", days=200, stdout=StringIO())
+        live = self.client.get("/api/v1/bookings/").data["results"]
+        self.assertEqual({b["id"] for b in live}, {self.old[2].pk, self.live.pk})
+
+        response = self.client.get("/api/v1/bookings/", {"archived": "true", "expand": "history"})
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        archived = response.data["results"]
+        self.assertEqual([b["id"] for b in archived], [self.old[1].pk, self.old[0].pk])
+        self.assertEqual(archived[0]["meeting_room_name"], "Archive Room")
+        self.assertEqual(archived[0]["history"][0]["action"], "created")
+
+
+class BookingExportTest(TestCase):
+    def setUp(self):
+        self.client = APIClient()
+        self.room = MeetingRoom.objects.create(name="Export Room", capacity=6)
+        start = timezone.now() + timedelta(days=1)
+        for i in range(3):
+            booking = Booking.objects.create(
+                meeting_room=self.room,
+                start_time=start + timedelta(hours=i),
+                end_time=start + timedelta(hours=i, minutes=30),
+            )
+            History.objects.create(booking=booking, action="created", notes="Booking created")
+        booking.status = "cancelled"
+        booking.save()
+        History.objects.create(booking=booking, action="cancelled", notes="Cancelled via API")
+
+    def test_ndjson_export_with_history(self):
+        response = self.client.get("/api/v1/bookings/export/", {"expand": "history"})
+        self.assertEqual(response["Content-Type"], "application/x-ndjson")
+        rows = [json.loads(line) for line in b"".join(response.streaming_content).splitlines()]
+        self.assertEqual(len(rows), 4)
+        self.assertEqual(rows[0]["meeting_room_name"], "Export Room")
+        self.assertEqual([row["history_action"] for row in rows[-2:]], ["created", "cancelled"])
+
+    def test_csv_export_filters_status(self):
+        response = self.client.get("/api/v1/bookings/export/", {"output": "csv", "status": "confirmed"})
+        lines = b"".join(response.streaming_content).decode().splitlines()
+        self.assertTrue(lines[0].startswith("id,meeting_room_id,meeting_room_name"))
+        self.assertEqual(len(lines), 3)
+
+    def test_export_command_batches(self):
+        out = StringIO()
+        call_command("export_bookings", include_history=True, chunk_size=1, stdout=out)
+        self.assertEqual(len(out.getvalue().splitlines()), 4)
+
+
+class BatchBookingTest(TestCase):
+    def setUp(self):
+        self.client = APIClient()
+        self.room = MeetingRoom.objects.create(name="Standup Room", capacity=6)
+        self.other = MeetingRoom.objects.create(name="Standup Room 2", capacity=6)
+        self.start = (timezone.now() + timedelta(days=1)).replace(hour=9, minute=0, second=0, microsecond=0)
+        self.end = self.start + timedelta(minutes=15)
+
+    def post(self, data):
+        return self.client.post("/api/v1/bookings/batch/", data, format="json")
+
+    def test_weekly_recurrence_bulk_created(self):
+        data = {
+            "recurrence": {
+                "room_ids": [self.room.id],
+                "start_time": self.start.isoformat(),
+                "end_time": self.end.isoformat(),
+                "frequency": "weekly",
+                "count": 13,
+            },
+            "purpose": "Standup",
+        }
+        # savepoint, room lock, range query, booking insert, history insert, release
+        with self.assertNumQueries(6):
+            response = self.post(data)
+        self.assertEqual(response.status_code, status.HTTP_201_CREATED)
+        self.assertEqual(response.data["created"], 13)
+        self.assertEqual(Booking.objects.filter(meeting_room=self.room).count(), 13)
+        self.assertEqual(History.objects.filter(booking__meeting_room=self.room).count(), 13)
+
+    def test_atomic_mode_rejects_whole_batch(self):
+        Booking.objects.create(meeting_room=self.room, start_time=self.start, end_time=self.end)
+        items = [
+            {"room_id": self.room.id, "start_time": self.start.isoformat(), "end_time": self.end.isoformat()},
+            {"room_id": self.other.id, "start_time": self.start.isoformat(), "end_time": self.end.isoformat()},
+        ]
+        response = self.post({"items": items})
+        self.assertEqual(response.status_code, status.HTTP_409_CONFLICT)
+        self.assertEqual([r["status"] for r in response.data["results"]], ["conflict", "skipped"])
+        self.assertFalse(Booking.objects.filter(meeting_room=self.other).exists())
+
+    def test_best_effort_reports_intra_batch_overlap(self):
+        overlap_start = self.start + timedelta(minutes=5)
+        items = [
+            {"room_id": self.room.id, "start_time": self.start.isoformat(), "end_time": self.end.isoformat()},
+            {"room_id": self.room.id, "start_time": overlap_start.isoformat(), "end_time": (overlap_start + timedelta(minutes=15)).isoformat()},
+            {"room_id": 9999, "start_time": self.start.isoformat(), "end_time": self.end.isoformat()},
+        ]
+        response = self.post({"items": items, "mode": "best_effort"})
+        self.assertEqual(response.status_code, status.HTTP_207_MULTI_STATUS)
+        self.assertEqual([r["status"] for r in response.data["results"]], ["created", "conflict", "error"])
+        self.assertIsNotNone(response.data["results"][0]["booking_id"])
+        self.assertEqual(Booking.objects.filter(meeting_room=self.room).count(), 1)
+
+    def test_recurrence_requires_count_or_until(self):
+        data = {
+            "recurrence": {
+                "room_ids": [self.room.id],
+                "start_time": self.start.isoformat(),
+                "end_time": self.end.isoformat(),
+                "frequency": "daily",
+            }
+        }
+        self.assertEqual(self.post(data).status_code, status.HTTP_400_BAD_REQUEST)
+
+
+class RoomCatalogueCacheTest(TestCase):
+    def setUp(self):
+        cache.clear()
+        self.client = APIClient()
+        self.room = MeetingRoom.objects.create(name="Cached Room", capacity=6)
+
+    def test_catalogue_cached_with_etag(self):
+        response = self.client.get("/api/v1/meeting-rooms/")
+        self.assertEqual(response["X-Cache"], "MISS")
+        etag = response["ETag"]
+        with self.assertNumQueries(0):
+            response = self.client.get("/api/v1/meeting-rooms/")
+        self.assertEqual(response["X-Cache"], "HIT")
+        self.assertEqual([room["name"] for room in response.data], ["Cached Room"])
+
+        response = self.client.get("/api/v1/meeting-rooms/", HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, status.HTTP_304_NOT_MODIFIED)
+
+        stats = self.client.get("/api/v1/meeting-rooms/cache-stats/").data
+        self.assertEqual((stats["hits"], stats["misses"]), (2, 1))
+
+    def test_room_save_invalidates(self):
+        etag = self.client.get("/api/v1/meeting-rooms/available/")["ETag"]
+        MeetingRoom.objects.create(name="New Room", capacity=4)
+        response = self.client.get("/api/v1/meeting-rooms/available/", HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(response.data["count"], 2)
+        self.assertNotEqual(response["ETag"], etag)
+
+
+class UtilizationTest(TestCase):
+    def setUp(self):
+        self.client = APIClient()
+        self.room = MeetingRoom.objects.create(name="Busy Room", capacity=6)
+        self.day = (timezone.now() + timedelta(days=1)).replace(hour=0, minute=0, second=0, microsecond=0)
+
+    def book(self, start_hour, hours):
+        start = self.day + timedelta(hours=start_hour)
+        data = {"start_time": start.isoformat(), "end_time": (start + timedelta(hours=hours)).isoformat()}
+        with self.captureOnCommitCallbacks(execute=True):
+            response = self.client.post(f"/api/v1/meeting-rooms/{self.room.id}/book/", data, format="json")
+        return response.data["booking"]["id"]
+
+    def rollups(self):
+        return list(RoomUsage.objects.values_list("hour", "booked_seconds", "created_count", "cancelled_count"))
+
+    def test_rollups_follow_bookings_and_match_rebuild(self):
+        self.book(9.5, 1.5)
+        cancelled_id = self.book(13, 1)
+        with self.captureOnCommitCallbacks(execute=True):
+            self.client.post(f"/api/v1/bookings/{cancelled_id}/cancel/", format="json")
+        self.assertEqual(self.rollups(), [(9, 1800, 1, 0), (10, 3600, 0, 0), (13, 0, 1, 1)])
+
+        date = self.day.date().isoformat()
+        with self.assertNumQueries(3):
+            response = self.client.get("/api/v1/meeting-rooms/utilization/", {"start_date": date, "end_date": date})
+        room = response.data["rooms"][0]
+        self.assertEqual(room["booked_hours"], 1.5)
+        self.assertEqual(room["utilization"], 0.15)
+        self.assertEqual((room["bookings"], room["cancellations"], room["cancellation_rate"]), (2, 1, 0.5))
+        self.assertEqual(room["peak_hours"], [10, 9])
+
+        incremental = self.rollups()
+        call_command("rebuild_usage_rollups", stdout=StringIO())
+        self.assertEqual(self.rollups(), incremental)
+
+    def test_weekly_period(self):
+        self.book(9, 2)
+        start = self.day.date()
+        response = self.client.get(
+            "/api/v1/meeting-rooms/utilization/",
+            {"start_date": start.isoformat(), "end_date": (start + timedelta(days=13)).isoformat(), "period": "week"},
+        )
+        series = response.data["rooms"][0]["series"]
+        self.assertEqual(len(series), 1)
+        self.assertEqual(series[0]["booked_hours"], 2)
+
+
+@override_settings(MEETINGROOM_METRICS_SAMPLE_RATE=1.0)
+class InstrumentationTest(TestCase):
+    def setUp(self):
+        self.client = APIClient()
+        self.room = MeetingRoom.objects.create(name="Metrics Room", capacity=6)
+        registry.reset()
+        self.addCleanup(registry.reset)
+
+    def test_metrics_recorded_per_endpoint(self):
+        self.client.get("/api/v1/bookings/")
+        stats = registry.snapshot()[("booking-list", "GET")]
+        self.assertEqual(stats["count"], 1)
+        self.assertEqual(stats["queries"], 1)
+        self.assertGreater(stats["bytes"], 0)
+        self.assertEqual(stats["statuses"], {200: 1})
+
+        body = self.client.get("/api/v1/metrics/").content.decode()
+        self.assertIn('meetingroom_db_queries_total{endpoint="booking-list",method="GET"} 1', body)
+        self.assertIn('meetingroom_request_seconds_count{endpoint="booking-list",method="GET"} 1', body)
+
+    @override_settings(MEETINGROOM_SLOW_REQUEST_MS=0)
+    def test_slow_request_logs_worst_query(self):
+        with self.assertLogs("Meetingroom.performance", level="WARNING") as logs:
+            self.client.get("/api/v1/bookings/")
+        self.assertIn("Meetingroom_booking", logs.output[0])
+
+    @override_settings(MEETINGROOM_METRICS_SAMPLE_RATE=0.0)
+    def test_unsampled_requests_not_recorded(self):
+        self.client.get("/api/v1/bookings/")
+        self.assertEqual(registry.snapshot(), {})
+
+
+class AsyncReadPathTest(TestCase):
+    def setUp(self):
+        self.room = MeetingRoom.objects.create(name="Async Room", capacity=6, description="Quiet")
+        self.other = MeetingRoom.objects.create(name="Other Async Room", capacity=10)
+        self.start = (timezone.now() + timedelta(days=1)).replace(microsecond=0)
+        for i in range(5):
+            Booking.objects.create(
+                meeting_room=self.room if i % 2 == 0 else self.other,
+                start_time=self.start + timedelta(hours=i),
+                end_time=self.start + timedelta(hours=i, minutes=30),
+            )
+        cache.clear()
+
+    async def test_same_payload_as_sync_views(self):
+        window = {"start_time": self.start.isoformat(), "end_time": (self.start + timedelta(minutes=15)).isoformat()}
+        for sync_path, async_path, params in [
+            ("/api/v1/meeting-rooms/", "/api/v1/async/meeting-rooms/", {}),
+            ("/api/v1/meeting-rooms/available/", "/api/v1/async/meeting-rooms/available/", {}),
+            ("/api/v1/meeting-rooms/available/", "/api/v1/async/meeting-rooms/available/", window),
+            ("/api/v1/meeting-rooms/available/", "/api/v1/async/meeting-rooms/available/", {**window, "min_capacity": 8}),
+            ("/api/v1/bookings/", "/api/v1/async/bookings/", {"room_id": self.room.id}),
+        ]:
+            expected = json.loads((await self.async_client.get(sync_path, params)).content)
+            response = await self.async_client.get(async_path, params)
+            self.assertEqual(response.status_code, 200)
+            data = json.loads(response.content)
+            if "results" in expected:
+                # next links point at different paths and cursor formats
+                data, expected = data["results"], expected["results"]
+            self.assertEqual(data, expected)
+
+    async def test_catalogue_shares_cache_and_etag(self):
+        response = await self.async_client.get("/api/v1/async/meeting-rooms/")
+        self.assertEqual(response["X-Cache"], "MISS")
+        sync_response = await self.async_client.get("/api/v1/meeting-rooms/")
+        self.assertEqual(sync_response["X-Cache"], "HIT")
+        self.assertEqual(sync_response["ETag"], response["ETag"])
+        response = await self.async_client.get("/api/v1/async/meeting-rooms/", headers={"If-None-Match": response["ETag"]})
+        self.assertEqual(response.status_code, 304)
+
+    async def test_bookings_cursor_pagination(self):
+        seen = []
+        url = "/api/v1/async/bookings/?page_size=2"
+        while url:
+            page = json.loads((await self.async_client.get(url)).content)
+            seen.extend(booking["start_time"] for booking in page["results"])
+            url = page["next"]
+        expected = json.loads((await self.async_client.get("/api/v1/bookings/")).content)["results"]
+        self.assertEqual(seen, [booking["start_time"] for booking in expected])
+
+    async def test_non_positive_page_size_uses_default(self):
+        expected = json.loads((await self.async_client.get("/api/v1/bookings/")).content)["results"]
+        for page_size in ("0", "-1"):
+            response = await self.async_client.get("/api/v1/async/bookings/", {"page_size": page_size})
+            self.assertEqual(response.status_code, 200)
+            results = json.loads(response.content)["results"]
+            self.assertEqual([b["id"] for b in results], [b["id"] for b in expected])
+
+    async def test_invalid_input(self):
+        response = await self.async_client.get("/api/v1/async/bookings/", {"start_time": "soon"})
+        self.assertEqual(response.status_code, 400)
+        response = await self.async_client.get(
+            "/api/v1/async/meeting-rooms/available/", {"start_time": "soon", "end_time": "later"}
+        )
+        self.assertEqual(response.status_code, 400)
+        response = await self.async_client.post("/api/v1/async/meeting-rooms/")
+        self.assertEqual(response.status_code, 405)
+
+    def test_compare_read_paths(self):
+        results = benchmark.compare_read_paths(3)
+        self.assertEqual(set(results), set(benchmark.READ_PATHS))
+        for handlers in results.values():
+            self.assertEqual(handlers["wsgi"]["errors"], 0)
+            self.assertEqual(handlers["asgi"]["errors"], 0)
+
+
+class EventFeedTest(TestCase):
+    def setUp(self):
+        events.reset()
+        self.client = APIClient()
+        self.room = MeetingRoom.objects.create(name="Lobby Room", capacity=6)
+        self.other = MeetingRoom.objects.create(name="Other Lobby Room", capacity=6)
+        self.start = timezone.now() + timedelta(days=1)
+
+    def test_booking_writes_publish_after_commit(self):
+        with self.captureOnCommitCallbacks(execute=True):
+            response = self.client.post(f"/api/v1/meeting-rooms/{self.room.id}/book/", {
+                "start_time": self.start.isoformat(),
+                "end_time": (self.start + timedelta(hours=1)).isoformat(),
+            }, format="json")
+            self.assertEqual(events.get_backend().last_id(), 0)
+        booking_id = response.data["booking"]["id"]
+        with self.captureOnCommitCallbacks(execute=True):
+            self.client.post(f"/api/v1/bookings/{booking_id}/cancel/")
+        published, complete = events.get_backend().read(0)
+        self.assertTrue(complete)
+        self.assertEqual([event["type"] for event in published], ["booking.created", "booking.cancelled"])
+        self.assertEqual({(event["booking_id"], event["room_id"]) for event in published}, {(booking_id, self.room.id)})
+
+    def test_memory_backend_resume_window(self):
+        backend = events.MemoryBackend(3)
+        for i in range(5):
+            backend.publish({"type": "booking.created", "room_id": self.room.id, "booking_id": i})
+        published, complete = backend.read(2)
+        self.assertEqual([event["id"] for event in published], [3, 4, 5])
+        self.assertTrue(complete)
+        self.assertFalse(backend.read(1)[1])
+        self.assertEqual(backend.read(9), ([], False))
+
+    def test_cache_backend(self):
+        cache.clear()
+        backend = events.CacheBackend(3)
+        for i in range(4):
+            backend.publish({"type": "booking.created", "room_id": self.room.id, "booking_id": i})
+        published, complete = backend.read(1)
+        self.assertEqual([event["id"] for event in published], [2, 3, 4])
+        self.assertTrue(complete)
+        self.assertFalse(backend.read(0)[1])
+        cache.delete(f"{events.CacheBackend.KEY_PREFIX}:3")
+        published, complete = backend.read(1)
+        self.assertEqual([event["id"] for event in published], [2, 4])
+        self.assertFalse(complete)
+
+    @override_settings(MEETINGROOM_EVENTS_STREAM_SECONDS=0.2)
+    async def test_stream_resumes_from_last_event_id(self):
+        backend = events.get_backend()
+        for room in [self.room, self.other, self.room, self.other]:
+            backend.publish(events.booking_event("created", 1, room.id, self.start, self.start + timedelta(hours=1)))
+        response = await self.async_client.get(
+            "/api/v1/async/meeting-rooms/events/", {"room_id": self.room.id}, headers={"Last-Event-ID": "1"}
+        )
+        self.assertEqual(response["Content-Type"], "text/event-stream")
+        body = b"".join([chunk async for chunk in response.streaming_content]).decode()
+        self.assertIn("id: 3\nevent: booking.created\n", body)
+        self.assertNotIn("id: 1\n", body)
+        self.assertNotIn("id: 2\n", body)
+        self.assertNotIn("id: 4\n", body)
+
+        response = await self.async_client.get("/api/v1/async/meeting-rooms/events/", {"room_id": "x"})
+        self.assertEqual(response.status_code, 400)
+
+    async def test_stream_wakes_on_publish(self):
+        backend = events.MemoryBackend(10)
+        stream = events.stream(backend, 0, duration=5, heartbeat=5)
+        self.assertTrue((await stream.__anext__()).startswith("retry:"))
+        pending = asyncio.ensure_future(stream.__anext__())
+        await asyncio.sleep(0.01)
+        backend.publish(events.booking_event("cancelled", 7, self.room.id, self.start, self.start + timedelta(hours=1)))
+        message = await asyncio.wait_for(pending, 1)
+        self.assertTrue(message.startswith("id: 1\nevent: booking.cancelled\n"))
+        self.assertEqual(json.loads(message.split("data: ")[1])["booking_id"], 7)
+        await stream.aclose()
+
+
+class BenchmarkSmokeTest(TestCase):
+    def assertNoOverlaps(self):
+        self.assertFalse(
+            Booking.objects.active().filter(
+                meeting_room__name__startswith="Bench Room",
+                start_time__lt=F("end_time"),
+            ).annotate(
+                clash=Exists(
+                    Booking.objects.active().filter(
+                        meeting_room=OuterRef("meeting_room"),
+                        start_time__lt=OuterRef("end_time"),
+                        end_time__gt=OuterRef("start_time"),
+                    ).exclude(pk=OuterRef("pk"))
+                )
+            ).filter(clash=True).exists()
+        )
+
+    def test_seed_and_run_scenarios(self):
+        call_command("bench_seed", rooms=5, bookings=200, days_back=5, days_ahead=5, stdout=StringIO())
+        self.assertEqual(MeetingRoom.objects.filter(name__startswith="Bench Room").count(), 5)
+        self.assertNoOverlaps()
+
+        out = StringIO()
+        call_command("bench_run", requests=5, json=True, stdout=out)
+        results = json.loads(out.getvalue())
+        self.assertEqual(set(results), {"booking_storm", "availability", "listing", "cancellation"})
+        for result in results.values():
+            self.assertEqual(result["errors"], 0)
+            self.assertIsNotNone(result["p95_ms"])
+        self.assertEqual(benchmark.compare(results, results), [])
+
+    def test_seed_at_default_density(self):
+        # The hottest of 100 rooms is asked for ~92 bookings a day, far more
+        # than fit between opening and closing; the rest moves to other rooms.
+        rooms, created = benchmark.seed(100, 100000 * 4 // 210, days_back=2, days_ahead=2, with_history=True)
+        self.assertEqual(rooms, 100)
+        self.assertNoOverlaps()
+        hours = Booking.objects.filter(meeting_room__name__startswith="Bench Room").values_list("start_time", "end_time")
+        self.assertTrue(all(
+            timezone.localtime(start).hour >= benchmark.OPEN_HOUR and
+            timezone.localtime(end) <= timezone.localtime(start).replace(hour=benchmark.CLOSE_HOUR, minute=0)
+            for start, end in hours
+        ))
+        self.assertGreater(created, 1800)
+        self.assertEqual(History.objects.filter(notes="Benchmark seed").count(), created)
+
+    def test_with_history_needs_returned_ids(self):
+        features = type(connection.features)
+        with mock.patch.object(features, "can_return_rows_from_bulk_insert", new_callable=mock.PropertyMock, return_value=False):
+            with self.assertRaises(CommandError):
+                call_command("bench_seed", rooms=1, bookings=10, with_history=True, stdout=StringIO())
+
+
+class ConnectionBenchmarkTest(TransactionTestCase):
+    # Closes connections between requests, which would end a TestCase's transaction.
+    def test_compare_connection_modes(self):
+        MeetingRoom.objects.create(name="Bench Room", capacity=4)
+        before = {alias: dict(connections.settings[alias]) for alias in connections}
+        out = StringIO()
+        call_command("bench_connections", requests=3, concurrency=1, json=True, stdout=out)
+        results = json.loads(out.getvalue())
+        self.assertLessEqual({"per_request", "persistent"}, set(results))
+        for result in results.values():
+            self.assertEqual(result["errors"], 0)
+            self.assertEqual(result["requests"], 3)
+        self.assertEqual({alias: dict(connections.settings[alias]) for alias in connections}, before)
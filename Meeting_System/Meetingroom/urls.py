@@ -1,10 +1,29 @@
 from django.urls import path
 from .views import *
+from . import async_views
 
 urlpatterns = [
     path("meeting-rooms/<int:room_id>/book/", MeetingRoomBookView.as_view(), name="meeting-room-book"),
+    path("meeting-rooms/<int:room_id>/hold/", MeetingRoomHoldView.as_view(), name="meeting-room-hold"),
+    path("meeting-rooms/<int:room_id>/shift/", RoomShiftView.as_view(), name="meeting-room-shift"),
     path("meeting-rooms/available/", AvailableRoomsView.as_view(), name="available-rooms"),
+    path("meeting-rooms/free-slots/", FreeSlotsView.as_view(), name="free-slots"),
+    path("meeting-rooms/timeline/", TimelineView.as_view(), name="room-timeline"),
+    path("meeting-rooms/<int:owner_id>/calendar.ics", calendar_feed, {"kind": "room"}, name="room-calendar"),
+    path("users/<int:owner_id>/calendar.ics", calendar_feed, {"kind": "user"}, name="user-calendar"),
+    path("meeting-rooms/cache-stats/", CatalogueStatsView.as_view(), name="catalogue-stats"),
+    path("meeting-rooms/utilization/", UtilizationView.as_view(), name="room-utilization"),
     path("meeting-rooms/", MeetingRoomView.as_view(), name="meeting-room-list"),
+    path("bookings/batch/", BatchBookingView.as_view(), name="booking-batch"),
+    path("bookings/export/", BookingExportView.as_view(), name="booking-export"),
+    path("bookings/sync/", BookingSyncView.as_view(), name="booking-sync"),
     path("bookings/", BookingRoomView.as_view(), name="booking-list"),
+    path("metrics/", MetricsView.as_view(), name="metrics"),
     path("bookings/<int:booking_id>/cancel/", BookingCancelView.as_view(), name="booking-cancel"),
+    path("bookings/<int:booking_id>/confirm/", BookingConfirmView.as_view(), name="booking-confirm"),
+    path("bookings/<int:booking_id>/reschedule/", BookingRescheduleView.as_view(), name="booking-reschedule"),
+    path("async/meeting-rooms/available/", async_views.available_rooms, name="async-available-rooms"),
+    path("async/meeting-rooms/", async_views.meeting_rooms, name="async-meeting-room-list"),
+    path("async/bookings/", async_views.bookings, name="async-booking-list"),
+    path("async/meeting-rooms/events/", async_views.room_events, name="room-events"),
 ]
@@ -3,38 +3,281 @@ from rest_framework.generics import ListAPIView
 from rest_framework.response import Response
 from rest_framework import status
 from rest_framework.permissions import AllowAny
+from rest_framework.exceptions import ValidationError
 from django.utils.dateparse import parse_datetime
-from .models import MeetingRoom, Booking, History
-from .serializers import AvailableRoomSerializer, MeetingRoomSerializer, BookingSerializer ,BookingCreateSerializer
-from django.shortcuts import get_object_or_404
-from django.db import transaction
+from django.utils.http import parse_etags
+from .models import MeetingRoom, Booking, ArchivedBooking
+from .serializers import AvailableRoomSerializer, MeetingRoomSerializer, BookingSerializer ,BookingCreateSerializer, HoldSerializer, FreeSlotQuerySerializer, TimelineQuerySerializer, SyncQuerySerializer, BookingListSerializer, BatchBookingSerializer, UtilizationQuerySerializer, RoomSearchSerializer, RescheduleSerializer, ShiftBookingsSerializer, ArchivedBookingSerializer, ArchivedBookingListSerializer
+from .pagination import BookingCursorPagination
+from .services import AlreadyCancelled, BookingConflict, HoldExpired, NotAHold, RoomInactive, VersionMismatch, cancel_booking, confirm_hold, create_booking, create_bookings_batch, place_hold, reschedule_booking, shift_bookings
+from .idempotency import idempotent
+from django.conf import settings
+from django.core.exceptions import ValidationError as DjangoValidationError
+from django.http import HttpResponse, JsonResponse, StreamingHttpResponse
+from django.views.decorators.http import require_GET
+from django.utils.cache import get_conditional_response
+from django.utils.http import http_date
+from .instrumentation import measure, registry
+from . import analytics, catalogue, exports, fastpath, ical, sync
+from .renderers import FAST_RENDERER_CLASSES
+from .routers import use_primary
+from .availability import busy_runs, encode_bitmap, encode_runs, find_free_slots, room_index
+from datetime import timedelta
+from django.utils import timezone
 
 
 
+def parse_booking_filters(params):
+    filters = {"status": params.get("status")}
+    if params.get("room_id"):
+        if not params["room_id"].isdigit():
+            raise ValidationError({"room_id": "A valid integer is required."})
+        filters["room_id"] = int(params["room_id"])
+    for param in ("start_time", "end_time"):
+        if params.get(param):
+            value = parse_datetime(params[param])
+            if not value:
+                raise ValidationError({param: "Invalid datetime format. Use ISO 8601 (e.g., 2026-01-28T10:00:00Z)"})
+            filters[param] = value
+    return filters
+
+
+def if_match_version(request):
+    """Booking version named by an If-Match header, or None to skip the check."""
+    header = request.headers.get("If-Match")
+    if not header:
+        return None
+    etags = [tag.removeprefix("W/").strip('"') for tag in parse_etags(header)]
+    if "*" in etags:
+        return None
+    # A tag that is not one of our versions can never match.
+    return next((int(tag) for tag in etags if tag.isdigit()), 0)
+
+
+def catalogue_response(request, kind, wrap=None):
+    data, etag, hit = catalogue.get_catalogue(kind)
+    headers = {"ETag": etag, "X-Cache": "HIT" if hit else "MISS"}
+    if catalogue.not_modified(request, etag):
+        return Response(status=status.HTTP_304_NOT_MODIFIED, headers=headers)
+    return Response(wrap(data) if wrap else data, status=status.HTTP_200_OK, headers=headers)
+
+
+def search_rooms(params, start_time=None, end_time=None):
+    """
+    Active rooms matching RoomSearchSerializer ``params`` and, with a time
+    window, free for all of it; best fit (smallest capacity) first. Capacity
+    bounds are applied to the cached catalogue before any overlap check.
+    """
+    data, etag, hit = catalogue.get_catalogue("available")
+    rooms = catalogue.capacity_range(data, etag, params.get("min_capacity"), params.get("max_capacity"))
+    if params.get("q"):
+        q = params["q"].lower()
+        rooms = [room for room in rooms if q in room["name"].lower() or q in (room["description"] or "").lower()]
+    if start_time and end_time and rooms:
+        if settings.MEETINGROOM_AVAILABILITY_INDEX:
+            rooms = [room for room in rooms if room_index.is_free(room["id"], start_time, end_time)]
+        else:
+            booked = Booking.objects.overlapping(start_time, end_time)
+            if len(rooms) < len(data):
+                booked = booked.filter(meeting_room_id__in=[room["id"] for room in rooms])
+            booked = set(booked.values_list("meeting_room_id", flat=True))
+            rooms = [room for room in rooms if room["id"] not in booked]
+    if params.get("limit"):
+        rooms = rooms[:params["limit"]]
+    return rooms
+
+
 class MeetingRoomView(ListAPIView):
     serializer_class=MeetingRoomSerializer
     queryset=MeetingRoom.objects.filter(is_active=True)
+    renderer_classes = FAST_RENDERER_CLASSES
+
+    def list(self, request, *args, **kwargs):
+        return catalogue_response(request, "rooms")
+
+
+class MetricsView(APIView):
+    permission_classes = [AllowAny]
+    def get(self, request):
+        return HttpResponse(registry.render(), content_type="text/plain; version=0.0.4")
+
+
+class CatalogueStatsView(APIView):
+    permission_classes = [AllowAny]
+    def get(self, request):
+        return Response(catalogue.stats(), status=status.HTTP_200_OK)
 
 class BookingRoomView(ListAPIView):
     serializer_class=BookingSerializer
-    queryset=Booking.objects.all()
+    pagination_class=BookingCursorPagination
+    renderer_classes = FAST_RENDERER_CLASSES
+
+    def expand_history(self):
+        return "history" in self.request.query_params.get("expand", "").split(",")
+
+    def archived(self):
+        # Archived bookings are only read when asked for, never mixed into the live listing.
+        return self.request.query_params.get("archived", "").lower() in ("1", "true")
+
+    def get_serializer_class(self):
+        if self.archived():
+            return ArchivedBookingSerializer if self.expand_history() else ArchivedBookingListSerializer
+        return BookingSerializer if self.expand_history() else BookingListSerializer
+
+    def list(self, request, *args, **kwargs):
+        if not settings.MEETINGROOM_FAST_SERIALIZERS:
+            with measure("serializer"):
+                return super().list(request, *args, **kwargs)
+        # Same output as the serializers, built from values() rows.
+        filters = parse_booking_filters(request.query_params)
+        model = ArchivedBooking if self.archived() else Booking
+        page = self.paginate_queryset(fastpath.booking_rows(model.objects.search(**filters)))
+        with measure("serializer"):
+            history_model = model._meta.get_field("history").related_model if self.expand_history() else None
+            return self.get_paginated_response(fastpath.bookings(page, history_model=history_model))
+
+    def get_queryset(self):
+        filters = parse_booking_filters(self.request.query_params)
+        model = ArchivedBooking if self.archived() else Booking
+        queryset = model.objects.select_related("meeting_room", "user").search(**filters)
+        if self.expand_history():
+            queryset = queryset.prefetch_related("history__user")
+        return queryset
+
+class BookingSyncView(APIView):
+    permission_classes = [AllowAny]
+    renderer_classes = FAST_RENDERER_CLASSES
+    def get(self, request):
+        try:
+            serializer = SyncQuerySerializer(data=request.query_params)
+            if not serializer.is_valid():
+                return Response(serializer.errors, status=status.HTTP_400_BAD_REQUEST)
+            # A lagging replica can hold a History row while missing an
+            # earlier one; the token would then skip it for good.
+            with use_primary():
+                token = serializer.validated_data.get("sync_token")
+                if not token:
+                    # First sync: start from the end of the log; the client loads the full list separately.
+                    return Response({"changed": [], "tombstones": [], "sync_token": sync.start_token(), "more": False}, status=status.HTTP_200_OK)
+                try:
+                    booking_ids, token, more = sync.changes_since(token, serializer.validated_data["limit"])
+                except ValueError as e:
+                    return Response({"error": str(e)}, status=status.HTTP_400_BAD_REQUEST)
+                queryset = Booking.objects.filter(id__in=booking_ids)
+                if settings.MEETINGROOM_FAST_SERIALIZERS:
+                    data = fastpath.bookings(fastpath.booking_rows(queryset))
+                else:
+                    data = BookingListSerializer(queryset.select_related("meeting_room", "user"), many=True).data
+                bookings = {booking["id"]: booking for booking in data}
+                changed, tombstones = [], []
+                for booking_id in booking_ids:
+                    booking = bookings.get(booking_id)
+                    if booking is None or booking["status"] == "cancelled":
+                        tombstones.append({"id": booking_id, "status": "cancelled" if booking else "deleted"})
+                    else:
+                        changed.append(booking)
+            return Response({"changed": changed, "tombstones": tombstones, "sync_token": token, "more": more}, status=status.HTTP_200_OK)
+        except Exception as e:
+            return Response({"error": f"Server error: {str(e)}"}, status=status.HTTP_500_INTERNAL_SERVER_ERROR)
+
+
+@require_GET
+def calendar_feed(request, kind, owner_id):
+    """
+    iCalendar feed of a room's (kind="room") or a user's (kind="user")
+    confirmed bookings. A plain Django view: calendar clients send
+    Accept: text/calendar, which DRF's content negotiation would refuse.
+    """
+    state = ical.feed_state(kind, owner_id)
+    if state is None:
+        return JsonResponse({"error": f"{'Meeting room' if kind == 'room' else 'User'} not found"}, status=404)
+    name, etag, last_modified = state
+    # 304 (or 412) straight from the validators, without rendering anything.
+    response = get_conditional_response(request, etag=etag, last_modified=int(last_modified.timestamp()))
+    if response is None:
+        response = HttpResponse(ical.get_body(kind, owner_id, name, etag), content_type=ical.CONTENT_TYPE)
+    response["ETag"] = etag
+    response["Last-Modified"] = http_date(last_modified.timestamp())
+    return response
+
+
+class BookingExportView(APIView):
+    permission_classes = [AllowAny]
+
+    def get(self, request):
+        # "output" rather than "format", which DRF reserves for renderer selection.
+        export_format = request.query_params.get("output", "ndjson")
+        if export_format not in exports.EXPORT_FORMATS:
+            return Response({"error": f"output must be one of {', '.join(exports.EXPORT_FORMATS)}"}, status=status.HTTP_400_BAD_REQUEST)
+        filters = parse_booking_filters(request.query_params)
+        include_history = "history" in request.query_params.get("expand", "").split(",")
+        rows = exports.export_rows(filters, include_history=include_history)
+        response = StreamingHttpResponse(
+            exports.render(rows, export_format, include_history=include_history),
+            content_type=exports.CONTENT_TYPES[export_format],
+        )
+        response["Content-Disposition"] = f'attachment; filename="bookings.{export_format}"'
+        return response
+
 
 class MeetingRoomBookView(APIView):
     permission_classes = [AllowAny]
 
-    @transaction.atomic
+    @idempotent
     def post(self, request, room_id):
         try:
-            room = get_object_or_404(MeetingRoom, id=room_id)
-            if not room.is_active:
-                return Response({"error": "Meeting room is not active"}, status=status.HTTP_400_BAD_REQUEST)
             serializer = BookingCreateSerializer(data=request.data)
             if not serializer.is_valid():
                 return Response(serializer.errors, status=status.HTTP_400_BAD_REQUEST)
             start_time = serializer.validated_data["start_time"]
             end_time = serializer.validated_data["end_time"]
             purpose = serializer.validated_data.get("purpose", "")
-            if not room.is_available(start_time, end_time):
+            user = request.user if request.user.is_authenticated else None
+            try:
+                booking = create_booking(room_id, start_time, end_time, user=user, purpose=purpose)
+            except RoomInactive:
+                return Response({"error": "Meeting room is not active"}, status=status.HTTP_400_BAD_REQUEST)
+            except BookingConflict:
+                return Response(
+                    {
+                        "error": "Meeting room is not available for the selected time slot",
+                        "room_id": room_id,
+                        "start_time": start_time.isoformat(),
+                        "end_time": end_time.isoformat(),
+                    },status=status.HTTP_409_CONFLICT,)
+            with measure("serializer"):
+                data = BookingSerializer(booking).data
+            return Response(
+                {"message": "Booking created successfully", "booking": data},
+                status=status.HTTP_201_CREATED,
+                headers={"ETag": booking.etag},
+            )
+        except MeetingRoom.DoesNotExist:
+            return Response({"error": "Meeting room not found"}, status=status.HTTP_404_NOT_FOUND)
+        except Exception as e:
+            return Response({"error": f"Server error: {str(e)}"}, status=status.HTTP_500_INTERNAL_SERVER_ERROR)
+
+
+class MeetingRoomHoldView(APIView):
+    permission_classes = [AllowAny]
+
+    @idempotent
+    def post(self, request, room_id):
+        try:
+            serializer = HoldSerializer(data=request.data)
+            if not serializer.is_valid():
+                return Response(serializer.errors, status=status.HTTP_400_BAD_REQUEST)
+            start_time = serializer.validated_data["start_time"]
+            end_time = serializer.validated_data["end_time"]
+            user = request.user if request.user.is_authenticated else None
+            try:
+                booking = place_hold(
+                    room_id, start_time, end_time, user=user,
+                    purpose=serializer.validated_data.get("purpose", ""), ttl=serializer.validated_data.get("ttl"),
+                )
+            except RoomInactive:
+                return Response({"error": "Meeting room is not active"}, status=status.HTTP_400_BAD_REQUEST)
+            except BookingConflict:
                 return Response(
                     {
                         "error": "Meeting room is not available for the selected time slot",
@@ -42,20 +285,12 @@ class MeetingRoomBookView(APIView):
                         "start_time": start_time.isoformat(),
                         "end_time": end_time.isoformat(),
                     },status=status.HTTP_409_CONFLICT,)
-            booking_data = {
-                "meeting_room": room.id,
-                "start_time": start_time,
-                "end_time": end_time,
-                "purpose": purpose,
-                "status": "confirmed",
-            }
-            booking_serializer = BookingSerializer(data=booking_data, context={"request": request})
-            if not booking_serializer.is_valid():
-                return Response(booking_serializer.errors, status=status.HTTP_400_BAD_REQUEST)
-            booking_serializer.save()
+            with measure("serializer"):
+                data = BookingSerializer(booking).data
             return Response(
-                {"message": "Booking created successfully", "booking": booking_serializer.data},
+                {"message": "Hold placed successfully", "booking": data, "hold_expires_at": booking.hold_expires_at},
                 status=status.HTTP_201_CREATED,
+                headers={"ETag": booking.etag},
             )
         except MeetingRoom.DoesNotExist:
             return Response({"error": "Meeting room not found"}, status=status.HTTP_404_NOT_FOUND)
@@ -63,13 +298,55 @@ class MeetingRoomBookView(APIView):
             return Response({"error": f"Server error: {str(e)}"}, status=status.HTTP_500_INTERNAL_SERVER_ERROR)
 
 
+class BatchBookingView(APIView):
+    permission_classes = [AllowAny]
+
+    @idempotent
+    def post(self, request):
+        try:
+            serializer = BatchBookingSerializer(data=request.data)
+            if not serializer.is_valid():
+                return Response(serializer.errors, status=status.HTTP_400_BAD_REQUEST)
+            params = serializer.validated_data
+            user = request.user if request.user.is_authenticated else None
+            results = create_bookings_batch(
+                params["occurrences"],
+                user=user,
+                purpose=params["purpose"],
+                atomic=params["mode"] == "atomic",
+            )
+            created = sum(1 for result in results if result["status"] == "created")
+            if created == len(results):
+                response_status = status.HTTP_201_CREATED
+            elif created:
+                response_status = status.HTTP_207_MULTI_STATUS
+            else:
+                response_status = status.HTTP_409_CONFLICT
+            for result in results:
+                result["start_time"] = result["start_time"].isoformat()
+                result["end_time"] = result["end_time"].isoformat()
+            return Response({
+                "mode": params["mode"],
+                "created": created,
+                "failed": len(results) - created,
+                "results": results,
+            }, status=response_status)
+        except Exception as e:
+            return Response({"error": f"Server error: {str(e)}"}, status=status.HTTP_500_INTERNAL_SERVER_ERROR)
+
+
 class AvailableRoomsView(APIView):
     permission_classes = [AllowAny]
+    renderer_classes = FAST_RENDERER_CLASSES
     def get(self, request):
         try:
             start_time_str = request.query_params.get('start_time')
             end_time_str = request.query_params.get('end_time')
+            search = RoomSearchSerializer(data=request.query_params)
+            if not search.is_valid():
+                return Response(search.errors, status=status.HTTP_400_BAD_REQUEST)
             rooms = MeetingRoom.objects.filter(is_active=True)
+            start_time = end_time = None
             if start_time_str and end_time_str:
                 start_time = parse_datetime(start_time_str)
                 end_time = parse_datetime(end_time_str)
@@ -77,45 +354,252 @@ class AvailableRoomsView(APIView):
                     return Response({"error": "Invalid datetime format. Use ISO 8601 (e.g., 2026-01-28T10:00:00Z)"}, status=status.HTTP_400_BAD_REQUEST)
                 if start_time >= end_time:
                     return Response({"error": "End time must be after start time"}, status=status.HTTP_400_BAD_REQUEST)
-                booked = Booking.objects.filter(status__in=["confirmed", "pending"],start_time__lt=end_time,end_time__gt=start_time).values_list("meeting_room_id", flat=True)
-                available_rooms = rooms.exclude(id__in=booked)
-                serializer = AvailableRoomSerializer(available_rooms, many=True)
+            if search.validated_data:
+                data = search_rooms(search.validated_data, start_time, end_time)
+                response = {"available_rooms": data}
+                if start_time:
+                    response.update(start_time=start_time.isoformat(), end_time=end_time.isoformat())
+                response["count"] = len(data)
+                return Response(response, status=status.HTTP_200_OK)
+            if start_time and settings.MEETINGROOM_FAST_SERIALIZERS:
+                # The cached catalogue holds these rooms already serialized, in the same order.
+                data, _, _ = catalogue.get_catalogue("available")
+                if settings.MEETINGROOM_AVAILABILITY_INDEX:
+                    data = [room for room in data if room_index.is_free(room["id"], start_time, end_time)]
+                else:
+                    booked = set(Booking.objects.overlapping(start_time, end_time).values_list("meeting_room_id", flat=True))
+                    data = [room for room in data if room["id"] not in booked]
+                return Response({
+                    "available_rooms": data,
+                    "start_time": start_time.isoformat(),
+                    "end_time": end_time.isoformat(),
+                    "count": len(data)
+                }, status=status.HTTP_200_OK)
+            if start_time:
+                if settings.MEETINGROOM_AVAILABILITY_INDEX:
+                    available_rooms = room_index.free_rooms(rooms, start_time, end_time)
+                else:
+                    booked = Booking.objects.overlapping(start_time, end_time).values_list("meeting_room_id", flat=True)
+                    available_rooms = rooms.exclude(id__in=booked)
+                with measure("serializer"):
+                    data = AvailableRoomSerializer(available_rooms, many=True).data
                 return Response({
-                    "available_rooms": serializer.data,
+                    "available_rooms": data,
                     "start_time": start_time.isoformat(),
                     "end_time": end_time.isoformat(),
                     "count": len(available_rooms)
                 }, status=status.HTTP_200_OK)
             else:
-                serializer = AvailableRoomSerializer(rooms, many=True)
-                return Response({"available_rooms": serializer.data,"count": rooms.count()}, status=status.HTTP_200_OK)
+                return catalogue_response(request, "available", lambda data: {"available_rooms": data, "count": len(data)})
+        except Exception as e:
+            return Response({"error": f"Server error: {str(e)}"}, status=status.HTTP_500_INTERNAL_SERVER_ERROR)
+
+
+class FreeSlotsView(APIView):
+    permission_classes = [AllowAny]
+    def get(self, request):
+        try:
+            serializer = FreeSlotQuerySerializer(data=request.query_params)
+            if not serializer.is_valid():
+                return Response(serializer.errors, status=status.HTTP_400_BAD_REQUEST)
+            params = serializer.validated_data
+            start_time = params["start_time"]
+            end_time = params["end_time"]
+            duration = timedelta(minutes=params["duration"])
+            granularity = timedelta(minutes=params["granularity"])
+            now = timezone.now()
+            if start_time < now:
+                # Keep the slot grid anchored on the requested start.
+                start_time += -(-(now - start_time) // granularity) * granularity
+            rooms = MeetingRoom.objects.filter(is_active=True, capacity__gte=params["min_capacity"]).order_by("capacity", "name")
+            slots = find_free_slots(rooms, start_time, end_time, duration, granularity, params["limit"]) if start_time < end_time else []
+            return Response({
+                "slots": [
+                    {
+                        "room_id": room.id,
+                        "room_name": room.name,
+                        "capacity": room.capacity,
+                        "start_time": slot.isoformat(),
+                        "end_time": (slot + duration).isoformat(),
+                    }
+                    for slot, room in slots
+                ],
+                "count": len(slots),
+            }, status=status.HTTP_200_OK)
+        except Exception as e:
+            return Response({"error": f"Server error: {str(e)}"}, status=status.HTTP_500_INTERNAL_SERVER_ERROR)
+
+
+class TimelineView(APIView):
+    permission_classes = [AllowAny]
+    def get(self, request):
+        try:
+            serializer = TimelineQuerySerializer(data=request.query_params)
+            if not serializer.is_valid():
+                return Response(serializer.errors, status=status.HTTP_400_BAD_REQUEST)
+            params = serializer.validated_data
+            start_time = params["start_time"]
+            slot = timedelta(minutes=params["slot"])
+            slots = -(-(params["end_time"] - start_time) // slot)
+            # Active rooms come from the cached catalogue, so Booking is the only query.
+            rooms, _, _ = catalogue.get_catalogue("available")
+            room_ids = params.get("room_id")
+            if room_ids:
+                wanted = set(room_ids)
+                rooms = [room for room in rooms if room["id"] in wanted]
+            runs = busy_runs(start_time, params["end_time"], slot, room_ids=[room["id"] for room in rooms] if room_ids else None)
+            encode = encode_bitmap if params["encoding"] == "bitmap" else encode_runs
+            return Response({
+                "start_time": start_time.isoformat(),
+                "slot_minutes": params["slot"],
+                "slots": slots,
+                "encoding": params["encoding"],
+                "rooms": [{"room_id": room["id"], "busy": encode(runs.get(room["id"], []), slots)} for room in rooms],
+            }, status=status.HTTP_200_OK)
+        except Exception as e:
+            return Response({"error": f"Server error: {str(e)}"}, status=status.HTTP_500_INTERNAL_SERVER_ERROR)
+
+
+class UtilizationView(APIView):
+    permission_classes = [AllowAny]
+    def get(self, request):
+        try:
+            serializer = UtilizationQuerySerializer(data=request.query_params)
+            if not serializer.is_valid():
+                return Response(serializer.errors, status=status.HTTP_400_BAD_REQUEST)
+            params = serializer.validated_data
+            rooms = analytics.utilization(
+                params["start_date"], params["end_date"], period=params["period"], room_id=params.get("room_id")
+            )
+            return Response({
+                "start_date": params["start_date"],
+                "end_date": params["end_date"],
+                "period": params["period"],
+                "rooms": rooms,
+            }, status=status.HTTP_200_OK)
         except Exception as e:
             return Response({"error": f"Server error: {str(e)}"}, status=status.HTTP_500_INTERNAL_SERVER_ERROR)
 
 
 class BookingCancelView(APIView):
     permission_classes = [AllowAny]
-    @transaction.atomic
+    @idempotent
     def post(self, request, booking_id):
         try:
-            booking = get_object_or_404(Booking, id=booking_id)
-            if booking.status == 'cancelled':
+            user = request.user if request.user.is_authenticated else None
+            try:
+                booking = cancel_booking(booking_id, expected_version=if_match_version(request), user=user)
+            except AlreadyCancelled:
                 return Response({'error': 'Booking already cancelled'}, status=status.HTTP_400_BAD_REQUEST)
-            previous_start = booking.start_time
-            previous_end = booking.end_time
-            booking.status = 'cancelled'
-            booking.save()
-            History.objects.create(
-                booking=booking,
-                action='cancelled',
-                user=None,
-                notes='Cancelled via API',
-                previous_start_time=previous_start,
-                previous_end_time=previous_end
-            )
-            return Response({'message': 'Booking cancelled successfully'}, status=status.HTTP_200_OK)
+            except VersionMismatch as e:
+                return Response({'error': str(e)}, status=status.HTTP_412_PRECONDITION_FAILED)
+            return Response({'message': 'Booking cancelled successfully'}, status=status.HTTP_200_OK, headers={'ETag': booking.etag})
         except Booking.DoesNotExist:
             return Response({'error': 'Booking not found'}, status=status.HTTP_404_NOT_FOUND)
         except Exception as e:
             return Response({'error': f'Server error: {str(e)}'}, status=status.HTTP_500_INTERNAL_SERVER_ERROR)
 
+
+
+class BookingConfirmView(APIView):
+    permission_classes = [AllowAny]
+
+    @idempotent
+    def post(self, request, booking_id):
+        try:
+            user = request.user if request.user.is_authenticated else None
+            try:
+                booking = confirm_hold(booking_id, expected_version=if_match_version(request), user=user)
+            except HoldExpired as e:
+                return Response({"error": str(e)}, status=status.HTTP_410_GONE)
+            except (AlreadyCancelled, NotAHold) as e:
+                return Response({"error": str(e)}, status=status.HTTP_400_BAD_REQUEST)
+            except VersionMismatch as e:
+                return Response({"error": str(e)}, status=status.HTTP_412_PRECONDITION_FAILED)
+            with measure("serializer"):
+                data = BookingSerializer(booking).data
+            return Response(
+                {"message": "Booking confirmed successfully", "booking": data},
+                status=status.HTTP_200_OK,
+                headers={"ETag": booking.etag},
+            )
+        except Booking.DoesNotExist:
+            return Response({"error": "Booking not found"}, status=status.HTTP_404_NOT_FOUND)
+        except Exception as e:
+            return Response({"error": f"Server error: {str(e)}"}, status=status.HTTP_500_INTERNAL_SERVER_ERROR)
+
+
+class BookingRescheduleView(APIView):
+    permission_classes = [AllowAny]
+
+    @idempotent
+    def post(self, request, booking_id):
+        try:
+            serializer = RescheduleSerializer(data=request.data)
+            if not serializer.is_valid():
+                return Response(serializer.errors, status=status.HTTP_400_BAD_REQUEST)
+            start_time = serializer.validated_data["start_time"]
+            end_time = serializer.validated_data["end_time"]
+            user = request.user if request.user.is_authenticated else None
+            try:
+                booking = reschedule_booking(
+                    booking_id, start_time, end_time, expected_version=if_match_version(request), user=user
+                )
+            except RoomInactive:
+                return Response({"error": "Meeting room is not active"}, status=status.HTTP_400_BAD_REQUEST)
+            except AlreadyCancelled as e:
+                return Response({"error": str(e)}, status=status.HTTP_400_BAD_REQUEST)
+            except VersionMismatch as e:
+                return Response({"error": str(e)}, status=status.HTTP_412_PRECONDITION_FAILED)
+            except BookingConflict:
+                return Response(
+                    {
+                        "error": "Meeting room is not available for the selected time slot",
+                        "booking_id": booking_id,
+                        "start_time": start_time.isoformat(),
+                        "end_time": end_time.isoformat(),
+                    }, status=status.HTTP_409_CONFLICT)
+            with measure("serializer"):
+                data = BookingSerializer(booking).data
+            return Response(
+                {"message": "Booking rescheduled successfully", "booking": data},
+                status=status.HTTP_200_OK,
+                headers={"ETag": booking.etag},
+            )
+        except Booking.DoesNotExist:
+            return Response({"error": "Booking not found"}, status=status.HTTP_404_NOT_FOUND)
+        except Exception as e:
+            return Response({"error": f"Server error: {str(e)}"}, status=status.HTTP_500_INTERNAL_SERVER_ERROR)
+
+
+class RoomShiftView(APIView):
+    permission_classes = [AllowAny]
+
+    @idempotent
+    def post(self, request, room_id):
+        try:
+            serializer = ShiftBookingsSerializer(data=request.data)
+            if not serializer.is_valid():
+                return Response(serializer.errors, status=status.HTTP_400_BAD_REQUEST)
+            params = serializer.validated_data
+            user = request.user if request.user.is_authenticated else None
+            try:
+                moved = shift_bookings(
+                    room_id, timedelta(minutes=params["minutes"]),
+                    start_time=params.get("start_time"), end_time=params.get("end_time"), user=user,
+                )
+            except BookingConflict as e:
+                return Response({"error": str(e), "booking_ids": e.booking_ids}, status=status.HTTP_409_CONFLICT)
+            except DjangoValidationError as e:
+                return Response({"error": e.messages[0]}, status=status.HTTP_400_BAD_REQUEST)
+            return Response({
+                "moved": len(moved),
+                "bookings": [
+                    {"id": booking_id, "start_time": start_time.isoformat(), "end_time": end_time.isoformat()}
+                    for booking_id, start_time, end_time in moved
+                ],
+            }, status=status.HTTP_200_OK)
+        except MeetingRoom.DoesNotExist:
+            return Response({"error": "Meeting room not found"}, status=status.HTTP_404_NOT_FOUND)
+        except Exception as e:
+            return Response({"error": f"Server error: {str(e)}"}, status=status.HTTP_500_INTERNAL_SERVER_ERROR)